@@ -1,9 +1,16 @@
-from flask import Flask, jsonify
+from flask import Flask, jsonify, request
 from flask_cors import CORS
 import pandas as pd
 import os
 import sys
 
+from data_cache import DatasetCache
+from metrics import instrument_app, stage
+from shot_optimizer import optimizer_from_env
+from shot_engine import compute_shot_optimization
+from shot_schema import read_shot_locations
+from team_payload import build_team_index, conditional_json, format_team_payload, parse_fields, project_payload
+
 app = Flask(__name__)
 CORS(app)
 
@@ -17,10 +24,15 @@ shot_types = {
     'AB3': 3    # Above Break 3 (3 points)
 }
 
-def analyze_shot_optimization(df):
+def analyze_shot_optimization(df, optimizer=None):
     """
     Analyzes how teams should adjust their shot selection based on Expected Value.
     Includes both current and optimal makes calculations.
+
+    All rows are computed at once by the columnar engine, so df may hold a
+    single season or many team-seasons. By default the optimal mix is
+    proportional to zone EV; pass a shot_optimizer.ShotMixOptimizer to
+    solve the constrained problem instead.
     """
     # First calculate EV for each shot type
     for shot_type, points in shot_types.items():
@@ -29,88 +41,53 @@ def analyze_shot_optimization(df):
     # Calculate total EV and FGA
     df['Total_EV'] = sum(df[f'EV_{shot_type}'] for shot_type in shot_types)
     df['Total_FGA'] = sum(df[f'{shot_type}_FGA'] for shot_type in shot_types)
+
+    return compute_shot_optimization(
+        df,
+        ft_points='FT',
+        ft_attempts='FTA',
+        ft_percentage='FT%',
+        shot_types=shot_types,
+        optimizer=optimizer
+    )
+
+# Constrained shot-mix optimizer, None keeps the EV-proportional mix
+shot_optimizer = optimizer_from_env()
+
+def load_team_data():
+    """
+    Loads the shot zone and team stats CSVs, merges them and runs the analysis.
     
-    analysis_results = []
+    Returns:
+    dict: The analysis and the team -> row index
+    """
+    # Load CSVs from current directory
+    with stage('csv_read'):
+        df1 = read_shot_locations('nba_team_stats_shot_zones.csv')
+        df2 = pd.read_csv('nba_team_stats.csv')
     
-    for _, team in df.iterrows():
-        team_analysis = {'Team': team['Team']}
-        
-        # Calculate current points and makes from field goals
-        current_fg_points = 0
-        for shot_type, points in shot_types.items():
-            current_attempts = team[f'{shot_type}_FGA']
-            current_fg_pct = team[f'{shot_type}_FG%'] / 100
-            current_makes = current_attempts * current_fg_pct
-            current_points = current_makes * points
-            current_fg_points += current_points
-        
-        # Add free throw points
-        current_ft_points = team['FT']
-        current_total_points = current_fg_points + current_ft_points
-        
-        # Calculate optimal points (keeping free throws the same)
-        shot_evs = {shot_type: team[f'{shot_type}_FG%'] / 100 * points 
-                   for shot_type, points in shot_types.items()}
-        total_ev = sum(shot_evs.values())
-        
-        optimal_fg_points = 0
-        for shot_type, points in shot_types.items():
-            optimal_proportion = shot_evs[shot_type] / total_ev
-            optimal_attempts = team['Total_FGA'] * optimal_proportion
-            optimal_fg_pct = team[f'{shot_type}_FG%'] / 100
-            optimal_makes = optimal_attempts * optimal_fg_pct
-            optimal_points = optimal_makes * points
-            optimal_fg_points += optimal_points
-        
-        optimal_total_points = optimal_fg_points + current_ft_points
-        
-        team_analysis.update({
-            'current_ppg': current_total_points,
-            'optimal_ppg': optimal_total_points,
-            'ft_points': current_ft_points,
-            'ft_attempts': team['FTA'],
-            'ft_percentage': team['FT%']
-        })
-        
-        for shot_type in shot_types:
-            fg_pct = team[f'{shot_type}_FG%'] / 100
-            ev = fg_pct * shot_types[shot_type]
-            
-            # Current statistics
-            current_attempts = team[f'{shot_type}_FGA']
-            current_makes = current_attempts * fg_pct
-            
-            # Optimal statistics
-            optimal_proportion = shot_evs[shot_type] / total_ev
-            optimal_attempts = team['Total_FGA'] * optimal_proportion
-            optimal_makes = optimal_attempts * fg_pct
-            attempt_difference = optimal_attempts - current_attempts
-            makes_difference = optimal_makes - current_makes
-            
-            team_analysis.update({
-                f'{shot_type}_Current_FG%': fg_pct,
-                f'{shot_type}_EV': ev,
-                f'{shot_type}_Current_Attempts': current_attempts,
-                f'{shot_type}_Current_Makes': current_makes,
-                f'{shot_type}_Optimal_Attempts': optimal_attempts,
-                f'{shot_type}_Optimal_Makes': optimal_makes,
-                f'{shot_type}_Attempt_Diff': attempt_difference,
-                f'{shot_type}_Makes_Diff': makes_difference
-            })
-        
-        analysis_results.append(team_analysis)
+    with stage('merge'):
+        df = pd.merge(df1, df2, on='Team', how='inner')
+    
+    with stage('analysis'):
+        analysis_df = analyze_shot_optimization(df, optimizer=shot_optimizer)
     
-    return pd.DataFrame(analysis_results)
+    return {'analysis': analysis_df, 'team_index': build_team_index(analysis_df)}
+
+# Analysis results stay in memory until one of the CSVs changes
+team_data_cache = DatasetCache(
+    ['nba_team_stats_shot_zones.csv', 'nba_team_stats.csv'],
+    load_team_data
+)
+
+# Request latency, stage timings, cache hit ratios and data age at /metrics
+instrument_app(app, 'api', {'team_data': team_data_cache})
 
 @app.route('/test', methods=['GET'])
 def test():
     print("\n=== Starting test route ===", flush=True)
     try:
-        # Load CSVs from current directory
-        df1 = pd.read_csv('nba_team_stats_shot_zones.csv')
-        df2 = pd.read_csv('nba_team_stats.csv')
-        df = pd.merge(df1, df2, on='Team', how='inner')
-        teams = list(df['Team'].unique())
+        teams = list(team_data_cache.get().data['team_index'])
         
         return jsonify({
             "message": "API is working!",
@@ -121,56 +98,62 @@ def test():
         print("ERROR:", str(e), flush=True)
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify(team_data_cache.stats())
+
 @app.route('/api/team-data', methods=['GET'])
 def serve_team_data():
     try:
-        # Load CSVs from current directory
-        df1 = pd.read_csv('nba_team_stats_shot_zones.csv')
-        df2 = pd.read_csv('nba_team_stats.csv')
-        df = pd.merge(df1, df2, on='Team', how='inner')
+        fields = parse_fields(request.args.get('fields'), shot_types)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        dataset = team_data_cache.get()
+        analysis_df = dataset.data['analysis']
         
-        analysis_df = analyze_shot_optimization(df)
+        # Format response, only when the client's copy is not current
+        def build_team_data():
+            with stage('json'):
+                team_rows = analysis_df.to_dict('records')
+                team_data = {}
+                for team_name, position in dataset.data['team_index'].items():
+                    team_payload = format_team_payload(team_rows[position], shot_types)
+                    team_data[team_name] = project_payload(team_payload, fields, shot_types)
+                return team_data
+        
+        return conditional_json(build_team_data, dataset.version, dataset.modified_at, ','.join(fields))
+        
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/team-data/<team_name>', methods=['GET'])
+def serve_single_team_data(team_name):
+    try:
+        fields = parse_fields(request.args.get('fields'), shot_types)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        dataset = team_data_cache.get()
+        position = dataset.data['team_index'].get(team_name)
+        if position is None:
+            return jsonify({"error": f"Unknown team '{team_name}'"}), 404
         
-        team_data = {}
-        for team_name in df['Team'].unique():
-            team_analysis = analysis_df[analysis_df['Team'] == team_name].iloc[0]
-            
-            team_data[team_name] = {
-                "current": {
-                    "ppg": float(team_analysis['current_ppg']),
-                    "free_throws": {
-                        "attempts": float(team_analysis['ft_attempts']),
-                        "percentage": float(team_analysis['ft_percentage']),
-                        "points": float(team_analysis['ft_points'])
-                    }
-                },
-                "optimal": {
-                    "ppg": float(team_analysis['optimal_ppg'])
-                },
-                "impact": {
-                    "points_difference": float(team_analysis['optimal_ppg'] - team_analysis['current_ppg'])
-                }
-            }
-            
-            for shot_type in shot_types:
-                team_data[team_name]["current"][shot_type] = {
-                    "attempts": float(team_analysis[f'{shot_type}_Current_Attempts']),
-                    "makes": float(team_analysis[f'{shot_type}_Current_Makes']),
-                    "percentage": float(team_analysis[f'{shot_type}_Current_FG%']),
-                    "ev": float(team_analysis[f'{shot_type}_EV'])
-                }
-                
-                team_data[team_name]["optimal"][shot_type] = {
-                    "attempts": float(team_analysis[f'{shot_type}_Optimal_Attempts']),
-                    "makes": float(team_analysis[f'{shot_type}_Optimal_Makes'])
-                }
-                
-                team_data[team_name]["impact"][shot_type] = {
-                    "attempt_difference": float(team_analysis[f'{shot_type}_Attempt_Diff']),
-                    "makes_difference": float(team_analysis[f'{shot_type}_Makes_Diff'])
-                }
+        def build_team_payload():
+            with stage('json'):
+                team_payload = format_team_payload(dataset.data['analysis'].iloc[position], shot_types)
+                return project_payload(team_payload, fields, shot_types)
         
-        return jsonify(team_data)
+        return conditional_json(
+            build_team_payload,
+            dataset.version,
+            dataset.modified_at,
+            team_name,
+            ','.join(fields)
+        )
         
     except Exception as e:
         print("ERROR:", str(e), flush=True)
@@ -180,4 +163,5 @@ if __name__ == '__main__':
     print("\n=== Starting Flask Server ===", flush=True)
     print("Try accessing: http://127.0.0.1:5000/test", flush=True)
     sys.stdout.flush()
+    # Debug server for development; serve.py runs the preloaded multi-worker setup
     app.run(debug=True, port=5000)
\ No newline at end of file
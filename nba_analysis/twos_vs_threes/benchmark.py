@@ -0,0 +1,370 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from shot_schema import API_ZONE_NAMES
+
+RESULTS_DIR = 'benchmark_results'
+
+# Synthetic dataset sizes: name -> (teams or players, seasons)
+SCALES = {
+    'league': (30, 1),
+    'league_30_seasons': (30, 30),
+    'players': (500, 1),
+    'players_30_seasons': (500, 30)
+}
+
+# Slowdown vs the baseline that is reported as a regression
+REGRESSION_THRESHOLD = 1.25
+
+
+def synthetic_frames(entities, seasons, seed=0):
+    """
+    Builds raw API-format shot location and team stats frames.
+
+    Rows are entities x seasons (teams, or players standing in for teams),
+    with plausible per-game zone volumes and percentages.
+
+    Parameters:
+    entities (int): Teams or players per season
+    seasons (int): Number of seasons
+    seed (int): Random seed
+
+    Returns:
+    tuple: (df_shots with two-level columns, df_stats)
+    """
+    rng = np.random.default_rng(seed)
+    rows = entities * seasons
+    ids = np.tile(np.arange(1610612737, 1610612737 + entities), seasons)
+    names = np.array([f'Team {i}' for i in range(entities)])[np.arange(rows) % entities]
+    season_labels = np.repeat([f'{2000 + s}-{(2001 + s) % 100:02d}' for s in range(seasons)], entities)
+
+    shots = {('', 'TEAM_ID'): ids, ('', 'TEAM_NAME'): names}
+    volumes = {'RA': 28, 'NRA': 18, 'MR': 8, 'LC3': 4, 'RC3': 4, 'AB3': 28}
+    percentages = {'RA': 0.64, 'NRA': 0.44, 'MR': 0.41, 'LC3': 0.38, 'RC3': 0.38, 'AB3': 0.35}
+    for zone, api_zone in API_ZONE_NAMES.items():
+        fga = np.round(rng.normal(volumes[zone], volumes[zone] * 0.15, rows).clip(0.5), 1)
+        fg_pct = np.round(rng.normal(percentages[zone], 0.03, rows).clip(0.05, 0.95), 3)
+        shots[(api_zone, 'FGM')] = np.round(fga * fg_pct, 1)
+        shots[(api_zone, 'FGA')] = fga
+        shots[(api_zone, 'FG_PCT')] = fg_pct
+    df_shots = pd.DataFrame(shots)
+    df_shots.columns = pd.MultiIndex.from_tuples(df_shots.columns)
+
+    games = rng.integers(20, 83, rows)
+    wins = rng.binomial(games, 0.5)
+    fta = np.round(rng.normal(22, 3, rows), 1)
+    ft_pct = np.round(rng.normal(0.78, 0.04, rows), 3)
+    df_stats = pd.DataFrame({
+        'TEAM_ID': ids,
+        'TEAM_NAME': names,
+        'GP': games,
+        'W': wins,
+        'L': games - wins,
+        'FTM': np.round(fta * ft_pct, 1),
+        'FTA': fta,
+        'FT_PCT': ft_pct,
+        'PTS': np.round(rng.normal(114, 5, rows), 1),
+        'PLUS_MINUS': np.round(rng.normal(0, 5, rows), 1)
+    })
+
+    if seasons > 1:
+        df_shots[('', 'Season')] = season_labels
+        df_stats['Season'] = season_labels
+    return df_shots, df_stats
+
+
+def legacy_frame(merged_df):
+    """
+    Renames tester-format merged data to the legacy api.py column names.
+    """
+    return merged_df.rename(columns={'FT_FGM': 'FT', 'FT_FGA': 'FTA', 'FT_PCT': 'FT%'})
+
+
+def measure(func, repeat=5, number=None):
+    """
+    Times func, timeit style: the best of repeat rounds of number calls.
+
+    When number is not given it is chosen so a round takes at least ~0.2s.
+
+    Returns:
+    dict: Seconds per call (best and median over rounds) and calls timed
+    """
+    if number is None:
+        number = 1
+        while True:
+            start = time.perf_counter()
+            for _ in range(number):
+                func()
+            if time.perf_counter() - start >= 0.2 or number >= 10000:
+                break
+            number *= 10
+
+    rounds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        rounds.append((time.perf_counter() - start) / number)
+
+    return {'best': min(rounds), 'median': float(np.median(rounds)), 'number': number, 'repeat': repeat}
+
+
+def analysis_cases(df_shots, df_stats):
+    """
+    Returns the analysis-path benchmark callables for one dataset.
+    """
+    import api
+    import team_analysis
+    from shot_optimizer import ShotMixOptimizer
+
+    transformed = team_analysis.transform_shot_location_data(df_shots)
+    merged = team_analysis.merge_team_data(transformed, df_stats)
+    legacy = legacy_frame(merged)
+    optimizer = ShotMixOptimizer()
+    rows = list(zip(
+        np.random.default_rng(1).normal(112, 5, len(merged)),
+        np.random.default_rng(2).normal(114, 5, len(merged)),
+        merged['W'], merged['GP'], merged['PLUS_MINUS']
+    ))
+
+    def win_impact():
+        for current_pts, optimal_pts, wins, games, plus_minus in rows:
+            team_analysis.calculate_win_impact(current_pts, optimal_pts, wins, games, plus_minus)
+
+    return {
+        'transform_shot_location_data': lambda: team_analysis.transform_shot_location_data(df_shots),
+        'merge_team_data': lambda: team_analysis.merge_team_data(transformed, df_stats),
+        'analyze_shot_optimization[api]': lambda: api.analyze_shot_optimization(legacy.copy()),
+        'analyze_shot_optimization[tester]': lambda: team_analysis.analyze_shot_optimization(merged.copy()),
+        'analyze_shot_optimization[tester,optimizer]': lambda: team_analysis.analyze_shot_optimization(
+            merged.copy(), optimizer=optimizer
+        ),
+        'calculate_win_impact': win_impact
+    }
+
+
+def serving_cases(df_shots, df_stats, scratch):
+    """
+    Returns end-to-end Flask benchmark callables serving the dataset.
+
+    The synthetic CSVs are written to the scratch directory, which becomes
+    the working directory, so tester_api's cache reads them as its sources.
+    The caller owns the directory and removes it once the cases have run.
+    """
+    import tester_api
+
+    os.chdir(scratch)
+    df_shots.to_csv(tester_api.TEAM_DATA_SOURCES[0], index=False)
+    df_stats.to_csv(tester_api.TEAM_DATA_SOURCES[1], index=False)
+    tester_api.team_data_cache.invalidate()
+
+    client = tester_api.app.test_client()
+    team_name = df_stats['TEAM_NAME'].iloc[0]
+
+    def get(path, **kwargs):
+        response = client.get(path, **kwargs)
+        if response.status_code not in (200, 304):
+            raise RuntimeError(f"{path} returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+        return response
+
+    etag = get('/api/team-data').headers['ETag']
+
+    def cold_load():
+        tester_api.team_data_cache.invalidate()
+        get('/api/team-data/' + team_name)
+
+    return {
+        'serve_team_data': lambda: get('/api/team-data'),
+        'serve_team_data[fields=impact]': lambda: get('/api/team-data?fields=impact'),
+        'serve_team_data[304]': lambda: get('/api/team-data', headers={'If-None-Match': etag}),
+        'serve_single_team_data': lambda: get('/api/team-data/' + team_name),
+        'serve_single_team_data[cold]': cold_load
+    }
+
+
+def frame_bytes(df):
+    """
+    Returns a DataFrame's deep memory usage, including its index and text columns.
+    """
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+
+def dataset_footprint(df_shots, df_stats):
+    """
+    Measures the team dataset held by tester_api's cache.
+
+    'frames' counts every frame a load builds (merged data, analysis and
+    intervals); 'retained' counts what load_team_data keeps: the model
+    input columns, the analysis and the intervals. Interval values don't
+    change the footprint, so few resamples are drawn.
+
+    Returns:
+    dict: Bytes built and retained, and their ratio
+    """
+    import team_analysis
+    from uncertainty import compute_intervals
+
+    merged = team_analysis.merge_team_data(team_analysis.transform_shot_location_data(df_shots), df_stats)
+    analysis_df = team_analysis.analyze_shot_optimization(merged)
+    intervals_df = compute_intervals(merged, team_analysis.shot_types, resamples=200, workers=None)
+
+    frames = frame_bytes(merged) + frame_bytes(analysis_df) + frame_bytes(intervals_df)
+    retained = frame_bytes(merged[team_analysis.model_input_columns()]) + frame_bytes(analysis_df) + frame_bytes(intervals_df)
+    return {'frames': frames, 'retained': retained, 'ratio': retained / frames}
+
+
+def git_commit():
+    """
+    Returns the current commit hash, with a -dirty suffix for local changes.
+    """
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+        dirty = subprocess.check_output(
+            ['git', 'status', '--porcelain', '--untracked-files=no'], text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return f'{commit}-dirty' if dirty else commit
+
+
+def run_benchmarks(scales=tuple(SCALES), include=None, repeat=5):
+    """
+    Runs every benchmark case at every scale.
+
+    Parameters:
+    scales (list): Keys of SCALES
+    include (str): Only run cases whose name contains this text
+    repeat (int): Timing rounds per case
+
+    Returns:
+    tuple: ('{case}/{scale}' -> timing, scale -> dataset footprint)
+    """
+    home = os.getcwd()
+    results = {}
+    memory = {}
+    try:
+        for scale in scales:
+            entities, seasons = SCALES[scale]
+            df_shots, df_stats = synthetic_frames(entities, seasons)
+
+            memory[scale] = dataset_footprint(df_shots, df_stats)
+            print(
+                f"{'team_data_footprint':<45} {scale:<20} {memory[scale]['frames'] / 1e6:>8.2f} MB"
+                f" -> {memory[scale]['retained'] / 1e6:.2f} MB ({memory[scale]['ratio']:.0%})"
+            )
+
+            with tempfile.TemporaryDirectory(prefix='nba_benchmark_') as scratch:
+                cases = analysis_cases(df_shots, df_stats)
+                cases.update(serving_cases(df_shots, df_stats, scratch))
+
+                for name, func in cases.items():
+                    if include and include not in name:
+                        continue
+                    timing = measure(func, repeat)
+                    results[f'{name}/{scale}'] = timing
+                    print(f"{name:<45} {scale:<20} {timing['best'] * 1000:>10.3f} ms")
+                # Leave the scratch directory before it is removed
+                os.chdir(home)
+    finally:
+        os.chdir(home)
+    return results, memory
+
+
+def save_results(results, memory=None, results_dir=RESULTS_DIR):
+    """
+    Stores a run under the current commit so later commits can compare.
+
+    Returns:
+    str: Path of the written results file
+    """
+    commit = git_commit()
+    os.makedirs(results_dir, exist_ok=True)
+    path = os.path.join(results_dir, f'{commit}.json')
+    with open(path, 'w') as f:
+        json.dump({
+            'commit': commit,
+            'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': sys.version.split()[0],
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.platform(),
+            'results': results,
+            'memory': memory or {}
+        }, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(baseline, results_dir=RESULTS_DIR, exclude=None):
+    """
+    Loads a stored run by commit, or the most recent one when baseline is None.
+    """
+    if baseline:
+        path = os.path.join(results_dir, f'{baseline}.json')
+    else:
+        try:
+            runs = [
+                os.path.join(results_dir, name) for name in os.listdir(results_dir)
+                if name.endswith('.json') and name != f'{exclude}.json'
+            ]
+        except FileNotFoundError:
+            return None
+        if not runs:
+            return None
+        path = max(runs, key=os.path.getmtime)
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(results, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Prints each case's change vs a baseline run and returns the regressions.
+
+    Returns:
+    list: Case names that slowed down by more than threshold
+    """
+    print(f"\nCompared with {baseline['commit']} ({baseline['created_at']}):")
+    regressions = []
+    for name, timing in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        ratio = timing['best'] / previous['best']
+        flag = ' REGRESSION' if ratio > threshold else ''
+        print(f"{name:<66} {ratio:>6.2f}x{flag}")
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the analysis, transform and serving paths")
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=list(SCALES))
+    parser.add_argument('--include', help="Only run cases whose name contains this text")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', help="Commit to compare against, defaults to the latest stored run")
+    parser.add_argument('--no-save', action='store_true', help="Don't store this run")
+    args = parser.parse_args()
+
+    results, memory = run_benchmarks(args.scales, args.include, args.repeat)
+
+    commit = git_commit()
+    baseline = load_baseline(args.baseline, exclude=commit)
+    regressions = compare_results(results, baseline) if baseline else []
+
+    if not args.no_save:
+        print(f"\nSaved results to {save_results(results, memory)}")
+
+    sys.exit(1 if regressions else 0)
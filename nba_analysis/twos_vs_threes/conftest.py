@@ -0,0 +1,42 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Raw NBA API CSVs the tests analyze, copied so tests never write next to the real ones
+TEAM_CSVS = ['api_nba_team_stats_shot_zones.csv', 'api_nba_team_stats.csv']
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """
+    Temporary working directory holding copies of the team CSVs.
+    """
+    for name in TEAM_CSVS:
+        shutil.copy(os.path.join(PACKAGE_DIR, name), tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+@pytest.fixture
+def merged_team_data(data_dir):
+    """
+    The current season's merged team data, as load_team_data builds it.
+    """
+    from shot_schema import read_shot_locations
+    from team_analysis import merge_team_data, shot_types
+
+    return merge_team_data(read_shot_locations(TEAM_CSVS[0], list(shot_types)), pd.read_csv(TEAM_CSVS[1]))
+
+
+@pytest.fixture
+def client(data_dir):
+    """
+    Flask test client for tester_api, serving the copied CSVs.
+    """
+    import tester_api
+
+    return tester_api.app.test_client()
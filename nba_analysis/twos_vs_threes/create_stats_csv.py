@@ -1,11 +1,13 @@
 from nba_api.stats.endpoints import leaguedashteamstats
 import pandas as pd
 
-def fetch_nba_stats():
+from data_cache import write_csv_atomic
+
+def fetch_nba_stats(season='2023-24'):
     try:
         # Fetch team stats from NBA API
         team_stats = leaguedashteamstats.LeagueDashTeamStats(
-            season='2023-24',
+            season=season,
             season_type_all_star='Regular Season',
             per_mode_detailed='PerGame'
         )
@@ -14,7 +16,7 @@ def fetch_nba_stats():
         df = team_stats.get_data_frames()[0]
         
         # Save to CSV
-        df.to_csv('nba_team_stats.csv', index=False)
+        write_csv_atomic(df, 'nba_team_stats.csv', index=False)
         print("Successfully updated NBA stats!")
         return df
         
@@ -0,0 +1,207 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import namedtuple
+
+# A loaded dataset plus the identity of the files it was built from
+CachedDataset = namedtuple('CachedDataset', ['data', 'version', 'signature', 'loaded_at', 'modified_at'])
+
+
+def file_hash(path, chunk_size=1 << 20):
+    """
+    Returns the SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_stat(path):
+    """
+    Returns the (mtime_ns, size) pair used as the cheap change check.
+    """
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def write_csv_atomic(df, path, **to_csv_kwargs):
+    """
+    Writes df to path through a temporary file and a rename.
+
+    Readers see either the previous file or the complete new one, never a
+    half-written CSV.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f'.{os.path.basename(path)}.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            df.to_csv(f, **to_csv_kwargs)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+class DatasetCache:
+    """
+    Keeps a dataset built from source files in memory until a file changes.
+
+    Each lookup stats the source files. Only when a file's mtime or size
+    moves is its content hashed, and only when a content hash differs is the
+    loader run again, so touching a file without changing it stays a hit.
+
+    The loader runs outside the lock that guards the cached entry, and the
+    new entry is swapped in when it is complete. While one thread rebuilds,
+    other lookups are served the previous entry instead of waiting.
+
+    Parameters:
+    paths (list): Source files the dataset is built from
+    loader (callable): Zero-argument function returning the dataset
+    refresh (callable): Optional function taking the previous dataset and
+    returning the new one, used instead of loader once a dataset is loaded
+    """
+
+    def __init__(self, paths, loader, refresh=None):
+        self.paths = list(paths)
+        self.loader = loader
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._entry = None
+        self._stats = {}
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def _current_hashes(self):
+        """
+        Returns content hashes for all paths, rehashing only changed files.
+        """
+        hashes = {}
+        for path in self.paths:
+            stat = file_stat(path)
+            if self._stats.get(path) != stat or path not in self._hashes:
+                self._hashes[path] = file_hash(path)
+                self._stats[path] = stat
+            hashes[path] = self._hashes[path]
+        return hashes
+
+    def _lookup(self):
+        """
+        Returns (entry, signature, modified_at); entry is None when it is out of date.
+        """
+        with self._lock:
+            hashes = self._current_hashes()
+            signature = tuple(hashes[path] for path in self.paths)
+            modified_at = max(self._stats[path][0] for path in self.paths) / 1e9
+            if self._entry is not None and self._entry.signature == signature:
+                return self._entry, signature, modified_at
+            return None, signature, modified_at
+
+    def source_hashes(self):
+        """
+        Returns the current content hash of every source file, keyed by path.
+        """
+        with self._lock:
+            return self._current_hashes()
+
+    def _record(self, hit):
+        """
+        Counts one lookup as a hit or a miss.
+        """
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _get(self, wait):
+        """
+        Returns the current entry, building it when it is out of date.
+
+        With wait False a lookup made during another thread's rebuild gets
+        the previous entry; with wait True it blocks until the rebuild ends.
+        """
+        entry, _, _ = self._lookup()
+        if entry is not None:
+            self._record(hit=True)
+            return entry
+
+        # Another thread is already rebuilding: serve what is loaded rather than queue behind it
+        stale = self._entry
+        if wait or stale is None:
+            self._build_lock.acquire()
+        elif not self._build_lock.acquire(blocking=False):
+            self._record(hit=True)
+            return stale
+
+        try:
+            # The thread that held the build lock may have loaded this version already
+            entry, signature, modified_at = self._lookup()
+            if entry is not None:
+                self._record(hit=True)
+                return entry
+
+            self._record(hit=False)
+            previous = self._entry
+            data = self.refresh(previous.data) if self.refresh and previous is not None else self.loader()
+            version = hashlib.sha256('|'.join(signature).encode()).hexdigest()[:16]
+            entry = CachedDataset(data, version, signature, time.time(), modified_at)
+            with self._lock:
+                self._entry = entry
+            return entry
+        finally:
+            self._build_lock.release()
+
+    def get(self):
+        """
+        Returns the cached dataset, rebuilding it if any source file changed.
+
+        Returns:
+        CachedDataset: The dataset with its version hash, load and modification times
+        """
+        return self._get(wait=False)
+
+    def reload(self):
+        """
+        Rehashes every source file and rebuilds the dataset if any changed.
+
+        Used when a refresh is announced, so a change that kept the same
+        mtime and size is still picked up. The call waits for the rebuild,
+        while requests keep reading the old entry until it is swapped in.
+
+        Returns:
+        bool: True if a new dataset was loaded
+        """
+        with self._lock:
+            self._stats = {}
+            previous = self._entry
+        return self._get(wait=True) is not previous
+
+    def invalidate(self):
+        """
+        Drops the cached dataset so the next lookup rebuilds it.
+        """
+        with self._lock:
+            self._entry = None
+            self._stats = {}
+            self._hashes = {}
+
+    def stats(self):
+        """
+        Returns hit/miss counters and the currently loaded version and times.
+        """
+        entry = self._entry
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_ratio': self.hits / lookups if lookups else 0.0,
+            'version': entry.version if entry else None,
+            'loaded_at': entry.loaded_at if entry else None,
+            'modified_at': entry.modified_at if entry else None
+        }
@@ -0,0 +1,124 @@
+import importlib.util
+import io
+import json
+
+# Rows per streamed batch; about one batch is the most the server holds per request
+EXPORT_BATCH_ROWS = 1000
+
+# Export format to response mimetype
+EXPORT_FORMATS = {
+    'arrow': 'application/vnd.apache.arrow.stream',
+    'ndjson': 'application/x-ndjson'
+}
+
+
+def arrow_available():
+    """
+    Returns True when pyarrow is installed, without importing it.
+
+    pyarrow is optional and slow to import, so it is loaded only when an
+    Arrow export is actually streamed.
+    """
+    return importlib.util.find_spec('pyarrow') is not None
+
+
+class ChunkSink(io.RawIOBase):
+    """
+    Write-only file object that collects bytes until they are drained.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_batches(frames, batch_rows=EXPORT_BATCH_ROWS):
+    """
+    Splits a stream of analysis frames into batches of at most batch_rows rows.
+    """
+    for df in frames:
+        for start in range(0, len(df), batch_rows):
+            yield df.iloc[start:start + batch_rows]
+
+
+def iter_history_analysis(seasons, season_types, teams, load_history, analyze):
+    """
+    Yields the analysis one season at a time, so only one season is in memory.
+
+    Parameters:
+    seasons (list): Season labels, e.g. from history_store.expand_seasons
+    season_types (list): Season types to keep, None for all
+    teams (list): Team names to keep, None for all
+    load_history (callable): (season, season_types) -> merged team data
+    analyze (callable): merged team data -> analysis DataFrame
+
+    Yields:
+    DataFrame: One season's analysis rows
+    """
+    for season in seasons:
+        merged_df = load_history(season, season_types)
+        if teams is not None:
+            merged_df = merged_df[merged_df['Team'].isin(teams)].reset_index(drop=True)
+        if len(merged_df):
+            yield analyze(merged_df)
+
+
+def arrow_stream(batches):
+    """
+    Encodes batches as an Arrow IPC stream, yielding bytes as each batch is written.
+
+    The schema is taken from the first batch and later batches are cast to
+    it, so a consumer can read the whole stream with pyarrow.ipc.open_stream
+    or polars.read_ipc_stream.
+
+    Parameters:
+    batches (iterable): Non-empty iterable of DataFrames with the same columns
+
+    Yields:
+    bytes: The schema and each record batch, then the end-of-stream marker
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow exports") from None
+
+    sink = ChunkSink()
+    writer = None
+    for batch in batches:
+        if writer is None:
+            schema = pa.Schema.from_pandas(batch, preserve_index=False)
+            writer = pa.ipc.new_stream(sink, schema)
+        writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+        yield sink.drain()
+
+    if writer is not None:
+        writer.close()
+        yield sink.drain()
+
+
+def ndjson_stream(batches):
+    """
+    Encodes batches as newline-delimited JSON, one record per analysis row.
+
+    Floats are written with Python's shortest round-trip representation,
+    so reading the stream back gives the exact float64 values of the
+    analysis (pandas' to_json keeps only 10 decimals by default).
+
+    Yields:
+    bytes: One chunk of lines per batch; NaN values are written as null
+    """
+    for batch in batches:
+        records = batch.astype(object).where(batch.notna(), None).to_dict('records')
+        yield ''.join(json.dumps(record) + '\n' for record in records).encode('utf-8')
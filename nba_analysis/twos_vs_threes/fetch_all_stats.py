@@ -1,13 +1,149 @@
-from nba_api.stats.endpoints import leaguedashteamstats, leaguedashteamshotlocations
-import pandas as pd
+from nba_api.stats.endpoints import (
+    leaguedashplayershotlocations,
+    leaguedashplayerstats,
+    leaguedashteamshotlocations,
+    leaguedashteamstats
+)
+import argparse
 
-def fetch_all_nba_stats():
+from data_cache import write_csv_atomic
+from history_store import append_snapshot
+from matchup import OPPONENT_DATA_SOURCE
+from snapshots import build_snapshot
+from player_analysis import PLAYER_DATA_SOURCES
+from team_analysis import TEAM_DATA_SOURCES, analysis_config, load_team_data, shot_types
+
+def analyze_fetched_data():
+    """
+    Runs the analysis once on the fetched CSVs, for the snapshot and the reports.
+    
+    Returns:
+    dict: Dataset as built by team_analysis.load_team_data, or None if the analysis failed
+    """
+    try:
+        print("Analyzing fetched team data...")
+        return load_team_data()
+        
+    except Exception as e:
+        print(f"Error analyzing team data: {str(e)}")
+        return None
+
+def publish_team_data_snapshot(dataset):
+    """
+    Publishes pre-serialized team data responses from an analyzed dataset.
+    
+    Parameters:
+    dataset (dict): Output of analyze_fetched_data
+    
+    Returns:
+    str: The published snapshot version, or None if the build failed
+    """
+    try:
+        print("Building team data snapshot...")
+        return build_snapshot(
+            dataset['analysis'],
+            shot_types,
+            source_paths=TEAM_DATA_SOURCES,
+            include_wins=True,
+            intervals_df=dataset['intervals'],
+            config=analysis_config()
+        )
+        
+    except Exception as e:
+        print(f"Error building team data snapshot: {str(e)}")
+        return None
+
+def publish_reports(dataset):
+    """
+    Renders the report figures whose inputs changed since the last run.
+    
+    Parameters:
+    dataset (dict): Output of analyze_fetched_data
+    
+    Returns:
+    dict: Counts of rendered and reused figures, or None if the build failed
+    """
+    # Imported on first use, rendering needs matplotlib and most fetches skip it
+    from reports import build_reports
+    
+    try:
+        print("Building report figures...")
+        return build_reports(dataset['analysis'], shot_types)
+        
+    except Exception as e:
+        print(f"Error building reports: {str(e)}")
+        return None
+
+def archive_snapshot(df_stats, df_shots, season='2024-25', season_type='Regular Season', df_opponent_shots=None):
+    """
+    Appends the fetched frames to the historical store as today's snapshot.
+    """
+    try:
+        append_snapshot(df_stats, 'team_stats', season, season_type)
+        append_snapshot(df_shots, 'shot_locations', season, season_type)
+        if df_opponent_shots is not None:
+            append_snapshot(df_opponent_shots, 'opponent_shot_locations', season, season_type)
+        print("Archived snapshot to historical store")
+        
+    except Exception as e:
+        print(f"Error archiving snapshot: {str(e)}")
+
+def fetch_player_stats(season='2024-25', season_type='Regular Season'):
+    """
+    Fetches per-game player stats and player shot locations for every player.
+    
+    Returns:
+    tuple: (df_player_stats, df_player_shots), or (None, None) if the fetch failed
+    """
+    try:
+        print("Fetching player stats...")
+        player_stats = leaguedashplayerstats.LeagueDashPlayerStats(
+            season=season,
+            season_type_all_star=season_type,
+            per_mode_detailed='PerGame'
+        )
+        df_player_stats = player_stats.get_data_frames()[0]
+        
+        print("Fetching player shot location stats...")
+        player_shots = leaguedashplayershotlocations.LeagueDashPlayerShotLocations(
+            season=season,
+            season_type_all_star=season_type,
+            per_mode_detailed='PerGame'
+        )
+        df_player_shots = player_shots.get_data_frames()[0]
+        
+        write_csv_atomic(df_player_shots, PLAYER_DATA_SOURCES[0], index=False)
+        write_csv_atomic(df_player_stats, PLAYER_DATA_SOURCES[1], index=False)
+        
+        append_snapshot(df_player_stats, 'player_stats', season, season_type)
+        append_snapshot(df_player_shots, 'player_shot_locations', season, season_type)
+        return df_player_stats, df_player_shots
+        
+    except Exception as e:
+        print(f"Error fetching player stats: {str(e)}")
+        return None, None
+
+def fetch_all_nba_stats(season='2024-25', season_type='Regular Season', render_reports=False):
+    """
+    Fetches team, opponent and player stats, archives them and publishes the snapshot.
+    
+    Report figures are rendered only when asked for; otherwise run
+    reports.py separately, which reuses figures whose inputs didn't change.
+    
+    Parameters:
+    season (str): Season to fetch
+    season_type (str): Season type to fetch
+    render_reports (bool): Also render the report figures
+    
+    Returns:
+    tuple: (df_stats, df_shots), or (None, None) if the fetch failed
+    """
     try:
         # Fetch regular team stats
         print("Fetching regular team stats...")
         team_stats = leaguedashteamstats.LeagueDashTeamStats(
-            season='2024-25',
-            season_type_all_star='Regular Season',
+            season=season,
+            season_type_all_star=season_type,
             per_mode_detailed='PerGame'
         )
         df_stats = team_stats.get_data_frames()[0]
@@ -15,17 +151,38 @@ def fetch_all_nba_stats():
         # Fetch shot location stats
         print("Fetching shot location stats...")
         shot_stats = leaguedashteamshotlocations.LeagueDashTeamShotLocations(
-            season='2024-25',
-            season_type_all_star='Regular Season',
+            season=season,
+            season_type_all_star=season_type,
             per_mode_detailed='PerGame'
         )
         df_shots = shot_stats.get_data_frames()[0]
         
-        # Save both to CSVs
-        df_stats.to_csv('api_nba_team_stats.csv', index=False)
-        df_shots.to_csv('api_nba_team_stats_shot_zones.csv', index=False)
+        # Fetch what each defense allowed by zone, for the matchup engine
+        print("Fetching opponent shot location stats...")
+        opponent_shot_stats = leaguedashteamshotlocations.LeagueDashTeamShotLocations(
+            season=season,
+            season_type_all_star=season_type,
+            per_mode_detailed='PerGame',
+            measure_type_simple='Opponent'
+        )
+        df_opponent_shots = opponent_shot_stats.get_data_frames()[0]
+        
+        # Save all three to CSVs
+        write_csv_atomic(df_stats, TEAM_DATA_SOURCES[1], index=False)
+        write_csv_atomic(df_shots, TEAM_DATA_SOURCES[0], index=False)
+        write_csv_atomic(df_opponent_shots, OPPONENT_DATA_SOURCE, index=False)
         
         print("Successfully updated all NBA stats!")
+        
+        archive_snapshot(df_stats, df_shots, season, season_type, df_opponent_shots)
+        
+        fetch_player_stats(season, season_type)
+        
+        dataset = analyze_fetched_data()
+        if dataset is not None:
+            publish_team_data_snapshot(dataset)
+            if render_reports:
+                publish_reports(dataset)
         return df_stats, df_shots
         
     except Exception as e:
@@ -33,4 +190,10 @@ def fetch_all_nba_stats():
         return None, None
 
 if __name__ == "__main__":
-    fetch_all_nba_stats() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Fetch the latest NBA stats and publish the team data snapshot")
+    parser.add_argument('--season', default='2024-25')
+    parser.add_argument('--season-type', default='Regular Season')
+    parser.add_argument('--reports', action='store_true', help="Also render the report figures")
+    args = parser.parse_args()
+
+    fetch_all_nba_stats(args.season, args.season_type, render_reports=args.reports) 
\ No newline at end of file
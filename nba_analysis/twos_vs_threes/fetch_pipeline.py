@@ -0,0 +1,314 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from nba_api.stats.endpoints import (
+    leaguedashplayershotlocations,
+    leaguedashplayerstats,
+    leaguedashteamshotlocations,
+    leaguedashteamstats
+)
+from nba_api.stats.library.http import NBAStatsHTTP, NBAStatsResponse
+
+from history_store import append_snapshot, expand_seasons
+
+CACHE_DIR = 'response_cache'
+
+# One request: which dataset, for which season, season type and per-mode
+FetchJob = namedtuple('FetchJob', ['dataset', 'season', 'season_type', 'per_mode'])
+
+# Stored dataset name to the nba_api endpoint class that fetches it
+ENDPOINTS = {
+    'team_stats': leaguedashteamstats.LeagueDashTeamStats,
+    'shot_locations': leaguedashteamshotlocations.LeagueDashTeamShotLocations,
+    'opponent_shot_locations': leaguedashteamshotlocations.LeagueDashTeamShotLocations,
+    'player_stats': leaguedashplayerstats.LeagueDashPlayerStats,
+    'player_shot_locations': leaguedashplayershotlocations.LeagueDashPlayerShotLocations
+}
+
+# Extra endpoint arguments per dataset, e.g. the defensive view of shot locations
+ENDPOINT_PARAMETERS = {
+    'opponent_shot_locations': {'measure_type_simple': 'Opponent'}
+}
+
+# Datasets fetched when none are named; player datasets are opt-in via --datasets
+DEFAULT_DATASETS = ('team_stats', 'shot_locations', 'opponent_shot_locations')
+
+
+def build_jobs(seasons, season_types=('Regular Season',), per_modes=('PerGame',), datasets=DEFAULT_DATASETS):
+    """
+    Expands seasons x season types x per-modes x datasets into fetch jobs.
+
+    Parameters:
+    seasons (str or list): Season range such as '2000-25', or labels
+    season_types (list): e.g. 'Regular Season', 'Playoffs'
+    per_modes (list): e.g. 'PerGame', 'Totals'
+    datasets (list): Keys of ENDPOINTS
+
+    Returns:
+    list: FetchJob tuples
+    """
+    return [
+        FetchJob(dataset, season, season_type, per_mode)
+        for season in expand_seasons(seasons)
+        for season_type in season_types
+        for per_mode in per_modes
+        for dataset in datasets
+    ]
+
+
+def make_endpoint(job):
+    """
+    Builds the nba_api endpoint object for a job without sending the request.
+    """
+    return ENDPOINTS[job.dataset](
+        season=job.season,
+        season_type_all_star=job.season_type,
+        per_mode_detailed=job.per_mode,
+        get_request=False,
+        **ENDPOINT_PARAMETERS.get(job.dataset, {})
+    )
+
+
+def request_key(endpoint_name, parameters):
+    """
+    Returns the content address of a request: a hash of endpoint and parameters.
+    """
+    canonical = json.dumps([endpoint_name, parameters], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """
+    On-disk store of raw response bodies keyed by request_key.
+
+    Files are written to a temporary name and renamed into place, so a
+    crashed run never leaves a truncated response behind.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f'{key}.json')
+
+    def get(self, key):
+        try:
+            with open(self.path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key, body):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(body)
+        os.replace(tmp_path, path)
+
+
+class RateLimiter:
+    """
+    Spaces requests at least 1/rate seconds apart across all worker threads.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+class NBAStatsTransport:
+    """
+    Sends requests to stats.nba.com through nba_api's HTTP client.
+    """
+
+    def __init__(self, timeout=30):
+        self.timeout = timeout
+
+    def __call__(self, endpoint_name, parameters):
+        response = NBAStatsHTTP().send_api_request(
+            endpoint=endpoint_name,
+            parameters=parameters,
+            timeout=self.timeout
+        )
+        if response._status_code != 200:
+            raise IOError(f"{endpoint_name} returned HTTP {response._status_code}")
+        return response.get_response()
+
+
+class HTTPTransport:
+    """
+    Sends requests to another base URL, e.g. a local stub server for offline runs.
+    """
+
+    def __init__(self, base_url, timeout=30):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+
+    def __call__(self, endpoint_name, parameters):
+        import requests
+
+        response = requests.get(f'{self.base_url}/{endpoint_name}', params=parameters, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+
+class FixtureTransport:
+    """
+    Replays recorded responses from a directory laid out like ResponseCache.
+    """
+
+    def __init__(self, fixture_dir):
+        self.fixtures = ResponseCache(fixture_dir)
+
+    def __call__(self, endpoint_name, parameters):
+        body = self.fixtures.get(request_key(endpoint_name, parameters))
+        if body is None:
+            raise FileNotFoundError(f"No recorded response for {endpoint_name} {parameters}")
+        return body
+
+
+def fetch_job(job, transport, cache, rate_limiter, max_retries=4, backoff=1.0):
+    """
+    Fetches one job, serving it from the response cache when possible.
+
+    Network failures are retried with exponential backoff plus jitter.
+
+    Parameters:
+    job (FetchJob): What to fetch
+    transport (callable): (endpoint_name, parameters) -> response body
+    cache (ResponseCache): Raw response store, may be None
+    rate_limiter (RateLimiter): Shared limiter for outgoing requests
+    max_retries (int): Attempts after the first failure
+    backoff (float): Base delay in seconds, doubled on each retry
+
+    Returns:
+    tuple: (DataFrame, bool) - the first data set and whether it came from cache
+    """
+    endpoint = make_endpoint(job)
+    key = request_key(endpoint.endpoint, endpoint.parameters)
+
+    body = cache.get(key) if cache is not None else None
+    from_cache = body is not None
+
+    attempt = 0
+    while body is None:
+        rate_limiter.wait()
+        try:
+            body = transport(endpoint.endpoint, endpoint.parameters)
+        except Exception as e:
+            if attempt >= max_retries:
+                raise
+            delay = backoff * (2 ** attempt) * (1 + random.random())
+            print(f"Retrying {job} in {delay:.1f}s after error: {str(e)}")
+            time.sleep(delay)
+            attempt += 1
+
+    # Parse with nba_api so multi-level headers become the same MultiIndex columns
+    endpoint.nba_response = NBAStatsResponse(response=body, status_code=200, url=None)
+    endpoint.load_response()
+    df = endpoint.get_data_frames()[0]
+
+    if cache is not None and not from_cache:
+        cache.put(key, body)
+
+    return df, from_cache
+
+
+def dataset_name(job):
+    """
+    Returns the historical store dataset for a job; per-game data keeps the plain name.
+    """
+    return job.dataset if job.per_mode == 'PerGame' else f'{job.dataset}_{job.per_mode.lower()}'
+
+
+def run_pipeline(jobs, transport=None, cache=None, max_workers=4, rate=2.0, store_dir=None, snapshot_date=None):
+    """
+    Fetches all jobs through a bounded worker pool and archives the results.
+
+    Parameters:
+    jobs (list): FetchJob tuples from build_jobs
+    transport (callable): Defaults to NBAStatsTransport
+    cache (ResponseCache): Defaults to ResponseCache(CACHE_DIR)
+    max_workers (int): Concurrent requests in flight
+    rate (float): Maximum requests per second across all workers
+    store_dir (str): Historical store to append to, None to skip archiving
+    snapshot_date (str): Snapshot date for archived partitions
+
+    Returns:
+    dict: FetchJob to DataFrame for every job that succeeded
+    """
+    transport = transport or NBAStatsTransport()
+    cache = cache if cache is not None else ResponseCache()
+    rate_limiter = RateLimiter(rate)
+
+    results = {}
+    cached = 0
+    failed = []
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(fetch_job, job, transport, cache, rate_limiter): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                df, from_cache = future.result()
+            except Exception as e:
+                print(f"Error fetching {job}: {str(e)}")
+                failed.append(job)
+                continue
+
+            results[job] = df
+            cached += from_cache
+            if store_dir is not None:
+                append_snapshot(df, dataset_name(job), job.season, job.season_type, snapshot_date, store_dir)
+
+    print(f"Fetched {len(results)}/{len(jobs)} jobs ({cached} from cache, {len(failed)} failed)")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill NBA team, player and shot location stats")
+    parser.add_argument('seasons', help="Season range such as 2000-25")
+    parser.add_argument('--season-types', nargs='+', default=['Regular Season'])
+    parser.add_argument('--per-modes', nargs='+', default=['PerGame'])
+    parser.add_argument('--datasets', nargs='+', choices=list(ENDPOINTS), default=list(DEFAULT_DATASETS))
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rate', type=float, default=2.0, help="Requests per second")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--fixtures', help="Replay recorded responses instead of the network")
+    parser.add_argument('--base-url', help="Send requests to this server instead of stats.nba.com")
+    parser.add_argument('--store-dir', default='history')
+    args = parser.parse_args()
+
+    if args.fixtures:
+        transport = FixtureTransport(args.fixtures)
+    elif args.base_url:
+        transport = HTTPTransport(args.base_url)
+    else:
+        transport = NBAStatsTransport()
+
+    run_pipeline(
+        build_jobs(args.seasons, args.season_types, args.per_modes, args.datasets),
+        transport=transport,
+        cache=ResponseCache(args.cache_dir),
+        max_workers=args.workers,
+        rate=args.rate,
+        store_dir=args.store_dir
+    )
@@ -0,0 +1,218 @@
+import datetime
+import importlib.util
+import os
+
+import pandas as pd
+
+from shot_schema import API_ZONE_NAMES, flatten_columns
+
+STORE_DIR = 'history'
+
+# Hive-style partition columns, outermost first
+PARTITION_COLUMNS = ['Season', 'Season_Type', 'Snapshot_Date']
+
+
+def require_pyarrow():
+    """
+    Imports pyarrow on first use, raising ImportError with an install hint when it is missing.
+
+    pyarrow is only needed for the historical store, so importing this
+    module does not load it.
+
+    Returns:
+    tuple: (pyarrow, pyarrow.dataset)
+    """
+    if importlib.util.find_spec('pyarrow') is None:
+        raise ImportError("The historical store needs pyarrow: pip install pyarrow")
+
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    return pa, ds
+
+
+def expand_seasons(seasons):
+    """
+    Expands a season range such as '2019-25' into NBA season labels.
+
+    '2019-25' covers 2019-20 through 2024-25, and a single season such as
+    '2024-25' expands to itself. Lists are expanded item by item.
+
+    Parameters:
+    seasons (str or list): Season range(s) or label(s)
+
+    Returns:
+    list: Season labels like '2019-20'
+    """
+    if isinstance(seasons, (list, tuple)):
+        return [season for item in seasons for season in expand_seasons(item)]
+
+    start, _, end = seasons.partition('-')
+    start_year = int(start)
+    end_year = (start_year // 100) * 100 + int(end) if len(end) == 2 else int(end)
+    if end_year <= start_year:
+        end_year += 100
+
+    return [f'{year}-{str(year + 1)[-2:]}' for year in range(start_year, end_year)]
+
+
+def append_snapshot(df, dataset, season, season_type='Regular Season', snapshot_date=None, store_dir=STORE_DIR):
+    """
+    Writes one fetched frame into the store as its own partition.
+
+    Re-writing the same season/season type/date replaces that partition
+    only; every other snapshot is left in place. Frames must come from the
+    NBA API (with TEAM_ID), so each dataset keeps one schema.
+
+    Parameters:
+    df (DataFrame): Frame as returned by the NBA API
+    dataset (str): Dataset name, e.g. 'team_stats' or 'shot_locations'
+    season (str): Season label, e.g. '2024-25'
+    season_type (str): 'Regular Season' or 'Playoffs'
+    snapshot_date (str): ISO date of the pull, defaults to today
+    store_dir (str): Root directory of the store
+    """
+    pa, ds = require_pyarrow()
+
+    snapshot = flatten_columns(df).copy()
+    # Every stored dataset is keyed like the NBA API frames; other sources would mix schemas
+    if 'TEAM_ID' not in snapshot.columns:
+        raise ValueError(f"Only NBA API frames with TEAM_ID can be stored in {dataset}")
+
+    snapshot['Season'] = season
+    snapshot['Season_Type'] = season_type
+    snapshot['Snapshot_Date'] = snapshot_date or datetime.date.today().isoformat()
+
+    ds.write_dataset(
+        pa.Table.from_pandas(snapshot, preserve_index=False),
+        os.path.join(store_dir, dataset),
+        format='parquet',
+        partitioning=PARTITION_COLUMNS,
+        partitioning_flavor='hive',
+        existing_data_behavior='delete_matching'
+    )
+
+
+def open_dataset(dataset, store_dir=STORE_DIR):
+    """
+    Opens a stored dataset for lazy, memory-mapped scanning.
+    """
+    pa, ds = require_pyarrow()
+    import pyarrow.fs as pafs
+
+    partitioning = ds.partitioning(
+        pa.schema([(column, pa.string()) for column in PARTITION_COLUMNS]),
+        flavor='hive'
+    )
+    return ds.dataset(
+        os.path.join(store_dir, dataset),
+        format='parquet',
+        partitioning=partitioning,
+        filesystem=pafs.LocalFileSystem(use_mmap=True)
+    )
+
+
+def store_signature(datasets, store_dir=STORE_DIR):
+    """
+    Returns a cheap fingerprint of the files stored for some datasets.
+
+    Built from file paths, sizes and modification times only, so a caller
+    can tell that a snapshot was appended without opening any file.
+
+    Parameters:
+    datasets (list): Dataset names, e.g. ['team_stats', 'shot_locations']
+    store_dir (str): Root directory of the store
+
+    Returns:
+    tuple: (path, mtime_ns, size) for every stored file, empty if nothing is stored
+    """
+    signature = []
+    for dataset in datasets:
+        for root, _, files in os.walk(os.path.join(store_dir, dataset)):
+            for name in files:
+                stat = os.stat(os.path.join(root, name))
+                signature.append((os.path.join(root, name), stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(signature))
+
+
+def load_history(dataset, seasons=None, season_types=None, columns=None, latest_only=True, store_dir=STORE_DIR):
+    """
+    Loads stored snapshots, reading only the partitions and columns asked for.
+
+    Season and season type filters are pushed down to the partition paths,
+    so files outside the range are never opened.
+
+    Parameters:
+    dataset (str): Dataset name, e.g. 'team_stats'
+    seasons (str or list): Season range(s) or label(s), None for all
+    season_types (list): Season types to keep, None for all
+    columns (list): Data columns to read, None for all
+    latest_only (bool): Keep only the newest snapshot of each season/type
+    store_dir (str): Root directory of the store
+
+    Returns:
+    DataFrame: Requested columns plus the partition columns
+    """
+    _, ds = require_pyarrow()
+    table = open_dataset(dataset, store_dir)
+
+    expression = None
+    if seasons is not None:
+        expression = ds.field('Season').isin(expand_seasons(seasons))
+    if season_types is not None:
+        season_type_filter = ds.field('Season_Type').isin(list(season_types))
+        expression = season_type_filter if expression is None else expression & season_type_filter
+
+    if latest_only:
+        # Partition values come from the file paths, so this scan reads no data pages
+        partitions = table.to_table(columns=PARTITION_COLUMNS, filter=expression).to_pandas()
+        latest_dates = partitions.groupby(['Season', 'Season_Type'])['Snapshot_Date'].max()
+        latest_filter = None
+        for (season, season_type), snapshot_date in latest_dates.items():
+            partition_filter = (
+                (ds.field('Season') == season)
+                & (ds.field('Season_Type') == season_type)
+                & (ds.field('Snapshot_Date') == snapshot_date)
+            )
+            latest_filter = partition_filter if latest_filter is None else latest_filter | partition_filter
+        if latest_filter is None:
+            return pd.DataFrame(columns=(columns or []) + PARTITION_COLUMNS)
+        expression = latest_filter if expression is None else expression & latest_filter
+
+    read_columns = None
+    if columns is not None:
+        read_columns = list(columns) + [column for column in PARTITION_COLUMNS if column not in columns]
+
+    return table.to_table(columns=read_columns, filter=expression).to_pandas()
+
+
+def shot_location_columns(zones):
+    """
+    Returns the stored shot location columns needed for the given zones.
+    """
+    columns = ['TEAM_ID', 'TEAM_NAME']
+    for zone in zones:
+        columns += [f'{API_ZONE_NAMES[zone]} {stat}' for stat in ('FGM', 'FGA', 'FG_PCT')]
+    return columns
+
+
+def import_csv_snapshot(path, dataset, season, season_type='Regular Season', snapshot_date=None, store_dir=STORE_DIR):
+    """
+    Imports one of the loose CSV snapshots into the store.
+
+    Two-row-header shot location CSVs are read with both header rows. When
+    no snapshot date is given, the file's modification date is used.
+    """
+    header = [0, 1] if dataset.endswith('shot_locations') else 0
+    df = pd.read_csv(path, header=header)
+    if snapshot_date is None:
+        snapshot_date = datetime.date.fromtimestamp(os.path.getmtime(path)).isoformat()
+
+    append_snapshot(df, dataset, season, season_type, snapshot_date, store_dir)
+    print(f"Imported {path} into {dataset} ({season}, {season_type}, {snapshot_date})")
+
+
+if __name__ == "__main__":
+    # Seed the store from the NBA API CSVs kept in this directory; the other
+    # loose CSVs are Basketball-Reference exports or full-season pulls of other seasons
+    import_csv_snapshot('api_nba_team_stats.csv', 'team_stats', '2024-25')
+    import_csv_snapshot('api_nba_team_stats_shot_zones.csv', 'shot_locations', '2024-25')
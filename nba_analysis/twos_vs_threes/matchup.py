@@ -0,0 +1,174 @@
+import numpy as np
+
+from shot_engine import PYTH_EXP, compute_zone_arrays, shot_types, zone_matrix
+
+# Opponent shot locations (what each defense allowed), written by fetch_all_stats
+OPPONENT_DATA_SOURCE = 'api_nba_team_opponent_shot_zones.csv'
+
+
+def league_averages(attempts, makes):
+    """
+    Returns league-wide attempts per team and FG% for each zone.
+
+    Parameters:
+    attempts (ndarray): Zone attempts per game, shaped (teams, zones)
+    makes (ndarray): Zone makes per game, shaped (teams, zones)
+
+    Returns:
+    tuple: (attempts per team, FG% as fractions), each shaped (zones,)
+    """
+    total_attempts = attempts.sum(axis=0)
+    return total_attempts / len(attempts), np.divide(
+        makes.sum(axis=0), total_attempts, out=np.zeros_like(total_attempts), where=total_attempts > 0
+    )
+
+
+def blend_matchups(off_attempts, off_fg_pct, def_attempts, def_fg_pct):
+    """
+    Blends every offense with every defense through broadcasting.
+
+    FG% is additive against the league: an offense that shoots 3 points
+    above average against a defense that allows 2 points below average is
+    expected to shoot 1 point above average. Zone volume is multiplicative:
+    a defense that allows 20% more corner threes than average raises every
+    offense's corner attempts by 20%.
+
+    Parameters:
+    off_attempts (ndarray): Offense zone attempts per game, (teams, zones)
+    off_fg_pct (ndarray): Offense zone FG% as fractions, (teams, zones)
+    def_attempts (ndarray): Zone attempts allowed per game, (teams, zones)
+    def_fg_pct (ndarray): Zone FG% allowed as fractions, (teams, zones)
+
+    Returns:
+    tuple: (attempts, FG%), each shaped (offense, defense, zones)
+    """
+    league_attempts, league_fg_pct = league_averages(off_attempts, off_attempts * off_fg_pct)
+
+    volume_factor = np.divide(
+        def_attempts, league_attempts, out=np.ones_like(def_attempts), where=league_attempts > 0
+    )
+    attempts = off_attempts[:, None, :] * volume_factor[None, :, :]
+    fg_pct = np.clip(off_fg_pct[:, None, :] + def_fg_pct[None, :, :] - league_fg_pct, 0.0, 1.0)
+    return attempts, fg_pct
+
+
+def build_matchup_matrix(merged_df, opponent_df, shot_types=shot_types, optimizer=None):
+    """
+    Projects every ordered team pair's zone mix, points and optimal mix at once.
+
+    The offense rows come from the merged team data and the defense rows
+    from the opponent shot locations, aligned on TEAM_ID. All (teams x
+    teams x zones) arrays are computed in one vectorized pass, so serving a
+    matchup is an index lookup.
+
+    Parameters:
+    merged_df (DataFrame): Merged team data with TEAM_ID and free throw columns
+    opponent_df (DataFrame): Normalized opponent shot locations with TEAM_ID
+    shot_types (dict): Zone name to point value mapping
+    optimizer (callable): Optional constrained solver for the optimal mix
+
+    Returns:
+    dict: Team names, team -> index mapping and (offense, defense, ...) arrays
+    """
+    zones = list(shot_types)
+    points = np.array([shot_types[zone] for zone in zones], dtype=np.float64)
+
+    defense = opponent_df.set_index('TEAM_ID').reindex(merged_df['TEAM_ID'])
+    if defense[f'{zones[0]}_FGA'].isna().any():
+        missing = merged_df['Team'][defense[f'{zones[0]}_FGA'].isna().to_numpy()].tolist()
+        raise ValueError(f"No opponent shot data for {', '.join(missing)}")
+
+    attempts, fg_pct = blend_matchups(
+        zone_matrix(merged_df, 'FGA', zones),
+        zone_matrix(merged_df, 'FG%', zones) / 100,
+        zone_matrix(defense, 'FGA', zones),
+        zone_matrix(defense, 'FG%', zones) / 100
+    )
+
+    teams = len(merged_df)
+    arrays = compute_zone_arrays(
+        fg_pct.reshape(-1, len(zones)),
+        attempts.reshape(-1, len(zones)),
+        points,
+        optimizer,
+        zones
+    )
+
+    ft_points = merged_df['FT_FGM'].to_numpy(dtype=np.float64)[:, None]
+    expected_points = arrays['current_fg_points'].reshape(teams, teams) + ft_points
+    optimal_points = arrays['optimal_fg_points'].reshape(teams, teams) + ft_points
+
+    team_names = merged_df['Team'].tolist()
+    return {
+        'teams': team_names,
+        'team_index': {team: i for i, team in enumerate(team_names)},
+        'zones': zones,
+        'attempts': attempts,
+        'fg_pct': fg_pct,
+        'ev': fg_pct * points,
+        'optimal_attempts': arrays['Optimal_Attempts'].reshape(teams, teams, len(zones)),
+        'expected_points': expected_points,
+        'optimal_points': optimal_points
+    }
+
+
+def win_probability(points_for, points_against):
+    """
+    Pythagorean win probability from projected points for and against.
+    """
+    with np.errstate(over='ignore', divide='ignore', invalid='ignore'):
+        ratio = (points_against / points_for) ** PYTH_EXP
+    return 1 / (1 + ratio)
+
+
+def format_side(matrix, offense, defense, optimal):
+    """
+    Formats one team's projected offense against the other team's defense.
+    """
+    points_key = 'optimal_points' if optimal else 'expected_points'
+    side = {
+        "team": matrix['teams'][offense],
+        "expected_points": float(matrix['expected_points'][offense, defense]),
+        "optimal_points": float(matrix['optimal_points'][offense, defense]),
+        "points_difference": float(
+            matrix['optimal_points'][offense, defense] - matrix['expected_points'][offense, defense]
+        ),
+        "projected_points": float(matrix[points_key][offense, defense])
+    }
+    for i, zone in enumerate(matrix['zones']):
+        side[zone] = {
+            "attempts": float(matrix['attempts'][offense, defense, i]),
+            "fg_pct": float(matrix['fg_pct'][offense, defense, i] * 100),
+            "ev": float(matrix['ev'][offense, defense, i]),
+            "optimal_attempts": float(matrix['optimal_attempts'][offense, defense, i])
+        }
+    return side
+
+
+def format_matchup(matrix, home, away, optimal=False):
+    """
+    Formats the projection for one game from the precomputed matrix.
+
+    Parameters:
+    matrix (dict): Output of build_matchup_matrix
+    home (str): Home team name
+    away (str): Away team name
+    optimal (bool): Base the margin on both teams playing their optimal mix
+
+    Returns:
+    dict: Both teams' projected offense, the margin and the home win probability
+    """
+    h = matrix['team_index'][home]
+    a = matrix['team_index'][away]
+    home_side = format_side(matrix, h, a, optimal)
+    away_side = format_side(matrix, a, h, optimal)
+
+    return {
+        "home": home_side,
+        "away": away_side,
+        "mix": "optimal" if optimal else "current",
+        "projected_margin": home_side['projected_points'] - away_side['projected_points'],
+        "home_win_probability": float(
+            win_probability(home_side['projected_points'], away_side['projected_points']) * 100
+        )
+    }
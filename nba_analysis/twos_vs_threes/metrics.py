@@ -0,0 +1,408 @@
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+
+# Latency buckets in seconds, from cache hits up to cold multi-season loads
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Response size buckets in bytes
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Slow-request profiling: share of requests profiled and the threshold for keeping a dump
+PROFILE_SAMPLE_RATE = float(os.environ.get('NBA_PROFILE_SAMPLE_RATE', '0'))
+PROFILE_SLOW_SECONDS = float(os.environ.get('NBA_PROFILE_SLOW_MS', '500')) / 1000
+PROFILE_DIR = os.environ.get('NBA_PROFILE_DIR', 'profiles')
+
+# Directory shared by the worker processes of one server. When set, each worker writes
+# its metrics there and /metrics reports all workers, whichever one answers the scrape.
+METRICS_DIR = os.environ.get('NBA_METRICS_DIR')
+
+# Seconds between a worker's writes to METRICS_DIR
+METRICS_FLUSH_SECONDS = 1.0
+
+
+def format_labels(labelnames, values):
+    """
+    Renders a Prometheus label set, e.g. {stage="merge"}.
+    """
+    if not labelnames:
+        return ''
+    pairs = []
+    for name, value in zip(labelnames, values):
+        escaped = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+class Gauge:
+    """
+    Value read at scrape time from a callback returning {label values: value}.
+    """
+
+    kind = 'gauge'
+
+    def __init__(self, name, help_text, callback, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.labelnames = tuple(labelnames)
+        self.callback = callback
+
+    def samples(self):
+        return [(self.name, key, value) for key, value in sorted(self.callback().items())]
+
+
+class Counter(Gauge):
+    """
+    Monotonic count read at scrape time from a callback returning {label values: value}.
+    """
+
+    kind = 'counter'
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with optional labels.
+    """
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, buckets, labelnames=()):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(labels[name] for name in self.labelnames)
+        with self._lock:
+            series = self._series.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def reset(self):
+        with self._lock:
+            self._series = {}
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series['counts']):
+                    samples.append((f'{self.name}_bucket', key + (repr(float(bound)),), count))
+                samples.append((f'{self.name}_bucket', key + ('+Inf',), series['count']))
+                samples.append((f'{self.name}_sum', key, series['sum']))
+                samples.append((f'{self.name}_count', key, series['count']))
+        return samples
+
+
+class Registry:
+    """
+    Collects metrics and renders them in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def collect(self):
+        """
+        Returns every metric's current samples as JSON-serializable dicts.
+        """
+        return [
+            {
+                'name': metric.name,
+                'help': metric.help_text,
+                'kind': metric.kind,
+                'labelnames': list(metric.labelnames),
+                'samples': [[name, [str(value) for value in key], value] for name, key, value in metric.samples()]
+            }
+            for metric in self.metrics
+        ]
+
+    def render(self, collected=None):
+        """
+        Renders collected metrics, by default this process's own.
+        """
+        lines = []
+        for metric in self.collect() if collected is None else collected:
+            lines.append(f'# HELP {metric["name"]} {metric["help"]}')
+            lines.append(f'# TYPE {metric["name"]} {metric["kind"]}')
+            for name, key, value in metric['samples']:
+                labelnames = tuple(metric['labelnames']) + (('le',) if name.endswith('_bucket') else ())
+                lines.append(f'{name}{format_labels(labelnames, key)} {float(value)!r}')
+        return '\n'.join(lines) + '\n'
+
+
+def process_alive(pid):
+    """
+    Returns True if a process with this pid is running.
+    """
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_worker_metrics(registry, metrics_dir):
+    """
+    Writes this process's metrics to metrics_dir as {pid}.json, atomically.
+    """
+    path = os.path.join(metrics_dir, f'{os.getpid()}.json')
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump(registry.collect(), f)
+    os.replace(tmp_path, path)
+
+
+def merge_worker_metrics(metrics_dir):
+    """
+    Combines the metrics written by every worker into one collection.
+
+    Counters and histograms are summed over all workers, including workers
+    that have exited, so totals never go backwards when one is replaced.
+    Gauges describe a single process, so they get a pid label and are kept
+    for running workers only.
+
+    Parameters:
+    metrics_dir (str): Directory the workers write to
+
+    Returns:
+    list: Metrics in the format of Registry.collect
+    """
+    merged = {}
+    for file_name in sorted(os.listdir(metrics_dir)):
+        if not file_name.endswith('.json'):
+            continue
+        pid = int(file_name[:-len('.json')])
+        try:
+            with open(os.path.join(metrics_dir, file_name)) as f:
+                collected = json.load(f)
+        except (OSError, ValueError):
+            continue
+
+        alive = process_alive(pid)
+        for metric in collected:
+            entry = merged.setdefault(metric['name'], dict(metric, samples={}))
+            if metric['kind'] == 'gauge':
+                entry['labelnames'] = metric['labelnames'] + ['pid']
+                if not alive:
+                    continue
+                for name, key, value in metric['samples']:
+                    entry['samples'][(name, tuple(key) + (str(pid),))] = value
+            else:
+                for name, key, value in metric['samples']:
+                    entry['samples'][(name, tuple(key))] = entry['samples'].get((name, tuple(key)), 0) + value
+
+    return [
+        dict(entry, samples=[[name, list(key), value] for (name, key), value in entry['samples'].items()])
+        for entry in merged.values()
+    ]
+
+
+def clear_worker_metrics(metrics_dir=METRICS_DIR):
+    """
+    Removes metrics left by an earlier server run; call once before workers start.
+    """
+    if metrics_dir is None or not os.path.isdir(metrics_dir):
+        return
+    for file_name in os.listdir(metrics_dir):
+        if file_name.endswith(('.json', '.tmp')):
+            os.remove(os.path.join(metrics_dir, file_name))
+
+
+_flusher_pid = None
+
+
+def start_flusher(registry, metrics_dir=METRICS_DIR):
+    """
+    Starts this process's background writer to metrics_dir, once per process.
+
+    Checked on every request, so a forked worker starts its own writer.
+    """
+    global _flusher_pid
+    if metrics_dir is None or _flusher_pid == os.getpid():
+        return
+    _flusher_pid = os.getpid()
+    os.makedirs(metrics_dir, exist_ok=True)
+
+    def flush_loop():
+        # Stops once reset_metrics runs in this process
+        while _flusher_pid == os.getpid():
+            try:
+                write_worker_metrics(registry, metrics_dir)
+            except OSError as e:
+                print(f"Could not write metrics: {str(e)}", flush=True)
+            time.sleep(METRICS_FLUSH_SECONDS)
+
+    threading.Thread(target=flush_loop, name='metrics-flusher', daemon=True).start()
+
+
+def reset_metrics(registry, metrics_dir=METRICS_DIR):
+    """
+    Drops everything recorded so far, in this process and in metrics_dir.
+
+    Called after warm-up and before workers fork, so warm-up requests and
+    cache lookups aren't counted again by every worker.
+    """
+    global _flusher_pid
+    _flusher_pid = None
+    for metric in registry.metrics:
+        if isinstance(metric, Histogram):
+            metric.reset()
+    for cache in CACHES.values():
+        cache.hits = cache.misses = 0
+    clear_worker_metrics(metrics_dir)
+
+
+def render_metrics(registry, metrics_dir=METRICS_DIR):
+    """
+    Renders this process's metrics, or every worker's when metrics_dir is set.
+    """
+    if metrics_dir is None:
+        return registry.render()
+    os.makedirs(metrics_dir, exist_ok=True)
+    write_worker_metrics(registry, metrics_dir)
+    return registry.render(merge_worker_metrics(metrics_dir))
+
+
+REGISTRY = Registry()
+
+# DatasetCaches exported as gauges, by name
+CACHES = {}
+
+# Labels on every request series
+REQUEST_LABELS = ['app', 'endpoint', 'method', 'status']
+
+stage_seconds = REGISTRY.register(Histogram(
+    'nba_stage_seconds', 'Time spent in each data stage', LATENCY_BUCKETS, ['stage']
+))
+
+
+@contextmanager
+def stage(name):
+    """
+    Times a block as one named stage, e.g. csv_read, merge, analysis, json.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=name)
+
+
+def cache_samples(field):
+    """
+    Returns a Gauge callback reporting one stats() field of each watched cache.
+    """
+    def callback():
+        return {(name,): cache.stats()[field] for name, cache in list(CACHES.items())}
+    return callback
+
+
+def dataset_age_samples():
+    """
+    Returns how long ago each watched cache's source files changed.
+    """
+    now = time.time()
+    ages = {}
+    for name, cache in list(CACHES.items()):
+        modified_at = cache.stats()['modified_at']
+        if modified_at is not None:
+            ages[(name,)] = now - modified_at
+    return ages
+
+
+request_seconds = REGISTRY.register(Histogram(
+    'nba_request_seconds', 'Request latency', LATENCY_BUCKETS, REQUEST_LABELS
+))
+response_bytes = REGISTRY.register(Histogram(
+    'nba_response_bytes', 'Response body size', SIZE_BUCKETS, REQUEST_LABELS
+))
+REGISTRY.register(Gauge('nba_cache_hit_ratio', 'Dataset cache hit ratio', cache_samples('hit_ratio'), ['cache']))
+REGISTRY.register(Counter('nba_cache_hits_total', 'Dataset cache hits', cache_samples('hits'), ['cache']))
+REGISTRY.register(Counter('nba_cache_misses_total', 'Dataset cache misses', cache_samples('misses'), ['cache']))
+REGISTRY.register(Gauge(
+    'nba_data_age_seconds', 'Seconds since the cached data sources changed', dataset_age_samples, ['cache']
+))
+
+
+def instrument_app(app, app_name, caches=None):
+    """
+    Adds request metrics, slow-request profiling and a /metrics route to an app.
+
+    Every request's latency and response size are recorded by endpoint,
+    method and status. With NBA_PROFILE_SAMPLE_RATE > 0 that share of
+    requests runs under cProfile, and a profile is written to PROFILE_DIR
+    when the request takes longer than NBA_PROFILE_SLOW_MS. With
+    NBA_METRICS_DIR set, /metrics reports every worker process.
+
+    Parameters:
+    app (Flask): Application to instrument
+    app_name (str): Value of the app label on every series
+    caches (dict): Name to DatasetCache, exported as hit ratio and age gauges
+    """
+    # Imported here so stage() works without Flask, e.g. in the fetch scripts
+    from flask import Response, g, request
+
+    for name, cache in (caches or {}).items():
+        CACHES[f'{app_name}.{name}'] = cache
+
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+        g.profiler = None
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            g.profiler = cProfile.Profile()
+            g.profiler.enable()
+
+    @app.after_request
+    def record_request(response):
+        start = g.pop('request_start', None)
+        if start is None:
+            return response
+        elapsed = time.perf_counter() - start
+
+        profiler = g.pop('profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            if elapsed >= PROFILE_SLOW_SECONDS:
+                os.makedirs(PROFILE_DIR, exist_ok=True)
+                path = os.path.join(
+                    PROFILE_DIR,
+                    f'{time.strftime("%Y%m%d-%H%M%S")}-{request.endpoint}-{int(elapsed * 1000)}ms.prof'
+                )
+                profiler.dump_stats(path)
+                print(f"Slow request {request.path} took {elapsed:.3f}s, profile saved to {path}", flush=True)
+
+        series = {
+            'app': app_name,
+            'endpoint': request.endpoint or 'unknown',
+            'method': request.method,
+            'status': str(response.status_code)
+        }
+        request_seconds.observe(elapsed, **series)
+        size = response.calculate_content_length()
+        if size is not None:
+            response_bytes.observe(size, **series)
+        start_flusher(REGISTRY)
+        return response
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(REGISTRY), mimetype='text/plain; version=0.0.4')
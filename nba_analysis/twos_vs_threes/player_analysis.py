@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+from shot_engine import compute_shot_optimization, row_sum, shot_types, zone_matrix
+from team_payload import format_team_payload
+
+# Raw NBA API player CSVs written by fetch_all_stats (shot locations, player stats)
+PLAYER_DATA_SOURCES = ['api_nba_player_stats_shot_zones.csv', 'api_nba_player_stats.csv']
+
+# Season field goal attempts a player needs to appear in team player lists by default
+MIN_PLAYER_FGA = 50
+
+# Player stats columns carried into the analysis, renamed like the team data
+PLAYER_STAT_COLUMNS = {
+    'PLAYER_ID': 'PLAYER_ID',
+    'TEAM_ID': 'TEAM_ID',
+    'GP': 'GP',
+    'MIN': 'MIN',
+    'FTM': 'FT_FGM',
+    'FTA': 'FT_FGA',
+    'FT_PCT': 'FT_PCT',
+    'PTS': 'PTS'
+}
+
+
+def merge_player_data(df_shots, df_stats, team_names=None):
+    """
+    Joins player shot locations with player stats on PLAYER_ID.
+
+    Parameters:
+    df_shots (DataFrame): Normalized player shot locations
+    df_stats (DataFrame): Player stats from NBA API
+    team_names (dict): TEAM_ID to team name, used for the Team column
+
+    Returns:
+    DataFrame: One row per player with zone, free throw and games columns
+    """
+    season_keys = [key for key in ('Season', 'Season_Type') if key in df_shots.columns and key in df_stats.columns]
+
+    player_stats = df_stats[list(PLAYER_STAT_COLUMNS) + season_keys].rename(columns=PLAYER_STAT_COLUMNS)
+    player_stats['FT_PCT'] = player_stats['FT_PCT'] * 100
+
+    # Stats carry the player's current team, so the shot data's copy is dropped
+    shots = df_shots.drop(columns=[column for column in ('TEAM_ID',) if column in df_shots.columns])
+    join_keys = ['PLAYER_ID'] + season_keys
+    merged_df = shots.join(player_stats.set_index(join_keys), on=join_keys, how='inner')
+
+    if team_names is not None:
+        merged_df['Team'] = merged_df['TEAM_ID'].map(team_names)
+    return merged_df.reset_index(drop=True)
+
+
+def analyze_player_shots(merged_df, shot_types=shot_types, optimizer=None):
+    """
+    Runs the zone EV / optimal mix analysis for every player in one pass.
+
+    Players with no made field goals anywhere have no EV to reallocate by
+    and are left out. Zones a player never shot from count as 0% FG.
+
+    Parameters:
+    merged_df (DataFrame): Output of merge_player_data
+    shot_types (dict): Zone name to point value mapping
+    optimizer (callable): Optional constrained solver for the optimal mix
+
+    Returns:
+    DataFrame: Player key columns followed by the engine's analysis columns
+    """
+    zones = list(shot_types)
+    df = merged_df.copy()
+    pct_columns = [f'{zone}_FG%' for zone in zones]
+    df[pct_columns] = df[pct_columns].fillna(0.0)
+    df['FT_PCT'] = df['FT_PCT'].fillna(0.0)
+
+    points = np.array([shot_types[zone] for zone in zones], dtype=np.float64)
+    total_ev = row_sum(zone_matrix(df, 'FG%', zones) / 100 * points)
+    df = df[total_ev > 0].reset_index(drop=True)
+
+    analysis = compute_shot_optimization(
+        df,
+        ft_points='FT_FGM',
+        ft_attempts='FT_FGA',
+        ft_percentage='FT_PCT',
+        shot_types=shot_types,
+        optimizer=optimizer
+    )
+
+    total_fga = row_sum(zone_matrix(df, 'FGA', zones))
+    keys = pd.DataFrame({
+        'PLAYER_ID': df['PLAYER_ID'].to_numpy(),
+        'Player': df['Player'].to_numpy(),
+        'TEAM_ID': df['TEAM_ID'].to_numpy(),
+        'Team': df['Team'].to_numpy() if 'Team' in df.columns else None,
+        'GP': df['GP'].to_numpy(),
+        'MIN': df['MIN'].to_numpy(),
+        'Total_FGA': total_fga,
+        'Season_FGA': total_fga * df['GP'].to_numpy()
+    })
+    return pd.concat([keys, analysis.drop(columns=['Team'], errors='ignore')], axis=1)
+
+
+def build_player_index(analysis_df):
+    """
+    Indexes player rows by PLAYER_ID and by team.
+
+    Team entries hold row positions sorted by season attempts, most first,
+    so a team's list is an array slice plus a minimum-attempt mask.
+
+    Parameters:
+    analysis_df (DataFrame): Output of analyze_player_shots
+
+    Returns:
+    dict: {'players': {id: position}, 'teams': {team: positions ndarray}}
+    """
+    players = {int(player_id): position for position, player_id in enumerate(analysis_df['PLAYER_ID'])}
+
+    order = np.argsort(-analysis_df['Season_FGA'].to_numpy(), kind='stable')
+    teams_sorted = analysis_df['Team'].to_numpy()[order]
+    teams = {
+        team: order[positions]
+        for team, positions in pd.Series(teams_sorted).groupby(teams_sorted, sort=False).indices.items()
+    }
+    return {'players': players, 'teams': teams}
+
+
+def team_player_positions(player_index, season_fga, team_name, min_attempts=MIN_PLAYER_FGA):
+    """
+    Returns a team's player rows with at least min_attempts season FGA.
+
+    Parameters:
+    player_index (dict): Output of build_player_index
+    season_fga (ndarray): Season_FGA of every analysis row
+    team_name (str): Team to list
+    min_attempts (float): Minimum season field goal attempts
+
+    Returns:
+    ndarray: Row positions, most attempts first, or None for an unknown team
+    """
+    positions = player_index['teams'].get(team_name)
+    if positions is None:
+        return None
+    return positions[season_fga[positions] >= min_attempts]
+
+
+def format_player_payload(player_analysis, shot_types):
+    """
+    Formats one player's analysis row as a team payload plus a player block.
+
+    Parameters:
+    player_analysis (Series or dict): Row of the analyze_player_shots output
+    shot_types (dict): Zone name to point value mapping
+
+    Returns:
+    dict: 'player', 'current', 'optimal' and 'impact' sections
+    """
+    payload = {
+        "player": {
+            "id": int(player_analysis['PLAYER_ID']),
+            "name": player_analysis['Player'],
+            "team": player_analysis['Team'] if isinstance(player_analysis['Team'], str) else None,
+            "team_id": int(player_analysis['TEAM_ID']),
+            "games": int(player_analysis['GP']),
+            "minutes": float(player_analysis['MIN']),
+            "attempts_per_game": float(player_analysis['Total_FGA']),
+            "season_attempts": float(player_analysis['Season_FGA'])
+        }
+    }
+    payload.update(format_team_payload(player_analysis, shot_types))
+    return payload
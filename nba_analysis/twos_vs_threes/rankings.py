@@ -0,0 +1,196 @@
+import numpy as np
+
+from reports import season_labels
+from shot_engine import KEY_COLUMNS
+
+# Ranking group holding every row of a multi-season analysis
+ALL_SEASONS = 'all'
+
+# Most rows returned by one top-k query
+MAX_TOP = 100
+
+
+class RankingGroup:
+    """
+    Sorted values of every metric for one set of rows (a season, or all).
+
+    Built once per analysis; every query is a binary search or an array
+    slice, so nothing touches pandas at request time.
+
+    Parameters:
+    names (list): Row labels, e.g. team names
+    values (dict): Metric name to float64 array, aligned with names
+    """
+
+    def __init__(self, names, values):
+        self.names = list(names)
+        self.positions = {name: position for position, name in enumerate(self.names)}
+        self.values = values
+        self.sorted_values = {}
+        self.descending = {}
+        for metric, metric_values in values.items():
+            valid = np.flatnonzero(~np.isnan(metric_values))
+            order = valid[np.argsort(-metric_values[valid], kind='stable')]
+            self.descending[metric] = order
+            self.sorted_values[metric] = metric_values[order][::-1].copy()
+
+    def count(self, metric):
+        return len(self.sorted_values[metric])
+
+    def rank(self, metric, value):
+        """
+        Returns (rank, percentile) of a value: rank 1 is the highest, ties share a rank.
+
+        The percentile is the share of rows at or below the value.
+        """
+        sorted_values = self.sorted_values[metric]
+        at_or_below = int(np.searchsorted(sorted_values, value, side='right'))
+        return len(sorted_values) - at_or_below + 1, 100.0 * at_or_below / len(sorted_values)
+
+    def entry(self, metric, position):
+        """
+        Returns one row's value, rank and percentile for a metric.
+        """
+        value = float(self.values[metric][position])
+        if np.isnan(value):
+            return {"name": self.names[position], "value": None, "rank": None, "percentile": None}
+        rank, percentile = self.rank(metric, value)
+        return {"name": self.names[position], "value": value, "rank": rank, "percentile": percentile}
+
+    def lookup(self, metric, name):
+        """
+        Returns a named row's entry, or None if the group has no such row.
+        """
+        position = self.positions.get(name)
+        return None if position is None else self.entry(metric, position)
+
+    def top(self, metric, k, ascending=False):
+        """
+        Returns the k highest rows of a metric, or the k lowest if ascending.
+        """
+        order = self.descending[metric]
+        positions = order[::-1][:k] if ascending else order[:k]
+        return [self.entry(metric, position) for position in positions]
+
+
+def ranking_metrics(analysis_df):
+    """
+    Returns every numeric metric the API emits, keyed by name.
+
+    Analysis columns keep their names (e.g. 'AB3_EV', 'win_difference') and
+    'ppg_difference' is added as optimal_ppg - current_ppg.
+
+    Returns:
+    dict: Metric name to float64 array
+    """
+    metrics = {
+        column: analysis_df[column].to_numpy(dtype=np.float64)
+        for column in analysis_df.columns
+        if column not in KEY_COLUMNS and np.issubdtype(analysis_df[column].dtype, np.number)
+    }
+    metrics['ppg_difference'] = metrics['optimal_ppg'] - metrics['current_ppg']
+    return metrics
+
+
+def build_ranking_index(analysis_df):
+    """
+    Builds ranking groups per season and one across all seasons.
+
+    Groups are labelled like '2023-24 Regular Season'. Analyses without a
+    Season column have a single 'current' group and no all-seasons group.
+    In the all-seasons group rows are named '{team} ({season})'.
+
+    Parameters:
+    analysis_df (DataFrame): Output of analyze_shot_optimization, optionally multi-season
+
+    Returns:
+    dict: Season label (or ALL_SEASONS) to RankingGroup
+    """
+    metrics = ranking_metrics(analysis_df)
+    labels = season_labels(analysis_df).to_numpy()
+    teams = analysis_df['Team'].to_numpy()
+
+    index = {}
+    for season in sorted(set(labels)):
+        rows = np.flatnonzero(labels == season)
+        index[season] = RankingGroup(teams[rows], {metric: values[rows] for metric, values in metrics.items()})
+
+    if 'Season' in analysis_df.columns:
+        names = [f'{team} ({season})' for team, season in zip(teams, labels)]
+        index[ALL_SEASONS] = RankingGroup(names, metrics)
+    return index
+
+
+def default_season(ranking_index, team=None):
+    """
+    Returns the group queried when no season is given: all seasons if present.
+
+    A bare team name, which the all-seasons group doesn't hold, is looked up
+    in the latest season that has it, so '?team=Boston Celtics' ranks the
+    live season.
+    """
+    if ALL_SEASONS not in ranking_index:
+        return next(iter(ranking_index))
+    if team is None or team in ranking_index[ALL_SEASONS].positions:
+        return ALL_SEASONS
+    seasons = [season for season, group in ranking_index.items() if season != ALL_SEASONS and team in group.positions]
+    return seasons[-1] if seasons else ALL_SEASONS
+
+
+def resolve_season(ranking_index, season=None, season_type=None, team=None):
+    """
+    Returns the group label for a season query.
+
+    A season can be given as a full label ('2023-24 Regular Season'), as
+    ALL_SEASONS, or as a season ('2023-24') with the season type defaulting
+    to the regular season. Without a season the group comes from
+    default_season.
+
+    Returns:
+    str: Group label, which may be missing from the index
+    """
+    if season is None:
+        return default_season(ranking_index, team)
+    if season == ALL_SEASONS or (season in ranking_index and season_type is None):
+        return season
+    return f"{season} {season_type or 'Regular Season'}"
+
+
+def query_rankings(ranking_index, metric, season=None, top=10, team=None, ascending=False, season_type=None):
+    """
+    Answers a rankings query: the top k rows and optionally one team's rank.
+
+    Parameters:
+    ranking_index (dict): Output of build_ranking_index
+    metric (str): Metric name, see ranking_metrics
+    season (str): Season or group label, see resolve_season; defaults to default_season for the team
+    top (int): Rows to return, from 1 to MAX_TOP
+    team (str): Row name to rank, e.g. a team name
+    ascending (bool): Return the lowest rows instead of the highest
+    season_type (str): Season type for a bare season, defaults to 'Regular Season'
+
+    Returns:
+    dict: JSON-serializable query result, its 'team' is None for an unknown team
+
+    Raises:
+    ValueError: If the metric, season or top is invalid
+    """
+    season = resolve_season(ranking_index, season, season_type, team)
+    group = ranking_index.get(season)
+    if group is None:
+        raise ValueError(f"Unknown season '{season}'")
+    if metric not in group.values:
+        raise ValueError(f"Unknown metric '{metric}'")
+    if not 1 <= top <= MAX_TOP:
+        raise ValueError(f"top must be between 1 and {MAX_TOP}")
+
+    result = {
+        "metric": metric,
+        "season": season,
+        "count": group.count(metric),
+        "order": "ascending" if ascending else "descending",
+        "top": group.top(metric, top, ascending)
+    }
+    if team is not None:
+        result["team"] = group.lookup(metric, team)
+    return result
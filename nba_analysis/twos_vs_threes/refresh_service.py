@@ -0,0 +1,183 @@
+import argparse
+import os
+
+import pandas as pd
+import requests
+import schedule
+import time
+
+from data_cache import write_csv_atomic
+from fetch_pipeline import FetchJob, NBAStatsTransport, RateLimiter, fetch_job
+from history_store import append_snapshot
+from shot_schema import flatten_columns
+from snapshots import format_snapshot_payloads, load_snapshot_payloads, publish_snapshot
+from team_analysis import TEAM_DATA_SOURCES, analysis_config, analyze_shot_optimization, merge_team_data, shot_optimizer, shot_types, transform_shot_location_data
+from uncertainty import compute_intervals
+
+# API workers to notify after a refresh, e.g. "http://127.0.0.1:5000,http://127.0.0.1:5001"
+WORKER_URLS = [url for url in os.environ.get('NBA_API_WORKERS', 'http://127.0.0.1:5000').split(',') if url]
+
+# Shared secret the workers expect on /api/admin/reload, set to the same NBA_ADMIN_TOKEN
+ADMIN_TOKEN = os.environ.get('NBA_ADMIN_TOKEN', '')
+
+
+def read_stored_frames():
+    """
+    Reads the currently published shot location and team stats CSVs.
+
+    Returns:
+    tuple: (df_shots, df_stats), or (None, None) if nothing is stored yet
+    """
+    try:
+        df_shots = pd.read_csv(TEAM_DATA_SOURCES[0], header=[0, 1])
+        df_stats = pd.read_csv(TEAM_DATA_SOURCES[1])
+    except FileNotFoundError:
+        return None, None
+    return flatten_columns(df_shots), df_stats
+
+
+def changed_team_ids(new_df, old_df):
+    """
+    Returns TEAM_IDs whose row differs between two pulls of the same table.
+
+    Teams that were added or dropped count as changed.
+    """
+    if old_df is None or list(new_df.columns) != list(old_df.columns):
+        return set(new_df['TEAM_ID'])
+
+    new_rows = new_df.set_index('TEAM_ID')
+    old_rows = old_df.set_index('TEAM_ID')
+
+    changed = set(new_rows.index).symmetric_difference(old_rows.index)
+    common = new_rows.index.intersection(old_rows.index)
+    new_common = new_rows.loc[common]
+    old_common = old_rows.loc[common]
+
+    differs = ~((new_common == old_common) | (new_common.isna() & old_common.isna())).all(axis=1)
+    changed.update(common[differs.to_numpy()])
+    return changed
+
+
+def fetch_current(season, season_type, transport):
+    """
+    Pulls fresh team stats and shot locations, bypassing the response cache.
+    """
+    rate_limiter = RateLimiter(1.0)
+    df_stats, _ = fetch_job(FetchJob('team_stats', season, season_type, 'PerGame'), transport, None, rate_limiter)
+    df_shots, _ = fetch_job(FetchJob('shot_locations', season, season_type, 'PerGame'), transport, None, rate_limiter)
+    return df_shots, df_stats
+
+
+def notify_workers(worker_urls=WORKER_URLS, token=ADMIN_TOKEN):
+    """
+    Asks each running API worker to hot-swap its in-memory dataset.
+
+    Workers reanalyze only the teams whose rows changed, so a reload after
+    an incremental refresh costs about as much as the refresh did.
+    """
+    if not token:
+        print("NBA_ADMIN_TOKEN is not set, workers will pick up the new data on their next request")
+        return
+
+    for url in worker_urls:
+        try:
+            response = requests.post(
+                f'{url.rstrip("/")}/api/admin/reload',
+                headers={'Authorization': f'Bearer {token}'},
+                timeout=60
+            )
+            response.raise_for_status()
+        except Exception as e:
+            print(f"Could not notify {url}: {str(e)}")
+
+
+def refresh_team_data(season='2024-25', season_type='Regular Season', transport=None, worker_urls=WORKER_URLS):
+    """
+    Pulls the latest stats and republishes only what moved.
+
+    The new pull is diffed against the stored CSVs. If nothing changed the
+    refresh stops there. Otherwise the analysis is rerun for the changed
+    teams only and merged with the unchanged teams' published payloads,
+    unless those were built with other analysis settings. The CSVs and the
+    snapshot are swapped in atomically, and the API workers are told to
+    reload.
+
+    Parameters:
+    season (str): Season to refresh
+    season_type (str): Season type to refresh
+    transport (callable): Fetch transport, defaults to NBAStatsTransport
+    worker_urls (list): API base URLs to notify
+
+    Returns:
+    set: Names of the teams whose analysis was recomputed
+    """
+    raw_shots, df_stats = fetch_current(season, season_type, transport or NBAStatsTransport())
+    df_shots = flatten_columns(raw_shots)
+
+    old_shots, old_stats = read_stored_frames()
+    changed = changed_team_ids(df_shots, old_shots) | changed_team_ids(df_stats, old_stats)
+    if not changed:
+        print("No stats changed since the last refresh")
+        return set()
+
+    # Analysis rows are independent, so only the changed teams need recomputing
+    shots_subset = df_shots[df_shots['TEAM_ID'].isin(changed)]
+    stats_subset = df_stats[df_stats['TEAM_ID'].isin(changed)]
+    merged_subset = merge_team_data(transform_shot_location_data(shots_subset), stats_subset)
+    analysis_df = analyze_shot_optimization(merged_subset, optimizer=shot_optimizer)
+    intervals_df = compute_intervals(merged_subset, shot_types, optimizer=shot_optimizer)
+    recomputed = format_snapshot_payloads(analysis_df, shot_types, include_wins=True, intervals_df=intervals_df)
+
+    config = analysis_config()
+    previous = load_snapshot_payloads(config=config) or {}
+    team_data = {}
+    for team_name in df_stats['TEAM_NAME']:
+        payload = recomputed.get(team_name, previous.get(team_name))
+        if payload is not None:
+            team_data[team_name] = payload
+
+    # A team missing from the previous snapshot forces a full rebuild
+    if len(team_data) < len(df_stats):
+        merged_data = merge_team_data(transform_shot_location_data(df_shots), df_stats)
+        full_analysis = analyze_shot_optimization(merged_data, optimizer=shot_optimizer)
+        full_intervals = compute_intervals(merged_data, shot_types, optimizer=shot_optimizer)
+        team_data = format_snapshot_payloads(full_analysis, shot_types, include_wins=True, intervals_df=full_intervals)
+        recomputed = team_data
+
+    write_csv_atomic(raw_shots, TEAM_DATA_SOURCES[0], index=False)
+    write_csv_atomic(df_stats, TEAM_DATA_SOURCES[1], index=False)
+    publish_snapshot(team_data, TEAM_DATA_SOURCES, config=config)
+
+    try:
+        append_snapshot(df_stats, 'team_stats', season, season_type)
+        append_snapshot(raw_shots, 'shot_locations', season, season_type)
+    except Exception as e:
+        print(f"Error archiving snapshot: {str(e)}")
+
+    notify_workers(worker_urls)
+
+    print(f"Refreshed {len(recomputed)} of {len(team_data)} teams")
+    return set(recomputed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the published team data current")
+    parser.add_argument('--season', default='2024-25')
+    parser.add_argument('--season-type', default='Regular Season')
+    parser.add_argument('--interval', type=int, default=15, help="Minutes between refreshes")
+    args = parser.parse_args()
+
+    def refresh_job():
+        try:
+            refresh_team_data(args.season, args.season_type)
+        except Exception as e:
+            print(f"Error refreshing NBA stats: {str(e)}")
+
+    schedule.every(args.interval).minutes.do(refresh_job)
+
+    # Run once immediately when starting
+    refresh_job()
+
+    while True:
+        schedule.run_pending()
+        time.sleep(10)
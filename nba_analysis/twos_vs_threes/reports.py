@@ -0,0 +1,256 @@
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from snapshots import canonical_json, team_file_name
+
+REPORT_DIR = 'reports'
+REPORT_MANIFEST = 'manifest.json'
+
+# Bumped whenever the drawing code changes, so every figure is re-rendered once
+RENDER_VERSION = 1
+
+# Image resolution; the notebook heatmaps were saved at 300 dpi
+REPORT_DPI = int(os.environ.get('NBA_REPORT_DPI', '150'))
+
+# Process pool size for rendering, 1 renders in this process
+REPORT_WORKERS = int(os.environ.get('NBA_REPORT_WORKERS', os.cpu_count() or 1))
+
+# One figure to render: its kind, public name, content key and input slice
+ReportJob = namedtuple('ReportJob', ['kind', 'name', 'key', 'data'])
+
+
+def season_labels(analysis_df):
+    """
+    Returns the season each row belongs to, 'current' for single-season data.
+    """
+    if 'Season' not in analysis_df.columns:
+        return pd.Series('current', index=analysis_df.index)
+    labels = analysis_df['Season'].astype(str)
+    if 'Season_Type' in analysis_df.columns:
+        labels = labels + ' ' + analysis_df['Season_Type'].astype(str)
+    return labels
+
+
+def report_name(kind, season, name):
+    """
+    Returns the public name of a figure, e.g. 'heatmap/current/LC3'.
+    """
+    return f'{kind}/{team_file_name(season)}/{team_file_name(name)}'
+
+
+def make_job(kind, season, name, data, dpi=REPORT_DPI):
+    """
+    Builds a ReportJob whose key is the hash of everything the figure shows.
+    """
+    content = canonical_json({'kind': kind, 'render_version': RENDER_VERSION, 'dpi': dpi, 'data': data})
+    return ReportJob(kind, report_name(kind, season, name), hashlib.sha256(content).hexdigest()[:32], data)
+
+
+def report_jobs(analysis_df, shot_types, dpi=REPORT_DPI):
+    """
+    Slices the analysis into one job per zone x season and per team x season.
+
+    Heatmaps compare every team's actual and expected attempts in one zone.
+    Team charts compare one team's actual and expected attempts in every zone.
+
+    Parameters:
+    analysis_df (DataFrame): Output of analyze_shot_optimization, optionally multi-season
+    shot_types (dict): Zone name to point value mapping
+    dpi (int): Image resolution, part of each figure's key
+
+    Returns:
+    list: ReportJob tuples
+    """
+    jobs = []
+    for season, season_df in analysis_df.groupby(season_labels(analysis_df), sort=True):
+        season_df = season_df.sort_values('Team')
+        teams = season_df['Team'].tolist()
+
+        for zone in shot_types:
+            jobs.append(make_job('heatmap', season, zone, {
+                'zone': zone,
+                'season': season,
+                'teams': teams,
+                'actual': season_df[f'{zone}_Current_Attempts'].round(4).tolist(),
+                'expected': season_df[f'{zone}_Optimal_Attempts'].round(4).tolist()
+            }, dpi))
+
+        for _, team_analysis in season_df.iterrows():
+            jobs.append(make_job('team', season, team_analysis['Team'], {
+                'team': team_analysis['Team'],
+                'season': season,
+                'zones': list(shot_types),
+                'actual': [round(float(team_analysis[f'{zone}_Current_Attempts']), 4) for zone in shot_types],
+                'expected': [round(float(team_analysis[f'{zone}_Optimal_Attempts']), 4) for zone in shot_types],
+                'current_ppg': round(float(team_analysis['current_ppg']), 4),
+                'optimal_ppg': round(float(team_analysis['optimal_ppg']), 4)
+            }, dpi))
+
+    return jobs
+
+
+def image_path(key, report_dir=REPORT_DIR):
+    """
+    Returns where the figure with this content key is stored.
+    """
+    return os.path.join(report_dir, 'images', key[:2], f'{key}.png')
+
+
+def draw_heatmap(plt, data):
+    """
+    Actual vs expected attempts in one zone for every team, as in the notebooks.
+    """
+    fig, ax = plt.subplots(figsize=(20, 4))
+    values = [data['actual'], data['expected']]
+    image = ax.imshow(values, cmap='coolwarm', aspect='auto')
+    for row, row_values in enumerate(values):
+        for column, value in enumerate(row_values):
+            ax.text(column, row, f'{value:.1f}', ha='center', va='center', fontsize=8)
+
+    ax.set_xticks(range(len(data['teams'])))
+    ax.set_xticklabels(data['teams'], rotation=90)
+    ax.set_yticks([0, 1])
+    ax.set_yticklabels([f"{data['zone']}_FGA", f"EV_{data['zone']}_Attempts"])
+    fig.colorbar(image, ax=ax)
+    ax.set_title(f"Heatmap of Actual and Expected {data['zone']} Performance ({data['season']})", fontsize=16)
+    return fig
+
+
+def draw_team_chart(plt, data):
+    """
+    One team's actual vs expected attempts in every zone as grouped bars.
+    """
+    fig, ax = plt.subplots(figsize=(10, 5))
+    positions = range(len(data['zones']))
+    ax.bar([x - 0.2 for x in positions], data['actual'], width=0.4, label='Actual')
+    ax.bar([x + 0.2 for x in positions], data['expected'], width=0.4, label='Expected')
+    ax.set_xticks(list(positions))
+    ax.set_xticklabels(data['zones'])
+    ax.set_ylabel('Attempts per game')
+    ax.legend()
+    ax.set_title(
+        f"{data['team']} ({data['season']}): {data['current_ppg']:.1f} PPG now, "
+        f"{data['optimal_ppg']:.1f} PPG with the expected mix"
+    )
+    return fig
+
+
+REPORT_KINDS = {
+    'heatmap': draw_heatmap,
+    'team': draw_team_chart
+}
+
+
+def render_report(args):
+    """
+    Renders one job to its content-addressed path.
+
+    Module-level so it can run in a process pool. The image is written to a
+    temporary file and renamed, so readers never see a partial PNG.
+
+    Parameters:
+    args (tuple): (ReportJob, report_dir, dpi)
+
+    Returns:
+    str: Path of the rendered image
+    """
+    job, report_dir, dpi = args
+
+    # Imported here so serving the cached images never loads matplotlib
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    path = image_path(job.key, report_dir)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    fig = REPORT_KINDS[job.kind](plt, job.data)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            fig.savefig(f, format='png', dpi=dpi, bbox_inches='tight')
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    finally:
+        plt.close(fig)
+    return path
+
+
+def build_reports(analysis_df, shot_types, report_dir=REPORT_DIR, workers=REPORT_WORKERS, dpi=REPORT_DPI):
+    """
+    Renders every figure whose input changed and publishes a new manifest.
+
+    Figures already on disk under their content key are reused as is, so
+    a daily run only renders the teams and zones whose numbers moved.
+
+    Parameters:
+    analysis_df (DataFrame): Output of analyze_shot_optimization, optionally multi-season
+    shot_types (dict): Zone name to point value mapping
+    report_dir (str): Directory holding the images and the manifest
+    workers (int): Process pool size, None or 1 renders in this process
+    dpi (int): Image resolution
+
+    Returns:
+    dict: Counts of rendered and reused figures
+    """
+    jobs = report_jobs(analysis_df, shot_types, dpi)
+    pending = list({job.key: job for job in jobs if not os.path.exists(image_path(job.key, report_dir))}.values())
+    params = [(job, report_dir, dpi) for job in pending]
+
+    if workers is None or workers <= 1 or len(params) <= 1:
+        list(map(render_report, params))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(render_report, params, chunksize=max(1, len(params) // (workers * 4))))
+
+    manifest = {
+        'created_at': time.time(),
+        'render_version': RENDER_VERSION,
+        'reports': {job.name: job.key for job in jobs}
+    }
+    os.makedirs(report_dir, exist_ok=True)
+    manifest_tmp = os.path.join(report_dir, f'.{REPORT_MANIFEST}.tmp')
+    with open(manifest_tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(manifest_tmp, os.path.join(report_dir, REPORT_MANIFEST))
+
+    print(f"Rendered {len(pending)} of {len(jobs)} report figures")
+    return {'rendered': len(pending), 'reused': len(jobs) - len(pending)}
+
+
+def load_report_manifest(report_dir=REPORT_DIR):
+    """
+    Loads the published manifest, mapping report names to content keys.
+    """
+    with open(os.path.join(report_dir, REPORT_MANIFEST)) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Render actual vs expected heatmaps and team charts")
+    parser.add_argument('--seasons', help="Season range such as 2019-25 from the historical store")
+    parser.add_argument('--season-types', nargs='+')
+    parser.add_argument('--workers', type=int, default=REPORT_WORKERS)
+    parser.add_argument('--dpi', type=int, default=REPORT_DPI)
+    parser.add_argument('--report-dir', default=REPORT_DIR)
+    args = parser.parse_args()
+
+    from team_analysis import analyze_shot_optimization, load_team_data, load_team_history, shot_optimizer, shot_types
+
+    if args.seasons:
+        merged_data = load_team_history(args.seasons, args.season_types)
+        analysis_df = analyze_shot_optimization(merged_data, optimizer=shot_optimizer)
+    else:
+        analysis_df = load_team_data()['analysis']
+
+    build_reports(analysis_df, shot_types, args.report_dir, args.workers, args.dpi)
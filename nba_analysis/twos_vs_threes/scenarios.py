@@ -0,0 +1,206 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from shot_engine import project_win_impact, row_sum, zone_matrix
+
+# Most scenarios accepted in one request
+MAX_SCENARIOS = 5000
+
+# Deltas are rounded to this many decimals before caching, so slider
+# positions that differ only by float noise share a cache entry
+DELTA_DECIMALS = 4
+
+
+def normalize_deltas(deltas, zones, name):
+    """
+    Turns a {zone: delta} mapping into a tuple of floats in zone order.
+
+    Parameters:
+    deltas (dict): Zone name to delta, may be missing or empty
+    zones (list): Zone names in order
+    name (str): Field name used in error messages
+
+    Returns:
+    tuple: One rounded delta per zone
+    """
+    deltas = deltas or {}
+    if not isinstance(deltas, dict):
+        raise ValueError(f"'{name}' must map zones to numbers")
+
+    unknown = [zone for zone in deltas if zone not in zones]
+    if unknown:
+        raise ValueError(f"Unknown zones in '{name}': {', '.join(unknown)}")
+
+    try:
+        values = [float(deltas.get(zone, 0)) for zone in zones]
+    except (TypeError, ValueError):
+        raise ValueError(f"'{name}' must map zones to numbers")
+    if not np.all(np.isfinite(values)):
+        raise ValueError(f"'{name}' must map zones to finite numbers")
+
+    # Adding 0.0 turns -0.0 into 0.0 so both hash the same
+    return tuple(round(value, DELTA_DECIMALS) + 0.0 for value in values)
+
+
+def normalize_scenario(scenario, zones):
+    """
+    Validates one scenario and returns its canonical, hashable form.
+
+    A scenario names a team and adjusts its per-game zone stats:
+
+        {"team": "Chicago Bulls",
+         "attempts": {"MR": -5, "AB3": 5},
+         "fg_pct": {"AB3": -2}}
+
+    attempts are per-game FGA deltas and fg_pct are FG% deltas in
+    percentage points. Zones left out are unchanged.
+
+    Returns:
+    tuple: (team, attempt deltas, FG% deltas)
+    """
+    if not isinstance(scenario, dict) or not isinstance(scenario.get('team'), str):
+        raise ValueError("Each scenario needs a 'team' name")
+
+    unknown = [key for key in scenario if key not in ('team', 'attempts', 'fg_pct')]
+    if unknown:
+        raise ValueError(f"Unknown scenario fields: {', '.join(unknown)}")
+
+    return (
+        scenario['team'],
+        normalize_deltas(scenario.get('attempts'), zones, 'attempts'),
+        normalize_deltas(scenario.get('fg_pct'), zones, 'fg_pct')
+    )
+
+
+def evaluate_scenarios(merged_df, team_index, scenarios, shot_types):
+    """
+    Evaluates normalized scenarios as one vectorized batch.
+
+    Each scenario's team row is gathered from the merged data, the deltas
+    are applied across a (scenarios x zones) array, and PPG and win impact
+    are computed for all scenarios at once. Attempts are floored at zero
+    and FG% is kept within 0-100.
+
+    Parameters:
+    merged_df (DataFrame): Merged team data the analysis was built from
+    team_index (dict): Team name to row position
+    scenarios (list): Tuples from normalize_scenario, teams must be known
+    shot_types (dict): Zone name to point value mapping
+
+    Returns:
+    list: One result dict per scenario, in input order
+    """
+    zones = list(shot_types)
+    points = np.array([shot_types[zone] for zone in zones], dtype=np.float64)
+
+    positions = np.array([team_index[team] for team, _, _ in scenarios], dtype=np.intp)
+    teams = merged_df.iloc[positions]
+
+    attempts = zone_matrix(teams, 'FGA', zones)
+    fg_pct = zone_matrix(teams, 'FG%', zones) / 100
+    attempt_deltas = np.array([deltas for _, deltas, _ in scenarios], dtype=np.float64)
+    fg_pct_deltas = np.array([deltas for _, _, deltas in scenarios], dtype=np.float64) / 100
+
+    scenario_attempts = np.maximum(attempts + attempt_deltas, 0.0)
+    scenario_fg_pct = np.clip(fg_pct + fg_pct_deltas, 0.0, 1.0)
+
+    ft_points = teams['FT_FGM'].to_numpy(dtype=np.float64)
+    current_ppg = row_sum(attempts * fg_pct * points) + ft_points
+    scenario_ppg = row_sum(scenario_attempts * scenario_fg_pct * points) + ft_points
+
+    impact = project_win_impact(
+        current_ppg,
+        scenario_ppg,
+        teams['W'].to_numpy(),
+        teams['GP'].to_numpy(),
+        teams['PLUS_MINUS'].to_numpy()
+    )
+
+    results = []
+    for i, (team, _, _) in enumerate(scenarios):
+        results.append({
+            "team": team,
+            "attempts": {zone: float(scenario_attempts[i, j]) for j, zone in enumerate(zones)},
+            "fg_pct": {zone: float(scenario_fg_pct[i, j] * 100) for j, zone in enumerate(zones)},
+            "total_attempts": float(scenario_attempts[i].sum()),
+            "current_ppg": float(current_ppg[i]),
+            "scenario_ppg": float(scenario_ppg[i]),
+            "points_difference": float(scenario_ppg[i] - current_ppg[i]),
+            "current_wins": float(impact['current_wins'][i]),
+            "projected_wins": float(impact['projected_wins'][i]),
+            "wins_difference": float(impact['win_difference'][i]),
+            "projected_win_pct": float(impact['projected_win_pct'][i]),
+            "projected_plus_minus": float(impact['projected_plus_minus'][i])
+        })
+    return results
+
+
+class ScenarioCache:
+    """
+    LRU cache of scenario results keyed on dataset version and scenario.
+
+    Only the scenarios missing from the cache are evaluated, together in
+    one batch, so repeating a slider position costs a dictionary lookup.
+
+    Parameters:
+    maxsize (int): Scenario results kept before the least recent is dropped
+    """
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def evaluate(self, dataset, scenarios, shot_types):
+        """
+        Returns results for already-normalized scenarios against a dataset.
+
+        Parameters:
+        dataset (CachedDataset): Team data with 'inputs' and 'team_index'
+        scenarios (list): Tuples from normalize_scenario
+        shot_types (dict): Zone name to point value mapping
+
+        Returns:
+        list: One result dict per scenario, in input order
+        """
+        keys = [(dataset.version,) + scenario for scenario in scenarios]
+
+        # Held for the whole lookup and batch, the OrderedDict is not thread-safe
+        with self._lock:
+            missing = {}
+            for key, scenario in zip(keys, scenarios):
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    self.hits += 1
+                elif key not in missing:
+                    missing[key] = scenario
+                    self.misses += 1
+
+            computed = {}
+            if missing:
+                results = evaluate_scenarios(
+                    dataset.data['inputs'],
+                    dataset.data['team_index'],
+                    list(missing.values()),
+                    shot_types
+                )
+                computed = dict(zip(missing, results))
+                self._results.update(computed)
+                while len(self._results) > self.maxsize:
+                    self._results.popitem(last=False)
+
+            # Fresh results may have been evicted already if the batch exceeds maxsize
+            return [computed[key] if key in computed else self._results[key] for key in keys]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "size": len(self._results),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses
+            }
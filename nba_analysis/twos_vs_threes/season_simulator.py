@@ -0,0 +1,251 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from shot_engine import shot_types
+
+# Regular season length
+SEASON_GAMES = 82
+
+# Game-to-game standard deviation of an opponent's score
+OPPONENT_SD = 12.0
+
+# Percentiles reported for each win distribution
+PERCENTILES = [5, 25, 50, 75, 95]
+
+
+def binomial_pmf(n, p):
+    """
+    Returns the pmf of Binomial(n, p) over 0..n.
+    """
+    if p <= 0:
+        return np.eye(1, n + 1, 0).ravel()
+    if p >= 1:
+        return np.eye(1, n + 1, n).ravel()
+
+    pmf = np.empty(n + 1)
+    pmf[0] = (1 - p) ** n
+    k = np.arange(n)
+    pmf[1:] = pmf[0] * np.cumprod((n - k) / (k + 1) * (p / (1 - p)))
+    return pmf
+
+
+def makes_pmf(attempts, p):
+    """
+    Returns the pmf of makes for a fractional per-game attempt count.
+
+    20.4 attempts are 21 in 40% of games and 20 otherwise, so the average
+    attempts over many games equal the per-game figure.
+    """
+    floor = int(np.floor(attempts))
+    fraction = attempts - floor
+    pmf = np.zeros(floor + 2)
+    pmf[:floor + 1] += (1 - fraction) * binomial_pmf(floor, p)
+    pmf += fraction * binomial_pmf(floor + 1, p)
+    return pmf
+
+
+def game_points_pmf(attempts, fg_pct, points, ft_attempts, ft_pct):
+    """
+    Returns the exact pmf of a team's points in one game.
+
+    Each zone's makes are binomial in its attempts and FG%, and free throw
+    makes are binomial in FTA and FT%. The zone pmfs are spread onto their
+    point values and convolved, giving the distribution of the sum.
+    """
+    pmf = makes_pmf(ft_attempts, ft_pct)
+    for zone_attempts, p, value in zip(attempts, fg_pct, points):
+        zone_pmf = makes_pmf(zone_attempts, p)
+        spread = np.zeros((len(zone_pmf) - 1) * int(value) + 1)
+        spread[::int(value)] = zone_pmf
+        pmf = np.convolve(pmf, spread)
+    return pmf
+
+
+def simulate_team(mix_attempts, mix_fg_pct, points, ft_attempts, ft_pct, opponent_mean,
+                  games, n_sims, seed, chunk_size=20000):
+    """
+    Plays out n_sims seasons of a team for each shot mix.
+
+    Every game draws the team's points from the exact distribution of the
+    sum of its binomial zone makes and free throw makes, and compares them
+    with a normally distributed opponent score. Drawing the sum directly is
+    the same distribution as drawing each zone separately, at a fraction
+    of the cost. All mixes share the same uniforms and opponent scores
+    (common random numbers), so per-season differences between mixes come
+    only from the shot mix.
+
+    Parameters:
+    mix_attempts (ndarray): Zone attempts per game for each mix, (mixes, zones)
+    mix_fg_pct (ndarray): Zone FG% as fractions for each mix, (mixes, zones)
+    points (ndarray): Point value of each zone, (zones,)
+    ft_attempts (float): Free throw attempts per game
+    ft_pct (float): Free throw percentage as a fraction
+    opponent_mean (float): Opponent points per game
+    games (int): Games to simulate per season
+    n_sims (int): Seasons to simulate
+    seed (SeedSequence or int): Seed for this team's generator
+    chunk_size (int): Seasons simulated per vectorized block
+
+    Returns:
+    ndarray: Wins over the simulated games, shaped (mixes, n_sims)
+    """
+    rng = np.random.default_rng(seed)
+    mix_attempts = np.asarray(mix_attempts, dtype=np.float64)
+    mix_fg_pct = np.nan_to_num(np.asarray(mix_fg_pct, dtype=np.float64))
+
+    cdfs = []
+    for attempts, fg_pct in zip(mix_attempts, mix_fg_pct):
+        cdf = np.cumsum(game_points_pmf(attempts, fg_pct, points, ft_attempts, ft_pct))
+        cdfs.append((cdf / cdf[-1]).astype(np.float32))
+
+    wins = np.zeros((len(cdfs), n_sims), dtype=np.int32)
+    for start in range(0, n_sims, chunk_size):
+        size = min(chunk_size, n_sims - start)
+
+        # Single precision halves the cost of drawing and comparing
+        uniforms = rng.random((size, games), dtype=np.float32)
+        opponent = rng.standard_normal((size, games), dtype=np.float32)
+        opponent *= OPPONENT_SD
+        opponent += opponent_mean
+
+        for mix, cdf in enumerate(cdfs):
+            # Inverse-CDF draw: the first points total whose cdf exceeds u
+            team_points = np.searchsorted(cdf, uniforms, side='right')
+            wins[mix, start:start + size] = (team_points > opponent).sum(axis=1)
+
+    return wins
+
+
+def summarize_wins(wins, max_wins):
+    """
+    Summarizes simulated season win totals.
+
+    Returns:
+    dict: Mean, standard deviation, percentiles and the full distribution
+    """
+    summary = {
+        'mean': float(wins.mean()),
+        'std': float(wins.std())
+    }
+    for percentile, value in zip(PERCENTILES, np.percentile(wins, PERCENTILES)):
+        summary[f'p{percentile}'] = float(value)
+    summary['distribution'] = (np.bincount(wins.astype(np.int64), minlength=max_wins + 1) / len(wins)).tolist()
+    return summary
+
+
+def simulate_team_summary(params):
+    """
+    Simulates one team and summarizes its current vs optimal win totals.
+
+    Takes a single tuple so it can be mapped over a process pool.
+    """
+    (team_name, mix_attempts, mix_fg_pct, points, ft_attempts, ft_pct,
+     opponent_mean, current_wins, games, n_sims, seed) = params
+
+    wins = simulate_team(mix_attempts, mix_fg_pct, points, ft_attempts, ft_pct,
+                         opponent_mean, games, n_sims, seed)
+    current_total = current_wins + wins[0]
+    optimal_total = current_wins + wins[1]
+    max_wins = current_wins + games
+    difference = optimal_total - current_total
+
+    return team_name, {
+        'simulations': n_sims,
+        'games_simulated': games,
+        'current': summarize_wins(current_total, max_wins),
+        'optimal': summarize_wins(optimal_total, max_wins),
+        'difference': {
+            'mean': float(difference.mean()),
+            'p5': float(np.percentile(difference, 5)),
+            'p95': float(np.percentile(difference, 95)),
+            'probability_better': float((difference > 0).mean())
+        }
+    }
+
+
+def team_simulation_params(analysis_df, games_played, n_sims, seed, shot_types=shot_types, positions=None):
+    """
+    Builds one simulate_team_summary parameter tuple per analysis row.
+
+    Seeds are spawned per row from one SeedSequence, keyed on the row's
+    position in the full league, so a team's result is the same whether it
+    is simulated alone, serially or in a pool.
+
+    Parameters:
+    analysis_df (DataFrame): Output of tester_api.analyze_shot_optimization
+    games_played (array): Games played by each row's team
+    n_sims (int): Seasons to simulate per team
+    seed (int): Root seed
+    shot_types (dict): Zone name to point value mapping
+    positions (array): League row position of each analysis row, when
+    analysis_df holds only some teams; defaults to 0..n-1
+
+    Returns:
+    list: Parameter tuples in analysis row order
+    """
+    zones = list(shot_types)
+    points = np.array([shot_types[zone] for zone in zones], dtype=np.float64)
+
+    current_attempts = analysis_df[[f'{zone}_Current_Attempts' for zone in zones]].to_numpy(dtype=np.float64)
+    current_fg_pct = analysis_df[[f'{zone}_Current_FG%' for zone in zones]].to_numpy(dtype=np.float64)
+    optimal_attempts = analysis_df[[f'{zone}_Optimal_Attempts' for zone in zones]].to_numpy(dtype=np.float64)
+    optimal_makes = analysis_df[[f'{zone}_Optimal_Makes' for zone in zones]].to_numpy(dtype=np.float64)
+
+    # Effective FG% of the optimal mix, which differs from current under a decay curve
+    with np.errstate(divide='ignore', invalid='ignore'):
+        optimal_fg_pct = np.where(optimal_attempts > 0, optimal_makes / optimal_attempts, current_fg_pct)
+
+    # Opponents score what makes the current mix reproduce the actual margin
+    opponent_mean = (analysis_df['current_ppg'] - analysis_df['current_plus_minus']).to_numpy()
+
+    games_played = np.asarray(games_played)
+    remaining = SEASON_GAMES - games_played
+    if positions is None:
+        positions = range(len(analysis_df))
+    # Same streams as SeedSequence(seed).spawn(n)[position], without spawning the whole league
+    seeds = [np.random.SeedSequence(seed, spawn_key=(int(position),)) for position in positions]
+
+    params = []
+    for i in range(len(analysis_df)):
+        # A finished season is replayed in full from zero wins
+        games = int(remaining[i]) if remaining[i] > 0 else SEASON_GAMES
+        current_wins = int(analysis_df['current_wins'].iloc[i]) if remaining[i] > 0 else 0
+        params.append((
+            analysis_df['Team'].iloc[i],
+            np.stack([current_attempts[i], optimal_attempts[i]]),
+            np.stack([current_fg_pct[i], optimal_fg_pct[i]]),
+            points,
+            float(analysis_df['ft_attempts'].iloc[i]),
+            float(analysis_df['ft_percentage'].iloc[i]) / 100,
+            float(opponent_mean[i]),
+            current_wins,
+            games,
+            n_sims,
+            seeds[i]
+        ))
+    return params
+
+
+def simulate_league(analysis_df, games_played, n_sims=100000, seed=0, workers=None, shot_types=shot_types):
+    """
+    Simulates the rest of the season for every team under both shot mixes.
+
+    Parameters:
+    analysis_df (DataFrame): Output of tester_api.analyze_shot_optimization
+    games_played (array): Games played by each row's team
+    n_sims (int): Seasons to simulate per team
+    seed (int): Root seed, results are reproducible for a given seed
+    workers (int): Process pool size, None or 1 runs in this process
+    shot_types (dict): Zone name to point value mapping
+
+    Returns:
+    dict: Team name to simulation summary
+    """
+    params = team_simulation_params(analysis_df, games_played, n_sims, seed, shot_types)
+
+    if workers is None or workers <= 1:
+        return dict(map(simulate_team_summary, params))
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return dict(pool.map(simulate_team_summary, params))
@@ -0,0 +1,245 @@
+import os
+
+import numpy as np
+
+from shot_engine import shot_types, zone_matrix
+from shot_optimizer import MIN_VOLUME, zone_values
+
+# Candidate mixes evaluated per team, half near the current mix and half uniform
+# (an odd count is rounded down to even)
+SENSITIVITY_SAMPLES = int(os.environ.get('NBA_SENSITIVITY_SAMPLES', '20000'))
+MAX_SENSITIVITY_SAMPLES = 200000
+
+# Dirichlet concentration of the local samples; higher keeps them closer to the current mix
+LOCAL_CONCENTRATION = 50.0
+
+# Upper bound on (rows x mixes x zones) values evaluated in one vectorized chunk
+SWEEP_CHUNK_VALUES = 4000000
+
+# Cost axis of each frontier: per-game field goal points variance, or share of attempts moved
+TRADEOFFS = ('variance', 'shift')
+
+
+def mix_fg_pct(attempts, fg_pct, base_attempts, optimizer=None, zones=None):
+    """
+    Returns zone FG% at the given volumes.
+
+    Without an optimizer FG% does not depend on volume, as in the
+    EV-proportional analysis. With one, FG% moves along the optimizer's
+    efficiency curve from each row's base attempts.
+
+    Parameters:
+    attempts (ndarray): Zone attempts, shaped (..., zones)
+    fg_pct (ndarray): Base zone FG% as fractions, broadcastable to attempts
+    base_attempts (ndarray): Base zone attempts, broadcastable to attempts
+    optimizer (ShotMixOptimizer): Optional optimizer whose curve and decay to use
+    zones (list): Zone names in column order
+
+    Returns:
+    ndarray: FG% as fractions, shaped like attempts
+    """
+    if optimizer is None:
+        return np.broadcast_to(fg_pct, attempts.shape)
+    k = zone_values(optimizer.decay, zones, 0.25)
+    return optimizer.curve.fg_pct(attempts, fg_pct, np.maximum(base_attempts, MIN_VOLUME), k)
+
+
+def marginal_values(fg_pct, attempts, points, optimizer=None, zones=None):
+    """
+    Analytic per-zone derivatives of field goal points per game.
+
+    points_per_attempt is dPPG/dFGA for one more attempt in the zone. With
+    an optimizer it is the slope of the efficiency curve at the current
+    volume, so it includes the FG% lost to the added volume.
+    points_per_fg_pct is dPPG/dFG% for one percentage point in the zone.
+    fixed_total is dPPG/dFGA when the attempt is taken from the other zones
+    in proportion to their volume, keeping total FGA unchanged.
+
+    Parameters:
+    fg_pct (ndarray): Zone FG% as fractions, shaped (rows, zones)
+    attempts (ndarray): Zone attempts per game, shaped (rows, zones)
+    points (ndarray): Point value of each zone, shaped (zones,)
+    optimizer (ShotMixOptimizer): Optional optimizer whose efficiency curve to use
+    zones (list): Zone names in column order
+
+    Returns:
+    dict: Derivative name to array shaped (rows, zones)
+    """
+    fg_pct = np.nan_to_num(fg_pct)
+    if optimizer is None:
+        per_attempt = fg_pct * points
+    else:
+        k = zone_values(optimizer.decay, zones, 0.25)
+        base = np.maximum(attempts, MIN_VOLUME)
+        per_attempt = optimizer.curve.marginal(base, np.broadcast_to(points, fg_pct.shape), fg_pct, base, k)
+
+    total = attempts.sum(axis=1, keepdims=True)
+    shares = np.divide(attempts, total, out=np.zeros_like(attempts), where=total > 0)
+    return {
+        'points_per_attempt': per_attempt,
+        'points_per_fg_pct': points * attempts / 100,
+        'fixed_total': per_attempt - (shares * per_attempt).sum(axis=1, keepdims=True)
+    }
+
+
+def sample_mixes(current_shares, uniform, row_seeds):
+    """
+    Draws candidate zone shares for every row.
+
+    Half of the mixes are Dirichlet draws centred on each row's current
+    shares, so the frontier is dense near where teams actually play. The
+    other half are uniform on the simplex and shared by all rows. Each row
+    has its own seed, so results don't depend on how rows are chunked.
+
+    Parameters:
+    current_shares (ndarray): Current zone shares, shaped (rows, zones)
+    uniform (ndarray): Shared uniform shares, shaped (uniform mixes, zones)
+    row_seeds (list): One SeedSequence per row for its local draws
+
+    Returns:
+    ndarray: Zone shares shaped (rows, mixes + 1, zones), the current mix first
+    """
+    rows, n_zones = current_shares.shape
+    local = len(uniform)
+    shares = np.empty((rows, 1 + local + len(uniform), n_zones))
+    shares[:, 0] = current_shares
+    shares[:, 1 + local:] = uniform
+    for row, row_seed in enumerate(row_seeds):
+        # Adding one keeps zones the team barely uses in play
+        alpha = LOCAL_CONCENTRATION * current_shares[row] + 1
+        shares[row, 1:1 + local] = np.random.default_rng(row_seed).dirichlet(alpha, local)
+    return shares
+
+
+def pareto_frontier(cost, value):
+    """
+    Finds the mixes no other mix beats on both cost and value, for every row.
+
+    Mixes are sorted by cost (ties by value, best first). A mix is on the
+    frontier when its value beats every cheaper mix, which a running
+    maximum along the sorted axis checks for all rows at once.
+
+    Parameters:
+    cost (ndarray): Cost to minimize, shaped (rows, mixes)
+    value (ndarray): Value to maximize, shaped (rows, mixes); -inf excludes a mix
+
+    Returns:
+    tuple: (order, on_frontier), mix positions sorted by cost and a mask over them
+    """
+    order = np.lexsort((-value, cost), axis=-1)
+    sorted_value = np.take_along_axis(value, order, axis=-1)
+    best_before = np.maximum.accumulate(sorted_value, axis=-1)
+    best_before = np.concatenate([np.full((len(value), 1), -np.inf), best_before[:, :-1]], axis=-1)
+    return order, sorted_value > best_before
+
+
+def sweep_rows(fg_pct, attempts, ft_points, points, uniform, row_seeds, optimizer=None, zones=None):
+    """
+    Evaluates sampled mixes for a chunk of rows and extracts both frontiers.
+
+    Total FGA is kept at each row's current total. Field goal points
+    variance treats every attempt as an independent make or miss. Mixes
+    outside the optimizer's share bounds never make a frontier.
+
+    Returns:
+    list: One {tradeoff: (costs, ppg, attempts)} dict of frontier arrays per row
+    """
+    total_fga = attempts.sum(axis=1)
+    current_shares = np.divide(
+        attempts, total_fga[:, None], out=np.zeros_like(attempts), where=total_fga[:, None] > 0
+    )
+    shares = sample_mixes(current_shares, uniform, row_seeds)
+    mix_attempts = shares * total_fga[:, None, None]
+
+    mix_fg = mix_fg_pct(mix_attempts, fg_pct[:, None, :], attempts[:, None, :], optimizer, zones)
+    ppg = (mix_attempts * mix_fg * points).sum(axis=-1) + ft_points[:, None]
+    costs = {
+        'variance': (mix_attempts * points ** 2 * mix_fg * (1 - mix_fg)).sum(axis=-1),
+        'shift': np.abs(shares - current_shares[:, None, :]).sum(axis=-1) / 2
+    }
+
+    if optimizer is not None:
+        lower, upper = optimizer.bounds(zones, total_fga)
+        feasible = np.all(
+            (mix_attempts >= lower[:, None, :] - 1e-9) & (mix_attempts <= upper[:, None, :] + 1e-9), axis=-1
+        )
+        ppg = np.where(feasible, ppg, -np.inf)
+
+    frontiers = [{} for _ in range(len(attempts))]
+    for tradeoff in TRADEOFFS:
+        order, on_frontier = pareto_frontier(costs[tradeoff], ppg)
+        for row, frontier in enumerate(frontiers):
+            mixes = order[row][on_frontier[row]]
+            frontier[tradeoff] = (costs[tradeoff][row, mixes], ppg[row, mixes], mix_attempts[row, mixes])
+    return frontiers
+
+
+def format_frontier_point(cost_name, cost, ppg, current_ppg, attempts, zones):
+    """
+    Formats one mix on a frontier.
+    """
+    return {
+        cost_name: float(cost),
+        "ppg": float(ppg),
+        "points_difference": float(ppg - current_ppg),
+        "attempts": {zone: float(attempts[i]) for i, zone in enumerate(zones)}
+    }
+
+
+def build_sensitivity(merged_df, shot_types=shot_types, samples=SENSITIVITY_SAMPLES, seed=0, optimizer=None):
+    """
+    Computes marginal values and mix frontiers for every team.
+
+    The sweep runs in chunks of rows sized by SWEEP_CHUNK_VALUES, each
+    chunk one vectorized pass over (rows x mixes x zones) arrays. Results
+    are deterministic for given data, samples and seed.
+
+    Parameters:
+    merged_df (DataFrame): Merged team data with {zone}_FGA, {zone}_FG% and FT_FGM
+    shot_types (dict): Zone name to point value mapping
+    samples (int): Candidate mixes per team
+    seed (int): Root seed
+    optimizer (ShotMixOptimizer): Optional optimizer whose efficiency curve and bounds to use
+
+    Returns:
+    dict: Team name to marginal values, current PPG and one frontier per tradeoff
+    """
+    zones = list(shot_types)
+    points = np.array([shot_types[zone] for zone in zones], dtype=np.float64)
+
+    fg_pct = np.nan_to_num(zone_matrix(merged_df, 'FG%', zones) / 100)
+    attempts = zone_matrix(merged_df, 'FGA', zones)
+    ft_points = merged_df['FT_FGM'].to_numpy(dtype=np.float64)
+    current_ppg = (attempts * fg_pct * points).sum(axis=1) + ft_points
+    marginals = marginal_values(fg_pct, attempts, points, optimizer, zones)
+
+    root, *row_seeds = np.random.SeedSequence(seed).spawn(len(merged_df) + 1)
+    uniform = np.random.default_rng(root).dirichlet(np.ones(len(zones)), samples // 2)
+
+    chunk = max(1, SWEEP_CHUNK_VALUES // ((2 * len(uniform) + 1) * len(zones)))
+    frontiers = []
+    for start in range(0, len(merged_df), chunk):
+        rows = slice(start, start + chunk)
+        frontiers.extend(sweep_rows(
+            fg_pct[rows], attempts[rows], ft_points[rows], points, uniform, row_seeds[rows], optimizer, zones
+        ))
+
+    results = {}
+    for row, team in enumerate(merged_df['Team']):
+        results[team] = {
+            "team": team,
+            "samples": 2 * len(uniform),
+            "current_ppg": float(current_ppg[row]),
+            "marginals": {
+                zone: {name: float(values[row, i]) for name, values in marginals.items()}
+                for i, zone in enumerate(zones)
+            },
+            "frontiers": {
+                tradeoff: [
+                    format_frontier_point(tradeoff, cost, ppg, current_ppg[row], mix, zones)
+                    for cost, ppg, mix in zip(*frontiers[row][tradeoff])
+                ]
+                for tradeoff in TRADEOFFS
+            }
+        }
+    return results
@@ -0,0 +1,146 @@
+import argparse
+import gc
+import importlib
+import os
+import time
+
+from flask import jsonify
+
+from metrics import REGISTRY, reset_metrics
+
+# App name to the module defining it; imported only when that app is served
+APP_MODULES = {
+    'api': 'api',
+    'tester': 'tester_api'
+}
+
+# Worker processes and threads per worker, gunicorn-style environment defaults
+WORKERS = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+THREADS = int(os.environ.get('NBA_THREADS', '4'))
+
+
+def warm_up(module, app):
+    """
+    Loads and analyzes the dataset, builds the ranking index and exercises
+    the main routes once.
+
+    Run in the parent before workers fork, so every worker starts with the
+    dataset, the snapshot and the imported code paths already in memory.
+
+    Returns:
+    str: Version of the loaded dataset
+    """
+    dataset = module.team_data_cache.get()
+    if hasattr(module, 'current_snapshot'):
+        module.current_snapshot()
+    if hasattr(module, 'team_rankings'):
+        module.team_rankings(dataset, wait=True)
+
+    client = app.test_client()
+    client.get('/api/team-data')
+    team_names = list(dataset.data['team_index'])
+    if team_names:
+        client.get(f'/api/team-data/{team_names[0]}')
+    return dataset.version
+
+
+def create_app(name='tester', warm=True):
+    """
+    Builds a production app: preloaded dataset, warm-up and health probes.
+
+    Usable as a gunicorn factory, which with --preload loads the data once
+    in the master before forking:
+
+        gunicorn --preload -w 4 --threads 4 'serve:create_app("tester")'
+
+    After warm-up the garbage collector's tracked objects are frozen
+    (gc.freeze), so collections in the workers don't write to the
+    preloaded dataset's pages and they stay shared copy-on-write. Set
+    NBA_METRICS_DIR so /metrics reports every worker, not just the one
+    that answers the scrape.
+
+    Parameters:
+    name (str): Key of APP_MODULES
+    warm (bool): Load the dataset and warm up before returning
+
+    Returns:
+    Flask: The configured application
+    """
+    module = importlib.import_module(APP_MODULES[name])
+    app = module.app
+    state = app.config.setdefault('SERVE_STATE', {'ready': False, 'version': None, 'warmed_at': None})
+
+    if 'readiness_probe' not in app.view_functions:
+        @app.route('/healthz', methods=['GET'])
+        def liveness_probe():
+            return jsonify({"status": "ok"})
+
+        @app.route('/ready', methods=['GET'])
+        def readiness_probe():
+            # Ready once warmed up and the sources still load
+            if not state['ready']:
+                return jsonify({"status": "warming up"}), 503
+            try:
+                state['version'] = module.team_data_cache.get().version
+            except Exception as e:
+                print("ERROR:", str(e), flush=True)
+                return jsonify({"status": "unavailable", "error": str(e)}), 503
+            return jsonify({"status": "ready", "version": state['version'], "warmed_at": state['warmed_at']})
+
+    if warm and not state['ready']:
+        start = time.perf_counter()
+        state['version'] = warm_up(module, app)
+        state['warmed_at'] = time.time()
+        state['ready'] = True
+        print(f"Warmed up {name} (dataset {state['version']}) in {time.perf_counter() - start:.2f}s", flush=True)
+
+        # Workers count only their own requests, not the warm-up they inherit
+        reset_metrics(REGISTRY)
+
+        gc.collect()
+        gc.freeze()
+
+    return app
+
+
+def run(name='tester', host='127.0.0.1', port=5000, workers=WORKERS, threads=THREADS):
+    """
+    Serves an app with gunicorn when installed, else a threaded dev server.
+
+    The app is created (and warmed up) before gunicorn forks its workers.
+    Without gunicorn a single threaded process is used, so a slow request
+    still doesn't block other clients.
+    """
+    app = create_app(name)
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        print("gunicorn is not installed, serving from one threaded process", flush=True)
+        app.run(host=host, port=port, threaded=True, debug=False, use_reloader=False)
+        return
+
+    class PreloadedApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f'{host}:{port}')
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            self.cfg.set('preload_app', True)
+
+        def load(self):
+            return app
+
+    PreloadedApplication().run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the NBA shot analysis API")
+    parser.add_argument('app', nargs='?', default='tester', choices=list(APP_MODULES))
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=WORKERS)
+    parser.add_argument('--threads', type=int, default=THREADS)
+    args = parser.parse_args()
+
+    run(args.app, args.host, args.port, args.workers, args.threads)
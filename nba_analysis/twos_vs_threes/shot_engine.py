@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+
+# Define shot types and their point values
+shot_types = {
+    'RA': 2,    # Restricted Area (2 points)
+    'NRA': 2,   # Non-Restricted Area / In The Paint (Non-RA) (2 points)
+    'MR': 2,    # Mid-Range (2 points)
+    'LC3': 3,   # Left Corner 3 (3 points)
+    'RC3': 3,   # Right Corner 3 (3 points)
+    'AB3': 3    # Above Break 3 (3 points)
+}
+
+# Identifier columns carried through to the analysis output when present
+KEY_COLUMNS = ['Team', 'Season', 'Season_Type']
+
+# Per-zone output metrics, in the order the analysis columns are emitted
+ZONE_METRICS = [
+    'Current_FG%',
+    'EV',
+    'Current_Attempts',
+    'Current_Makes',
+    'Optimal_Attempts',
+    'Optimal_Makes',
+    'Attempt_Diff',
+    'Makes_Diff'
+]
+
+# Pythagorean exponent used for NBA win projections
+PYTH_EXP = 16.5
+
+
+def zone_matrix(df, suffix, zones):
+    """
+    Stacks one per-zone column family into a (rows x zones) array.
+
+    Parameters:
+    df (DataFrame): Data with {zone}_{suffix} columns
+    suffix (str): Column suffix, e.g. 'FGA' or 'FG%'
+    zones (list): Zone names in output order
+
+    Returns:
+    ndarray: float64 array shaped (rows, zones)
+    """
+    return df[[f'{zone}_{suffix}' for zone in zones]].to_numpy(dtype=np.float64)
+
+
+def row_sum(matrix):
+    """
+    Sums a (rows x zones) array zone by zone, left to right.
+
+    Accumulating in zone order keeps the results bit-for-bit identical to
+    the original per-team Python loops.
+    """
+    total = np.zeros(matrix.shape[0])
+    for column in range(matrix.shape[1]):
+        total = total + matrix[:, column]
+    return total
+
+
+def compute_zone_arrays(fg_pct, attempts, points, optimizer=None, zones=None):
+    """
+    Computes current and optimal shot mixes for every row.
+
+    Without an optimizer, attempts are reallocated in proportion to each
+    zone's EV. An optimizer (see shot_optimizer.ShotMixOptimizer) instead
+    returns the optimal attempts and the FG% expected at those volumes.
+
+    Parameters:
+    fg_pct (ndarray): Zone FG% as fractions, shaped (rows, zones)
+    attempts (ndarray): Zone attempts per game, shaped (rows, zones)
+    points (ndarray): Point value of each zone, shaped (zones,)
+    optimizer (callable): Optional (fg_pct, attempts, points, zones) solver
+    zones (list): Zone names in column order, passed to the optimizer
+
+    Returns:
+    dict: Arrays for every zone metric plus per-row field goal points
+    """
+    ev = fg_pct * points
+    total_ev = row_sum(ev)
+    total_fga = row_sum(attempts)
+
+    current_makes = attempts * fg_pct
+    if optimizer is None:
+        optimal_attempts = total_fga[:, None] * (ev / total_ev[:, None])
+        optimal_makes = optimal_attempts * fg_pct
+    else:
+        optimal_attempts, optimal_fg_pct = optimizer(fg_pct, attempts, points, zones)
+        optimal_makes = optimal_attempts * optimal_fg_pct
+
+    return {
+        'Current_FG%': fg_pct,
+        'EV': ev,
+        'Current_Attempts': attempts,
+        'Current_Makes': current_makes,
+        'Optimal_Attempts': optimal_attempts,
+        'Optimal_Makes': optimal_makes,
+        'Attempt_Diff': optimal_attempts - attempts,
+        'Makes_Diff': optimal_makes - current_makes,
+        'current_fg_points': row_sum(current_makes * points),
+        'optimal_fg_points': row_sum(optimal_makes * points)
+    }
+
+
+def compute_shot_optimization(df, ft_points, ft_attempts, ft_percentage, shot_types=shot_types, optimizer=None):
+    """
+    Runs the shot optimization analysis for all rows of df in one pass.
+
+    Produces the same columns as the per-team analysis loops, so the input
+    can be a single season of 30 teams or thousands of team-season or
+    player-season rows.
+
+    Parameters:
+    df (DataFrame): Merged data with {zone}_FGA and {zone}_FG% columns
+    ft_points (str): Column holding free throw points per game
+    ft_attempts (str): Column holding free throw attempts per game
+    ft_percentage (str): Column holding free throw percentage
+    shot_types (dict): Zone name to point value mapping
+    optimizer (callable): Optional constrained solver for the optimal mix
+
+    Returns:
+    DataFrame: One row per input row with key, ppg, free throw and zone columns
+    """
+    zones = list(shot_types)
+    points = np.array([shot_types[zone] for zone in zones], dtype=np.float64)
+
+    arrays = compute_zone_arrays(
+        zone_matrix(df, 'FG%', zones) / 100,
+        zone_matrix(df, 'FGA', zones),
+        points,
+        optimizer,
+        zones
+    )
+
+    current_ft_points = df[ft_points].to_numpy()
+
+    columns = {key: df[key].to_numpy() for key in KEY_COLUMNS if key in df.columns}
+    columns.update({
+        'current_ppg': arrays['current_fg_points'] + current_ft_points,
+        'optimal_ppg': arrays['optimal_fg_points'] + current_ft_points,
+        'ft_points': current_ft_points,
+        'ft_attempts': df[ft_attempts].to_numpy(),
+        'ft_percentage': df[ft_percentage].to_numpy()
+    })
+
+    for i, shot_type in enumerate(zones):
+        for metric in ZONE_METRICS:
+            columns[f'{shot_type}_{metric}'] = arrays[metric][:, i]
+
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(df)))
+
+
+def project_win_impact(current_pts, optimal_pts, current_wins, games_played, plus_minus):
+    """
+    Vectorized form of the Pythagorean win projection for arrays of teams.
+
+    Parameters:
+    current_pts (ndarray): Current points per game
+    optimal_pts (ndarray): Projected optimal points per game
+    current_wins (ndarray): Current number of wins
+    games_played (ndarray): Number of games played
+    plus_minus (ndarray): Current point differential per game
+
+    Returns:
+    dict: Arrays keyed like calculate_win_impact's result
+    """
+    current_pts = np.asarray(current_pts, dtype=np.float64)
+    optimal_pts = np.asarray(optimal_pts, dtype=np.float64)
+    current_wins = np.asarray(current_wins)
+    games_played = np.asarray(games_played)
+    plus_minus = np.asarray(plus_minus, dtype=np.float64)
+
+    pts_difference = optimal_pts - current_pts
+    new_plus_minus = plus_minus + pts_difference
+
+    current_win_pct = current_wins / games_played
+
+    # Both branches are evaluated, so silence overflow from the unused one
+    with np.errstate(over='ignore', divide='ignore'):
+        new_win_pct = np.where(
+            new_plus_minus >= 0,
+            1 / (1 + (1 / (np.abs(new_plus_minus) + 10)) ** PYTH_EXP),
+            1 / (1 + (np.abs(new_plus_minus) + 10) ** PYTH_EXP)
+        )
+
+    projected_wins = np.round(new_win_pct * games_played, 1)
+
+    return {
+        'current_wins': current_wins,
+        'current_win_pct': current_win_pct * 100,
+        'projected_wins': projected_wins,
+        'projected_win_pct': new_win_pct * 100,
+        'win_difference': projected_wins - current_wins,
+        'current_plus_minus': plus_minus,
+        'projected_plus_minus': new_plus_minus
+    }
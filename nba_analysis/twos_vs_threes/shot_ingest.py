@@ -0,0 +1,359 @@
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from fetch_pipeline import RateLimiter
+from history_store import require_pyarrow
+from shot_engine import shot_types
+
+# Shot log columns read from ShotChartDetail exports, with compact dtypes
+SHOT_COLUMNS = {
+    'GAME_ID': 'int64',
+    'PLAYER_ID': 'int64',
+    'PLAYER_NAME': 'string',
+    'TEAM_ID': 'int64',
+    'TEAM_NAME': 'string',
+    'PERIOD': 'int8',
+    'LOC_X': 'float32',
+    'LOC_Y': 'float32',
+    'SHOT_MADE_FLAG': 'int8',
+    'HTM': 'string',
+    'VTM': 'string'
+}
+
+# Group columns renamed to the names the analysis code uses
+GROUP_LABELS = {
+    'TEAM_NAME': 'Team',
+    'PLAYER_NAME': 'Player'
+}
+
+# Court geometry in LOC_X/LOC_Y units (tenths of a foot, hoop at the origin)
+RESTRICTED_RADIUS = 40.0    # 4 ft restricted area arc
+PAINT_HALF_WIDTH = 80.0     # 16 ft wide lane
+PAINT_TOP = 142.5           # Free throw line, 19 ft from the baseline
+CORNER_THREE_X = 220.0      # 22 ft corner three
+CORNER_THREE_TOP = 92.5     # Corner lines run 14 ft up from the baseline
+THREE_RADIUS = 237.5        # 23.75 ft arc
+HALF_COURT = 422.5          # Shots beyond this are backcourt heaves
+
+# stats.nba.com reports Left Corner 3 at positive LOC_X
+LEFT_CORNER_SIGN = 1
+
+# Zone code for backcourt shots, which the zone schema leaves out
+BACKCOURT = -1
+
+# ShotChartDetail's own zone labels, used to check the classifier
+API_ZONE_BASIC = {
+    'Restricted Area': 'RA',
+    'In The Paint (Non-RA)': 'NRA',
+    'Mid-Range': 'MR',
+    'Left Corner 3': 'LC3',
+    'Right Corner 3': 'RC3',
+    'Above the Break 3': 'AB3'
+}
+
+
+def classify_zones(loc_x, loc_y, zones=None):
+    """
+    Assigns each shot to a zone from its court coordinates.
+
+    Parameters:
+    loc_x (array): LOC_X values
+    loc_y (array): LOC_Y values
+    zones (list): Zone names giving the code order, defaults to shot_types
+
+    Returns:
+    ndarray: int8 zone codes indexing zones, BACKCOURT for heaves
+    """
+    zones = zones or list(shot_types)
+    x = np.asarray(loc_x, dtype=np.float32)
+    y = np.asarray(loc_y, dtype=np.float32)
+    distance = np.hypot(x, y)
+
+    corner = (np.abs(x) >= CORNER_THREE_X) & (y <= CORNER_THREE_TOP)
+    left = x * LEFT_CORNER_SIGN > 0
+
+    # The first matching condition wins, so the order mirrors the court
+    conditions = [
+        y > HALF_COURT,
+        corner & left,
+        corner & ~left,
+        distance >= THREE_RADIUS,
+        distance <= RESTRICTED_RADIUS,
+        (np.abs(x) < PAINT_HALF_WIDTH) & (y < PAINT_TOP)
+    ]
+    choices = [BACKCOURT] + [zones.index(zone) for zone in ('LC3', 'RC3', 'AB3', 'RA', 'NRA')]
+    return np.select(conditions, choices, default=zones.index('MR')).astype(np.int8)
+
+
+def iter_shot_chunks(path, chunksize=250000, columns=None):
+    """
+    Yields a shot log in bounded-memory chunks.
+
+    Parquet files are read batch by batch through pyarrow, anything else is
+    read as CSV with pandas' chunked reader. Only the needed columns are
+    loaded, using compact dtypes.
+
+    Parameters:
+    path (str): Shot log file (.parquet or .csv)
+    chunksize (int): Rows per chunk
+    columns (list): Columns to read, defaults to SHOT_COLUMNS
+
+    Yields:
+    DataFrame: Up to chunksize shot rows
+    """
+    columns = list(columns or SHOT_COLUMNS)
+
+    if path.endswith('.parquet'):
+        require_pyarrow()
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        available = [column for column in columns if column in parquet_file.schema_arrow.names]
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=available):
+            yield batch.to_pandas()
+        return
+
+    dtypes = {column: SHOT_COLUMNS[column] for column in columns if column in SHOT_COLUMNS}
+    yield from pd.read_csv(
+        path,
+        chunksize=chunksize,
+        usecols=lambda column: column in columns,
+        dtype=dtypes
+    )
+
+
+def apply_filters(chunk, filters):
+    """
+    Keeps the rows of a chunk that pass the filters.
+
+    Parameters:
+    chunk (DataFrame): Shot rows
+    filters (dict or callable): Column to allowed values, or chunk -> mask
+
+    Returns:
+    DataFrame: Filtered rows
+    """
+    if not filters:
+        return chunk
+    if callable(filters):
+        return chunk[filters(chunk)]
+
+    mask = np.ones(len(chunk), dtype=bool)
+    for column, values in filters.items():
+        values = values if isinstance(values, (list, tuple, set)) else [values]
+        mask &= chunk[column].isin(values).to_numpy()
+    return chunk[mask]
+
+
+class ShotAggregator:
+    """
+    Incrementally builds zone FGM/FGA tables from chunks of shot records.
+
+    Each chunk is classified and reduced to made/attempt counts per group
+    and zone, which are added to running totals. The games each group
+    appeared in are tracked so the table can be reported per game. Memory
+    grows with groups x zones and groups x games, never with shots.
+
+    Parameters:
+    group_by (list): Shot log columns to group on, e.g. ['TEAM_NAME']
+    zones (list): Zone names, defaults to shot_types
+    """
+
+    def __init__(self, group_by=('TEAM_NAME',), zones=None):
+        self.group_by = list(group_by)
+        self.zones = zones or list(shot_types)
+        self.counts = None
+        self.games = None
+        self.shots = 0
+        self.backcourt = 0
+
+    def update(self, chunk):
+        """
+        Adds one chunk of shot records to the running totals.
+        """
+        codes = classify_zones(chunk['LOC_X'].to_numpy(), chunk['LOC_Y'].to_numpy(), self.zones)
+        in_zone = codes != BACKCOURT
+        self.shots += len(chunk)
+        self.backcourt += int((~in_zone).sum())
+
+        shots = chunk.loc[in_zone, self.group_by + ['GAME_ID']].copy()
+        shots['Zone'] = codes[in_zone]
+        shots['FGM'] = chunk['SHOT_MADE_FLAG'].to_numpy()[in_zone].astype(np.int64)
+        shots['FGA'] = 1
+
+        counts = shots.groupby(self.group_by + ['Zone'], observed=True)[['FGM', 'FGA']].sum()
+        self.counts = counts if self.counts is None else self.counts.add(counts, fill_value=0)
+
+        games = shots[self.group_by + ['GAME_ID']].drop_duplicates()
+        self.games = games if self.games is None else pd.concat([self.games, games]).drop_duplicates()
+
+    def table(self, per_game=True):
+        """
+        Returns the aggregated zone table in the existing analysis schema.
+
+        Parameters:
+        per_game (bool): Divide makes and attempts by games played
+
+        Returns:
+        DataFrame: One row per group with {zone}_FGM/FGA/FG% and GP columns
+        """
+        labels = [GROUP_LABELS.get(column, column) for column in self.group_by]
+        if self.counts is None:
+            return pd.DataFrame(columns=labels + ['GP'])
+
+        wide = self.counts.unstack('Zone', fill_value=0)
+        games_played = self.games.groupby(self.group_by, observed=True).size().reindex(wide.index)
+
+        table = pd.DataFrame(index=wide.index)
+        for code, zone in enumerate(self.zones):
+            makes = wide['FGM'][code] if code in wide['FGM'].columns else 0
+            attempts = wide['FGA'][code] if code in wide['FGA'].columns else 0
+            total_makes = pd.Series(makes, index=wide.index, dtype=np.float64)
+            total_attempts = pd.Series(attempts, index=wide.index, dtype=np.float64)
+
+            divisor = games_played if per_game else 1
+            table[f'{zone}_FGM'] = total_makes / divisor
+            table[f'{zone}_FGA'] = total_attempts / divisor
+            table[f'{zone}_FG%'] = (total_makes / total_attempts.where(total_attempts > 0) * 100).fillna(0.0)
+
+        table['GP'] = games_played
+        table = table.reset_index()
+        table.columns = labels + list(table.columns[len(labels):])
+        return table
+
+
+def ingest_shot_log(paths, group_by=('TEAM_NAME',), filters=None, chunksize=250000, per_game=True, zones=None):
+    """
+    Streams shot logs into an aggregated zone table.
+
+    Parameters:
+    paths (str or list): Shot log files (.parquet or .csv)
+    group_by (list): Columns to aggregate by, e.g. ['PLAYER_ID', 'PLAYER_NAME']
+    filters (dict or callable): Row filter, e.g. {'PERIOD': [4]}
+    chunksize (int): Rows held in memory at a time
+    per_game (bool): Report per-game averages rather than totals
+    zones (list): Zone names, defaults to shot_types
+
+    Returns:
+    DataFrame: Zone table matching transform_shot_location_data's output
+    """
+    paths = [paths] if isinstance(paths, str) else paths
+    aggregator = ShotAggregator(group_by, zones)
+
+    columns = list(SHOT_COLUMNS)
+    if callable(filters) or filters is None:
+        extra = []
+    else:
+        extra = [column for column in filters if column not in columns]
+
+    for path in paths:
+        for chunk in iter_shot_chunks(path, chunksize, columns + extra):
+            aggregator.update(apply_filters(chunk, filters))
+
+    print(f"Ingested {aggregator.shots} shots ({aggregator.backcourt} backcourt shots skipped)")
+    return aggregator.table(per_game)
+
+
+def zone_agreement(path, chunksize=250000):
+    """
+    Returns the share of shots whose geometric zone matches SHOT_ZONE_BASIC.
+    """
+    zones = list(shot_types)
+    matched = total = 0
+    for chunk in iter_shot_chunks(path, chunksize, ['LOC_X', 'LOC_Y', 'SHOT_ZONE_BASIC']):
+        expected = chunk['SHOT_ZONE_BASIC'].map(API_ZONE_BASIC)
+        known = expected.notna().to_numpy()
+        codes = classify_zones(chunk['LOC_X'].to_numpy()[known], chunk['LOC_Y'].to_numpy()[known], zones)
+        matched += int((codes == expected[known].map(zones.index).to_numpy()).sum())
+        total += int(known.sum())
+    return matched / total if total else float('nan')
+
+
+def fetch_shot_log(season, path, season_type='Regular Season', team_ids=None, rate=1.0):
+    """
+    Downloads a season's shot records team by team into one Parquet file.
+
+    Each team's shots are appended as they arrive, so only one team's log
+    is held in memory at a time. The file is written to a temporary path
+    and moved into place only once every team has been fetched; when no
+    team is fetched nothing is written.
+
+    Parameters:
+    season (str): Season such as '2024-25'
+    path (str): Output Parquet file
+    season_type (str): e.g. 'Regular Season', 'Playoffs'
+    team_ids (list): Teams to fetch, defaults to every NBA team
+    rate (float): Maximum requests per second
+
+    Returns:
+    int: Number of shot records written
+    """
+    require_pyarrow()
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from nba_api.stats.endpoints import shotchartdetail
+    from nba_api.stats.static import teams
+
+    if team_ids is None:
+        team_ids = [team['id'] for team in teams.get_teams()]
+    rate_limiter = RateLimiter(rate)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    writer = None
+    written = 0
+    try:
+        for team_id in team_ids:
+            rate_limiter.wait()
+            shots = shotchartdetail.ShotChartDetail(
+                team_id=team_id,
+                player_id=0,
+                season_nullable=season,
+                season_type_all_star=season_type,
+                context_measure_simple='FGA',
+                timeout=60
+            ).get_data_frames()[0]
+
+            table = pa.Table.from_pandas(shots, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(tmp_path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            written += len(shots)
+            print(f"Fetched {len(shots)} shots for team {team_id}")
+
+        if writer is not None:
+            writer.close()
+            writer = None
+            os.replace(tmp_path, path)
+    finally:
+        # A failed fetch leaves no partial file behind
+        if writer is not None:
+            writer.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Aggregate shot-level logs into zone tables")
+    parser.add_argument('paths', nargs='+', help="Shot log files (.parquet or .csv)")
+    parser.add_argument('--group-by', nargs='+', default=['TEAM_NAME'])
+    parser.add_argument('--period', type=int, nargs='+', help="Only count these periods")
+    parser.add_argument('--chunksize', type=int, default=250000)
+    parser.add_argument('--totals', action='store_true', help="Report totals instead of per-game averages")
+    parser.add_argument('--output', default='shot_log_zones.csv')
+    args = parser.parse_args()
+
+    table = ingest_shot_log(
+        args.paths,
+        group_by=args.group_by,
+        filters={'PERIOD': args.period} if args.period else None,
+        chunksize=args.chunksize,
+        per_game=not args.totals
+    )
+    table.to_csv(args.output, index=False)
+    print(f"Wrote {len(table)} rows to {args.output}")
@@ -0,0 +1,175 @@
+import os
+
+import numpy as np
+
+# Smallest attempt volume used when evaluating curves, avoids dividing by zero
+MIN_VOLUME = 1e-6
+
+
+class LinearDecay:
+    """
+    FG% falls linearly with added volume: fg(x) = p * (1 - k * (x - a) / a).
+
+    With base attempts a and base FG% p, every extra a attempts costs a
+    fraction k of the base FG%, and shooting less than a raises it by the
+    same rate. Expected points are quadratic in x, so the marginal value
+    is linear and has a closed-form inverse.
+    """
+
+    def fg_pct(self, x, p, a, k):
+        return np.clip(p * (1 - k * (x - a) / a), 0.0, 1.0)
+
+    def marginal(self, x, v, p, a, k):
+        # d/dx of v * x * fg(x)
+        return v * p * ((1 + k) - 2 * k * x / a)
+
+    def inverse_marginal(self, lam, v, p, a, k):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return a * ((1 + k) - lam / (v * p)) / (2 * k)
+
+
+class PowerDecay:
+    """
+    FG% follows a power law in volume: fg(x) = p * (x / a) ** -k, 0 < k < 1.
+
+    Expected points grow like x ** (1 - k), so every zone keeps a positive
+    but shrinking marginal value as volume is added.
+    """
+
+    def fg_pct(self, x, p, a, k):
+        return np.clip(p * (np.maximum(x, MIN_VOLUME) / a) ** -k, 0.0, 1.0)
+
+    def marginal(self, x, v, p, a, k):
+        return v * p * (1 - k) * (np.maximum(x, MIN_VOLUME) / a) ** -k
+
+    def inverse_marginal(self, lam, v, p, a, k):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return a * (v * p * (1 - k) / lam) ** (1 / k)
+
+
+EFFICIENCY_CURVES = {
+    'linear': LinearDecay(),
+    'power': PowerDecay()
+}
+
+
+def zone_values(setting, zones, default):
+    """
+    Expands a scalar or {zone: value} setting to an array in zone order.
+    """
+    if isinstance(setting, dict):
+        return np.array([setting.get(zone, default) for zone in zones], dtype=np.float64)
+    return np.full(len(zones), default if setting is None else setting, dtype=np.float64)
+
+
+class ShotMixOptimizer:
+    """
+    Maximizes expected field goal points per game for every row at once.
+
+    For each row the total FGA is kept fixed and each zone's attempts stay
+    within [min_share, max_share] of that total. Zone FG% decays with added
+    volume along the chosen efficiency curve. The objective is concave, so
+    the optimum equalizes marginal points per attempt across the zones that
+    are not at a bound. The shared marginal value is found by bisection,
+    vectorized over all rows, so 30 teams or thousands of team-seasons
+    take one batched solve with no per-row solver calls.
+
+    Parameters:
+    curve (str): 'linear' or 'power', see EFFICIENCY_CURVES
+    decay (float or dict): Decay rate k, overall or per zone (must be > 0)
+    min_share (float or dict): Minimum fraction of total FGA per zone
+    max_share (float or dict): Maximum fraction of total FGA per zone
+    iterations (int): Bisection steps
+    """
+
+    def __init__(self, curve='linear', decay=0.25, min_share=0.0, max_share=1.0, iterations=100):
+        if curve not in EFFICIENCY_CURVES:
+            raise ValueError(f"Unknown efficiency curve '{curve}'")
+        self.curve = EFFICIENCY_CURVES[curve]
+        self.curve_name = curve
+        self.decay = decay
+        self.min_share = min_share
+        self.max_share = max_share
+        self.iterations = iterations
+
+    def settings(self):
+        """
+        Returns the constructor arguments as a JSON-serializable dict.
+        """
+        return {
+            'curve': self.curve_name,
+            'decay': self.decay,
+            'min_share': self.min_share,
+            'max_share': self.max_share,
+            'iterations': self.iterations
+        }
+
+    def bounds(self, zones, total_fga):
+        """
+        Returns per-row (rows, zones) attempt bounds for the given totals.
+        """
+        min_share = zone_values(self.min_share, zones, 0.0)
+        max_share = zone_values(self.max_share, zones, 1.0)
+        if min_share.sum() > 1 or max_share.sum() < 1 or np.any(min_share > max_share):
+            raise ValueError("Zone share bounds cannot add up to the total FGA")
+        return total_fga[:, None] * min_share, total_fga[:, None] * max_share
+
+    def allocate(self, lam, v, p, a, k, lower, upper):
+        """
+        Returns each zone's attempts for marginal value lam, clipped to bounds.
+        """
+        x = self.curve.inverse_marginal(lam[:, None], v, p, a, k)
+        x = np.where(np.isnan(x), lower, x)
+        return np.clip(x, lower, upper)
+
+    def __call__(self, fg_pct, attempts, points, zones):
+        """
+        Solves the constrained shot mix for every row.
+
+        Parameters:
+        fg_pct (ndarray): Base zone FG% as fractions, shaped (rows, zones)
+        attempts (ndarray): Base zone attempts, shaped (rows, zones)
+        points (ndarray): Point value of each zone, shaped (zones,)
+        zones (list): Zone names in column order
+
+        Returns:
+        tuple: (optimal attempts, FG% at those volumes), both (rows, zones)
+        """
+        k = zone_values(self.decay, zones, 0.25)
+        if np.any(k <= 0) or (self.curve_name == 'power' and np.any(k >= 1)):
+            raise ValueError("Decay rates must be positive (and below 1 for the power curve)")
+
+        fg_pct = np.nan_to_num(fg_pct)
+        v = np.broadcast_to(points, fg_pct.shape)
+        a = np.maximum(attempts, MIN_VOLUME)
+        total_fga = attempts.sum(axis=1)
+        lower, upper = self.bounds(zones, total_fga)
+
+        # Marginal value is decreasing in volume, so these bracket the solution
+        lam_low = np.min(self.curve.marginal(upper, v, fg_pct, a, k), axis=1)
+        lam_high = np.max(self.curve.marginal(np.maximum(lower, MIN_VOLUME), v, fg_pct, a, k), axis=1)
+
+        for _ in range(self.iterations):
+            lam = (lam_low + lam_high) / 2
+            allocated = self.allocate(lam, v, fg_pct, a, k, lower, upper).sum(axis=1)
+            # Too many attempts handed out means the marginal value is set too low
+            too_many = allocated > total_fga
+            lam_low = np.where(too_many, lam, lam_low)
+            lam_high = np.where(too_many, lam_high, lam)
+
+        optimal_attempts = self.allocate((lam_low + lam_high) / 2, v, fg_pct, a, k, lower, upper)
+        return optimal_attempts, self.curve.fg_pct(optimal_attempts, fg_pct, a, k)
+
+
+def optimizer_from_env(variable='NBA_SHOT_OPTIMIZER'):
+    """
+    Builds the optimizer selected by an environment variable.
+
+    The variable names an efficiency curve ('linear' or 'power'). When it
+    is unset the analysis keeps the EV-proportional mix.
+
+    Returns:
+    ShotMixOptimizer: The configured optimizer, or None
+    """
+    curve = os.environ.get(variable)
+    return ShotMixOptimizer(curve=curve) if curve else None
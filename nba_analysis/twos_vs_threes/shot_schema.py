@@ -0,0 +1,147 @@
+import pandas as pd
+
+# NBA API zone names for each internal zone
+API_ZONE_NAMES = {
+    'RA': 'Restricted Area',
+    'NRA': 'In The Paint (Non-RA)',
+    'MR': 'Mid-Range',
+    'LC3': 'Left Corner 3',
+    'RC3': 'Right Corner 3',
+    'AB3': 'Above the Break 3'
+}
+
+# Aggregate zones the API also reports, kept under short internal names
+EXTRA_ZONE_NAMES = {
+    'BC': 'Backcourt',
+    'C3': 'Corner 3'
+}
+
+# API stat name to internal column suffix; opponent (defensive) data uses the OPP_ names
+STAT_SUFFIXES = {
+    'FGM': 'FGM',
+    'FGA': 'FGA',
+    'FG_PCT': 'FG%',
+    'OPP_FGM': 'FGM',
+    'OPP_FGA': 'FGA',
+    'OPP_FG_PCT': 'FG%'
+}
+
+# Identifier columns kept alongside the zone columns
+ID_COLUMNS = {
+    'TEAM_ID': 'TEAM_ID',
+    'TEAM_NAME': 'Team',
+    'Team': 'Team',
+    'PLAYER_ID': 'PLAYER_ID',
+    'PLAYER_NAME': 'Player',
+    'TEAM_ABBREVIATION': 'TEAM_ABBREVIATION',
+    'AGE': 'AGE',
+    'Season': 'Season',
+    'Season_Type': 'Season_Type'
+}
+
+# Basketball-Reference style team stats (the legacy nba_team_stats.csv) to API names
+LEGACY_TEAM_STATS = {
+    'Team': 'TEAM_NAME',
+    'G': 'GP',
+    'FT': 'FTM',
+    'FTA': 'FTA',
+    'FT%': 'FT_PCT',
+    'PTS': 'PTS'
+}
+
+
+def zone_column_names(zones=None):
+    """
+    Maps 'Restricted Area FGM' style API columns to internal 'RA_FGM' names.
+
+    Parameters:
+    zones (list): Internal zones to include, defaults to every known zone
+
+    Returns:
+    dict: API column name to internal column name
+    """
+    zone_names = dict(API_ZONE_NAMES, **EXTRA_ZONE_NAMES)
+    zones = zones or list(zone_names)
+    return {
+        f'{zone_names[zone]} {stat}': f'{zone}_{suffix}'
+        for zone in zones
+        for stat, suffix in STAT_SUFFIXES.items()
+    }
+
+
+def flatten_columns(df):
+    """
+    Flattens two-level NBA API columns to 'Restricted Area FGM' style names.
+
+    Unnamed header cells (e.g. above TEAM_ID) are dropped, so the team
+    columns keep their plain names.
+    """
+    if not isinstance(df.columns, pd.MultiIndex):
+        return df
+
+    flat = df.copy()
+    flat.columns = [
+        ' '.join(str(part) for part in column if str(part) and not str(part).startswith('Unnamed:'))
+        for column in df.columns
+    ]
+    return flat
+
+
+def normalize_shot_locations(df, zones=None):
+    """
+    Maps any known shot location layout to the internal zone schema.
+
+    Accepts the raw two-row-header API frame (MultiIndex columns), its
+    flattened form ('Restricted Area FGM', as stored in the historical
+    store) and the legacy internal CSV ('RA_FGM', FG% already in percent).
+    The conversion is column selection and renaming only; API FG_PCT
+    fractions are scaled to percentages in one vectorized step.
+
+    Parameters:
+    df (DataFrame): Shot location data in any of the layouts above
+    zones (list): Internal zones to keep, defaults to every zone present
+
+    Returns:
+    DataFrame: Identifier columns plus {zone}_FGM/FGA/FG% columns
+    """
+    df = flatten_columns(df)
+
+    zone_columns = zone_column_names(zones)
+    api_layout = any(column in df.columns for column in zone_columns)
+    if not api_layout:
+        # Legacy layout already uses the internal names
+        zone_columns = {internal: internal for internal in zone_columns.values()}
+
+    ids = {column: name for column, name in ID_COLUMNS.items() if column in df.columns}
+    zone_columns = {column: name for column, name in zone_columns.items() if column in df.columns}
+
+    normalized = df[list(ids) + list(zone_columns)].rename(columns={**ids, **zone_columns})
+    if api_layout:
+        pct_columns = [name for name in zone_columns.values() if name.endswith('_FG%')]
+        normalized[pct_columns] = normalized[pct_columns] * 100
+
+    return normalized.reset_index(drop=True)
+
+
+def read_shot_locations(path, zones=None):
+    """
+    Reads a shot location CSV in any known layout into the internal schema.
+
+    Files whose first row holds zone names over a second row of stat names
+    are read with a two-level header.
+    """
+    header = pd.read_csv(path, header=None, nrows=2)
+    two_row = header.shape[0] == 2 and header.iloc[1].isin([*ID_COLUMNS, *STAT_SUFFIXES]).all()
+    return normalize_shot_locations(pd.read_csv(path, header=[0, 1] if two_row else 0), zones)
+
+
+def normalize_team_stats(df):
+    """
+    Maps team stats to NBA API column names.
+
+    API frames pass through unchanged. The legacy Basketball-Reference
+    layout is renamed (Team -> TEAM_NAME, G -> GP, FT -> FTM, FT% -> FT_PCT).
+    """
+    if 'TEAM_NAME' in df.columns:
+        return df
+    return df.rename(columns=LEGACY_TEAM_STATS)
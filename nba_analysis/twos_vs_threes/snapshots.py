@@ -0,0 +1,244 @@
+import gzip
+import hashlib
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import time
+
+from data_cache import file_hash
+from team_payload import build_team_index, format_team_payload
+
+SNAPSHOT_DIR = 'snapshots'
+LATEST_FILE = 'LATEST'
+MANIFEST_FILE = 'manifest.json'
+
+# File suffix for each stored encoding
+ENCODING_SUFFIXES = {'identity': '', 'gzip': '.gz', 'br': '.br'}
+
+# Encodings written by this build; brotli is optional and imported only when writing
+ENCODINGS = ['identity', 'gzip'] + (['br'] if importlib.util.find_spec('brotli') is not None else [])
+
+
+def canonical_json(payload):
+    """
+    Serializes payload to canonical JSON bytes (sorted keys, no whitespace).
+    """
+    return json.dumps(payload, sort_keys=True, separators=(',', ':')).encode('utf-8')
+
+
+def encode_variants(body):
+    """
+    Returns the identity, gzip and (if available) brotli encodings of body.
+    """
+    variants = {
+        'identity': body,
+        # mtime=0 keeps the gzip bytes identical for identical input
+        'gzip': gzip.compress(body, compresslevel=9, mtime=0)
+    }
+    if 'br' in ENCODINGS:
+        import brotli
+        variants['br'] = brotli.compress(body)
+    return variants
+
+
+def team_file_name(team_name):
+    """
+    Returns the file stem used for a team's snapshot files.
+    """
+    return ''.join(c if c.isalnum() else '_' for c in team_name)
+
+
+def write_variants(directory, stem, body):
+    """
+    Writes body as {stem}.json plus one file per compressed encoding.
+    """
+    for encoding, data in encode_variants(body).items():
+        with open(os.path.join(directory, f'{stem}.json{ENCODING_SUFFIXES[encoding]}'), 'wb') as f:
+            f.write(data)
+
+
+def format_snapshot_payloads(analysis_df, shot_types, include_wins=False, intervals_df=None):
+    """
+    Formats every team's analysis row into its response payload.
+
+    intervals_df, when given, is the matching uncertainty.compute_intervals
+    output and adds each team's intervals section.
+
+    Returns:
+    dict: Team name to payload, in analysis order
+    """
+    team_data = {}
+    for team_name, position in build_team_index(analysis_df).items():
+        intervals = None if intervals_df is None else intervals_df.iloc[position]
+        team_data[team_name] = format_team_payload(analysis_df.iloc[position], shot_types, include_wins, intervals)
+    return team_data
+
+
+def build_snapshot(analysis_df, shot_types, source_paths, include_wins=False, snapshot_dir=SNAPSHOT_DIR,
+                   intervals_df=None, config=None):
+    """
+    Writes an immutable, pre-serialized snapshot of the team-data responses.
+
+    Parameters:
+    analysis_df (DataFrame): Output of analyze_shot_optimization
+    shot_types (dict): Zone name to point value mapping
+    source_paths (list): Input files the analysis was built from
+    include_wins (bool): Whether the analysis carries win impact columns
+    snapshot_dir (str): Directory holding all snapshot versions
+    intervals_df (DataFrame): Optional uncertainty.compute_intervals output
+    config (dict): Analysis settings, see team_analysis.analysis_config
+
+    Returns:
+    str: The snapshot version
+    """
+    team_data = format_snapshot_payloads(analysis_df, shot_types, include_wins, intervals_df)
+    return publish_snapshot(team_data, source_paths, snapshot_dir, config)
+
+
+def publish_snapshot(team_data, source_paths, snapshot_dir=SNAPSHOT_DIR, config=None):
+    """
+    Writes already formatted team payloads as an immutable snapshot.
+
+    The snapshot holds the full /api/team-data document and one document per
+    team, each as canonical JSON plus compressed variants. Its directory is
+    named by the hash of the JSON, the source file hashes and the analysis
+    settings, so republishing unchanged data reuses the existing snapshot.
+    The LATEST pointer is swapped atomically at the end.
+
+    Parameters:
+    team_data (dict): Team name to payload
+    source_paths (list): Input files the payloads were built from
+    snapshot_dir (str): Directory holding all snapshot versions
+    config (dict): Analysis settings the payloads were built with, see
+    team_analysis.analysis_config
+
+    Returns:
+    str: The snapshot version
+    """
+    body = canonical_json(team_data)
+    sources = {path: file_hash(path) for path in source_paths}
+    version = hashlib.sha256(body + canonical_json(sources) + canonical_json(config)).hexdigest()[:16]
+    version_dir = os.path.join(snapshot_dir, version)
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+
+    if not os.path.isdir(version_dir):
+        # Build in a scratch directory and rename so readers never see a partial snapshot
+        build_dir = tempfile.mkdtemp(prefix=f'.{version}-', dir=snapshot_dir)
+        try:
+            os.makedirs(os.path.join(build_dir, 'teams'))
+            write_variants(build_dir, 'team-data', body)
+
+            teams = {}
+            for team_name, payload in team_data.items():
+                stem = team_file_name(team_name)
+                write_variants(os.path.join(build_dir, 'teams'), stem, canonical_json(payload))
+                teams[team_name] = stem
+
+            manifest = {
+                'version': version,
+                'created_at': time.time(),
+                'sources': sources,
+                'config': config,
+                'encodings': ENCODINGS,
+                'teams': teams
+            }
+            with open(os.path.join(build_dir, MANIFEST_FILE), 'w') as f:
+                json.dump(manifest, f, indent=2, sort_keys=True)
+
+            os.rename(build_dir, version_dir)
+        except Exception:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+
+    latest_tmp = os.path.join(snapshot_dir, f'.{LATEST_FILE}.tmp')
+    with open(latest_tmp, 'w') as f:
+        f.write(version)
+    os.replace(latest_tmp, os.path.join(snapshot_dir, LATEST_FILE))
+
+    print(f"Published snapshot {version}")
+    return version
+
+
+def read_variants(directory, stem, encodings):
+    """
+    Reads a document's encodings from disk into memory.
+    """
+    variants = {}
+    for encoding in encodings:
+        with open(os.path.join(directory, f'{stem}.json{ENCODING_SUFFIXES[encoding]}'), 'rb') as f:
+            variants[encoding] = f.read()
+    return variants
+
+
+def load_latest_snapshot(snapshot_dir=SNAPSHOT_DIR):
+    """
+    Loads every document of the latest snapshot into memory.
+
+    Returns:
+    dict: Manifest fields plus 'team_data' and 'teams' byte variants
+    """
+    with open(os.path.join(snapshot_dir, LATEST_FILE)) as f:
+        version = f.read().strip()
+
+    version_dir = os.path.join(snapshot_dir, version)
+    with open(os.path.join(version_dir, MANIFEST_FILE)) as f:
+        manifest = json.load(f)
+
+    encodings = manifest['encodings']
+    manifest['team_data'] = read_variants(version_dir, 'team-data', encodings)
+    manifest['teams'] = {
+        team_name: read_variants(os.path.join(version_dir, 'teams'), stem, encodings)
+        for team_name, stem in manifest['teams'].items()
+    }
+    return manifest
+
+
+def load_snapshot_payloads(snapshot_dir=SNAPSHOT_DIR, config=None):
+    """
+    Returns the latest snapshot's team payloads as dicts, or None if there is none.
+
+    With a config, a snapshot built with other analysis settings counts as
+    missing, so none of its payloads are reused.
+    """
+    try:
+        snapshot = load_latest_snapshot(snapshot_dir)
+    except FileNotFoundError:
+        return None
+    if config is not None and snapshot.get('config') != config:
+        return None
+
+    return {
+        team_name: json.loads(variants['identity'])
+        for team_name, variants in snapshot['teams'].items()
+    }
+
+
+def snapshot_response(variants, etag, modified_at):
+    """
+    Serves pre-encoded JSON bytes, picking the best encoding the client accepts.
+
+    Parameters:
+    variants (dict): Encoding name to response bytes
+    etag (str): Entity tag for the document
+    modified_at (float): Snapshot creation time (epoch seconds)
+
+    Returns:
+    Response: A 200 response with the raw bytes, or 304 if unchanged
+    """
+    # Imported here so snapshots can be built without Flask, e.g. in the fetch scripts
+    from flask import Response, request
+
+    offered = [encoding for encoding in ('br', 'gzip') if encoding in variants]
+    encoding = request.accept_encodings.best_match(offered) if offered else None
+
+    response = Response(variants[encoding or 'identity'], mimetype='application/json')
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(f'{etag}-{encoding or "identity"}')
+    response.last_modified = modified_at
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -0,0 +1,314 @@
+import numpy as np
+import pandas as pd
+
+from metrics import stage
+from shot_engine import KEY_COLUMNS, ZONE_METRICS, compute_shot_optimization, project_win_impact
+from shot_optimizer import optimizer_from_env
+from shot_schema import normalize_shot_locations, normalize_team_stats, read_shot_locations
+from team_payload import build_team_index
+from uncertainty import INTERVAL_LEVEL, INTERVAL_RESAMPLES, compute_intervals
+
+# Define shot types and their point values
+shot_types = {
+    'RA': 2,    # Restricted Area (2 points)
+    'NRA': 2,   # Non-Restricted Area / In The Paint (Non-RA) (2 points) 
+    'MR': 2,    # Mid-Range (2 points)
+    'LC3': 3,   # Left Corner 3 (3 points)
+    'RC3': 3,   # Right Corner 3 (3 points)
+    'AB3': 3    # Above Break 3 (3 points)
+}
+
+def calculate_win_impact(current_pts, optimal_pts, current_wins, games_played, plus_minus):
+    """
+    Calculates the projected impact on wins based on scoring changes.
+    
+    This is the deterministic point estimate. /api/simulations plays the
+    rest of the season out with season_simulator for win distributions.
+    
+    Parameters:
+    current_pts (float): Current points per game
+    optimal_pts (float): Projected optimal points per game
+    current_wins (int): Current number of wins
+    games_played (int): Number of games played
+    plus_minus (float): Current point differential per game
+    
+    Returns:
+    dict: Dictionary containing win impact analysis
+    """
+    # Calculate how the scoring change would affect point differential
+    pts_difference = optimal_pts - current_pts
+    new_plus_minus = plus_minus + pts_difference
+    
+    # Calculate win probability based on new point differential
+    # Using the Pythagorean expectation formula adapted for basketball
+    # Typically uses 16.5 as the exponent for NBA games
+    PYTH_EXP = 16.5
+    
+    # Calculate current win percentage
+    current_win_pct = current_wins / games_played
+    
+    # Calculate new expected win percentage
+    if new_plus_minus >= 0:
+        new_win_pct = 1 / (1 + (1 / (new_plus_minus + 10)) ** PYTH_EXP)
+    else:
+        new_win_pct = 1 / (1 + (-new_plus_minus + 10) ** PYTH_EXP)
+    
+    # Project wins over the same number of games
+    projected_wins = round(new_win_pct * games_played, 1)
+    win_difference = projected_wins - current_wins
+    
+    return {
+        "current_wins": current_wins,
+        "current_win_pct": current_win_pct * 100,
+        "projected_wins": projected_wins,
+        "projected_win_pct": new_win_pct * 100,
+        "win_difference": win_difference,
+        "current_plus_minus": plus_minus,
+        "projected_plus_minus": new_plus_minus
+    }
+
+def transform_shot_location_data(df_shots, zones=None):
+    """
+    Transforms the NBA API shot location data into our analysis format.
+    
+    Parameters:
+    df_shots (DataFrame): Raw shot location data from NBA API, with the
+        two-row header as MultiIndex columns or flattened
+    zones (list): Internal zones to keep, defaults to all of them
+    
+    Returns:
+    DataFrame: Transformed data with standardized column names
+    """
+    return normalize_shot_locations(df_shots, zones or list(shot_types))
+
+def merge_team_data(df_shots, df_stats):
+    """
+    Merges shot location data with team stats and calculates per game averages.
+    
+    Both frames carry TEAM_ID when they come from the NBA API, and the
+    merge is then a single indexed join on it (plus the season keys for
+    multi-season data). Frames without TEAM_ID are joined by team name.
+    
+    Parameters:
+    df_shots (DataFrame): Transformed shot location data
+    df_stats (DataFrame): Team stats data from NBA API
+    
+    Returns:
+    DataFrame: Merged data with all necessary statistics
+    """
+    df_stats = normalize_team_stats(df_stats)
+    
+    # Multi-season data is joined within each season as well as by team
+    season_keys = [key for key in ('Season', 'Season_Type') if key in df_shots.columns and key in df_stats.columns]
+    team_key = 'TEAM_ID' if 'TEAM_ID' in df_shots.columns and 'TEAM_ID' in df_stats.columns else 'Team'
+    
+    # Create a mapping of relevant team stats
+    stat_columns = {
+        'TEAM_NAME': 'Team',
+        'FTM': 'FT_FGM',
+        'FTA': 'FT_FGA',
+        'FT_PCT': 'FT_PCT',
+        'PTS': 'PTS',
+        'GP': 'GP',
+        'W': 'W',
+        'L': 'L',
+        'PLUS_MINUS': 'PLUS_MINUS'
+    }
+    if team_key == 'TEAM_ID':
+        # The shot data already names the team
+        stat_columns = dict({'TEAM_ID': 'TEAM_ID'}, **{k: v for k, v in stat_columns.items() if k != 'TEAM_NAME'})
+    
+    available = [column for column in stat_columns if column in df_stats.columns]
+    team_stats = df_stats[available + season_keys].rename(columns=stat_columns)
+    
+    # Convert FT_PCT to percentage format to match our other percentages
+    team_stats['FT_PCT'] = team_stats['FT_PCT'] * 100
+    
+    # Join shot location data with team stats, keeping the shot data's row order
+    join_keys = [team_key] + season_keys
+    merged_df = df_shots.join(team_stats.set_index(join_keys), on=join_keys, how='inner')
+    
+    return merged_df.reset_index(drop=True)
+
+def analyze_shot_optimization(df, shot_types=shot_types, optimizer=None):
+    """
+    Analyzes shot selection optimization including free throws and win impact.
+
+    All rows are computed at once by the columnar engine, so df may hold a
+    single season or many team-seasons. Passing a subset of shot_types
+    limits the analysis to those zones. By default the optimal mix is
+    proportional to zone EV; pass a shot_optimizer.ShotMixOptimizer to
+    solve the constrained problem instead.
+    """
+    # Calculate EV for each shot type
+    for shot_type, points in shot_types.items():
+        df[f'EV_{shot_type}'] = (df[f'{shot_type}_FG%'] / 100) * points
+    
+    # Calculate free throw EV
+    df['EV_FT'] = (df['FT_PCT'] / 100) * 1  # 1 point per free throw
+    
+    # Calculate total field goal attempts
+    df['Total_FGA'] = sum(df[f'{shot_type}_FGA'] for shot_type in shot_types)
+    
+    analysis = compute_shot_optimization(
+        df,
+        ft_points='FT_FGM',
+        ft_attempts='FT_FGA',
+        ft_percentage='FT_PCT',
+        shot_types=shot_types,
+        optimizer=optimizer
+    )
+    
+    # Calculate win impact
+    win_impact = project_win_impact(
+        analysis['current_ppg'],
+        analysis['optimal_ppg'],
+        df['W'],
+        df['GP'],
+        df['PLUS_MINUS']
+    )
+    for key, values in win_impact.items():
+        analysis[key] = values
+    
+    # Keep the zone columns ahead of the totals, as before
+    zone_columns = [f'{shot_type}_{metric}' for shot_type in shot_types for metric in ZONE_METRICS]
+    other_columns = [column for column in analysis.columns if column not in zone_columns]
+    key_columns = [column for column in other_columns if column in KEY_COLUMNS]
+    summary_columns = [column for column in other_columns if column not in KEY_COLUMNS]
+    
+    return analysis[key_columns + zone_columns + summary_columns]
+
+# Raw NBA API CSVs written by fetch_all_stats (shot locations, team stats)
+TEAM_DATA_SOURCES = ['api_nba_team_stats_shot_zones.csv', 'api_nba_team_stats.csv']
+
+# Constrained shot-mix optimizer, None keeps the EV-proportional mix
+shot_optimizer = optimizer_from_env()
+
+def analysis_config(optimizer=shot_optimizer):
+    """
+    Returns the settings, besides the input files, that the analysis results depend on.
+    
+    Published snapshots record it, so a server started with another
+    optimizer or resample count doesn't serve them.
+    
+    Parameters:
+    optimizer (ShotMixOptimizer): Constrained solver used by the analysis, or None
+    
+    Returns:
+    dict: JSON-serializable optimizer and interval settings
+    """
+    return {
+        'optimizer': None if optimizer is None else optimizer.settings(),
+        'interval_resamples': INTERVAL_RESAMPLES,
+        'interval_level': INTERVAL_LEVEL
+    }
+
+def model_input_columns():
+    """
+    Returns the merged columns that scenarios, sensitivity and simulations read.
+    """
+    zone_columns = [f'{zone}_{stat}' for zone in shot_types for stat in ('FGA', 'FG%')]
+    return ['Team', 'W', 'GP', 'PLUS_MINUS', 'FT_FGM'] + zone_columns
+
+def splice_rows(kept_df, changed_df, changed):
+    """
+    Interleaves reused and recomputed rows back into source row order.
+    
+    Parameters:
+    kept_df (DataFrame): Rows reused from the previous load, in source order
+    changed_df (DataFrame): Recomputed rows, in source order
+    changed (ndarray): Boolean mask over the source rows
+    
+    Returns:
+    DataFrame: One row per source row
+    """
+    # An empty frame of recomputed rows would widen the kept columns' dtypes
+    combined = pd.concat([df for df in (kept_df, changed_df) if len(df)], ignore_index=True)
+    order = np.concatenate([np.flatnonzero(~changed), np.flatnonzero(changed)])
+    return combined.iloc[np.argsort(order)].reset_index(drop=True)
+
+def load_team_data(previous=None):
+    """
+    Loads the raw NBA API CSVs, transforms and merges them, and runs the analysis.
+    
+    Given the previously loaded dataset, only teams whose merged row changed
+    are analyzed again and the other rows are copied from it. Analysis and
+    interval rows depend only on their own team's data, so the result is
+    the same as a full load.
+    
+    Parameters:
+    previous (dict): Dataset returned by an earlier call, optional
+    
+    Returns:
+    dict: The model inputs, the analysis, its intervals, the team -> row
+    index and the row hashes the next load compares against
+    """
+    # Load and process API data
+    with stage('csv_read'):
+        transformed_shots = read_shot_locations(TEAM_DATA_SOURCES[0], list(shot_types))
+        df_stats = pd.read_csv(TEAM_DATA_SOURCES[1])
+    
+    # Merge data
+    with stage('merge'):
+        merged_data = merge_team_data(transformed_shots, df_stats)
+        teams = merged_data['Team'].tolist()
+        row_hashes = dict(zip(teams, pd.util.hash_pandas_object(merged_data, index=False).to_numpy()))
+    
+    changed = np.ones(len(teams), dtype=bool)
+    if (previous is not None and previous['columns'] == list(merged_data.columns)
+            and len(row_hashes) == len(teams)):
+        changed = np.array([previous['row_hashes'].get(team) != row_hashes[team] for team in teams], dtype=bool)
+    changed_data = merged_data[changed].reset_index(drop=True)
+    
+    # Perform analysis
+    with stage('analysis'):
+        analysis_df = analyze_shot_optimization(changed_data, optimizer=shot_optimizer)
+    
+    # Intervals are cached with the dataset, so they are recomputed only when the CSVs change
+    with stage('intervals'):
+        intervals_df = compute_intervals(changed_data, shot_types, optimizer=shot_optimizer)
+    
+    if not changed.all():
+        kept = np.array([previous['team_index'][team] for team, row_changed in zip(teams, changed) if not row_changed])
+        analysis_df = splice_rows(previous['analysis'].iloc[kept], analysis_df, changed)
+        intervals_df = splice_rows(previous['intervals'].iloc[kept], intervals_df, changed)
+    
+    return {
+        'inputs': merged_data[model_input_columns()],
+        'analysis': analysis_df,
+        'intervals': intervals_df,
+        'team_index': build_team_index(analysis_df),
+        'columns': list(merged_data.columns),
+        'row_hashes': row_hashes
+    }
+
+def load_team_history(seasons=None, season_types=None, zones=None):
+    """
+    Loads stored multi-season snapshots in analysis format.
+    
+    Only the partitions for the requested seasons and the columns for the
+    requested zones are read from the historical store.
+    
+    Parameters:
+    seasons (str or list): Season range such as '2019-25', None for all
+    season_types (list): Season types to keep, None for all
+    zones (list): Internal zones to load, defaults to all of them
+    
+    Returns:
+    DataFrame: Merged data with Season and Season_Type columns
+    """
+    # Imported on first use, only the history endpoint reads the store
+    from history_store import load_history, shot_location_columns
+    
+    zones = zones or list(shot_types)
+    
+    df_shots = load_history('shot_locations', seasons, season_types, columns=shot_location_columns(zones))
+    df_stats = load_history(
+        'team_stats',
+        seasons,
+        season_types,
+        columns=['TEAM_ID', 'TEAM_NAME', 'FTM', 'FTA', 'FT_PCT', 'PTS', 'GP', 'W', 'L', 'PLUS_MINUS']
+    )
+    
+    transformed_shots = transform_shot_location_data(df_shots, zones)
+    return merge_team_data(transformed_shots, df_stats)
@@ -0,0 +1,238 @@
+import hashlib
+from datetime import datetime, timezone
+
+
+# Top-level sections of a team's payload
+PAYLOAD_SECTIONS = ['current', 'optimal', 'impact', 'intervals']
+
+
+def build_team_index(analysis_df):
+    """
+    Maps each team name to the position of its first row in the analysis.
+
+    Parameters:
+    analysis_df (DataFrame): Output of analyze_shot_optimization
+
+    Returns:
+    dict: Team name to integer row position
+    """
+    team_index = {}
+    for position, team_name in enumerate(analysis_df['Team']):
+        team_index.setdefault(team_name, position)
+    return team_index
+
+
+def format_team_payload(team_analysis, shot_types, include_wins=False, intervals=None):
+    """
+    Formats one team's analysis row as the nested current/optimal/impact payload.
+
+    Parameters:
+    team_analysis (Series or dict): One row of the analysis output
+    shot_types (dict): Zone name to point value mapping
+    include_wins (bool): Whether the row carries win impact columns
+    intervals (Series or dict): Matching row of uncertainty.compute_intervals, adds an intervals section
+
+    Returns:
+    dict: JSON-serializable team payload
+    """
+    team_data = {
+        "current": {
+            "ppg": float(team_analysis['current_ppg']),
+            "free_throws": {
+                "attempts": float(team_analysis['ft_attempts']),
+                "percentage": float(team_analysis['ft_percentage']),
+                "points": float(team_analysis['ft_points'])
+            }
+        },
+        "optimal": {
+            "ppg": float(team_analysis['optimal_ppg'])
+        },
+        "impact": {
+            "points_difference": float(team_analysis['optimal_ppg'] - team_analysis['current_ppg'])
+        }
+    }
+
+    if include_wins:
+        team_data["current"].update({
+            "wins": float(team_analysis['current_wins']),
+            "win_percentage": float(team_analysis['current_win_pct']),
+            "plus_minus": float(team_analysis['current_plus_minus'])
+        })
+        team_data["optimal"].update({
+            "projected_wins": float(team_analysis['projected_wins']),
+            "projected_win_percentage": float(team_analysis['projected_win_pct']),
+            "projected_plus_minus": float(team_analysis['projected_plus_minus'])
+        })
+        team_data["impact"].update({
+            "wins_difference": float(team_analysis['win_difference']),
+            "plus_minus_difference": float(team_analysis['projected_plus_minus'] - team_analysis['current_plus_minus'])
+        })
+
+    for shot_type in shot_types:
+        team_data["current"][shot_type] = {
+            "attempts": float(team_analysis[f'{shot_type}_Current_Attempts']),
+            "makes": float(team_analysis[f'{shot_type}_Current_Makes']),
+            "percentage": float(team_analysis[f'{shot_type}_Current_FG%']),
+            "ev": float(team_analysis[f'{shot_type}_EV'])
+        }
+
+        team_data["optimal"][shot_type] = {
+            "attempts": float(team_analysis[f'{shot_type}_Optimal_Attempts']),
+            "makes": float(team_analysis[f'{shot_type}_Optimal_Makes'])
+        }
+
+        team_data["impact"][shot_type] = {
+            "attempt_difference": float(team_analysis[f'{shot_type}_Attempt_Diff']),
+            "makes_difference": float(team_analysis[f'{shot_type}_Makes_Diff'])
+        }
+
+    if intervals is not None:
+        team_data["intervals"] = format_interval_payload(intervals, shot_types)
+
+    return team_data
+
+
+def format_interval_payload(intervals, shot_types):
+    """
+    Formats one row of interval bounds as {"lower": ..., "upper": ...} pairs.
+
+    Parameters:
+    intervals (Series or dict): One row of uncertainty.compute_intervals
+    shot_types (dict): Zone name to point value mapping
+
+    Returns:
+    dict: Interval level, PPG difference bounds and per-zone bounds
+    """
+    def bounds(column, lower='_Lower', upper='_Upper'):
+        return {"lower": float(intervals[column + lower]), "upper": float(intervals[column + upper])}
+
+    interval_data = {
+        "level": float(intervals['interval_level']),
+        "ppg_difference": bounds('ppg_difference', '_lower', '_upper')
+    }
+    for shot_type in shot_types:
+        interval_data[shot_type] = {
+            "percentage": bounds(f'{shot_type}_Current_FG%'),
+            "ev": bounds(f'{shot_type}_EV'),
+            "optimal_attempts": bounds(f'{shot_type}_Optimal_Attempts')
+        }
+    return interval_data
+
+
+def parse_fields(fields_arg, shot_types):
+    """
+    Splits and validates a comma-separated fields= query argument.
+
+    A field is a section ('current'), a zone ('RA', kept in every section)
+    or a dotted path into a section ('current.ppg', 'impact.AB3').
+
+    Parameters:
+    fields_arg (str): Raw query argument, may be None
+    shot_types (dict): Zone name to point value mapping
+
+    Returns:
+    list: Field names, or an empty list when no projection was requested
+
+    Raises:
+    ValueError: If a field does not start with a section or zone name
+    """
+    if not fields_arg:
+        return []
+
+    fields = [field.strip() for field in fields_arg.split(',') if field.strip()]
+    for field in fields:
+        section, _, key = field.partition('.')
+        if section in PAYLOAD_SECTIONS or (section in shot_types and not key):
+            continue
+        raise ValueError(f"Unknown field '{field}'")
+    return fields
+
+
+def project_payload(team_data, fields, shot_types):
+    """
+    Keeps only the requested parts of a team payload.
+
+    Sections and dotted paths the payload does not have are skipped.
+
+    Parameters:
+    team_data (dict): Full team payload
+    fields (list): Field names from parse_fields
+    shot_types (dict): Zone name to point value mapping
+
+    Returns:
+    dict: The projected payload
+    """
+    if not fields:
+        return team_data
+
+    projected = {}
+    for field in fields:
+        section, _, key = field.partition('.')
+
+        if section in shot_types:
+            for payload_section in PAYLOAD_SECTIONS:
+                if payload_section not in team_data:
+                    continue
+                projected.setdefault(payload_section, {})[section] = team_data[payload_section][section]
+        elif section not in team_data:
+            continue
+        elif not key:
+            projected.setdefault(section, {}).update(team_data[section])
+        elif key in team_data[section]:
+            projected.setdefault(section, {})[key] = team_data[section][key]
+
+    return projected
+
+
+def response_etag(version, *etag_parts):
+    """
+    Returns the ETag of a response built from a dataset version.
+
+    Parameters:
+    version (str): Dataset version hash
+    etag_parts (str): Extra values the response depends on (team, fields)
+
+    Returns:
+    str: The entity tag, without quotes
+    """
+    return hashlib.sha256('|'.join((version,) + etag_parts).encode()).hexdigest()[:32]
+
+
+def conditional_json(payload, version, modified_at, *etag_parts):
+    """
+    Returns payload as JSON with ETag/Last-Modified validators.
+
+    The ETag is derived from the dataset version plus anything else that
+    shapes the response (team, fields), so it is known before the body.
+    The client's validators are checked first, and a client revalidating
+    an unchanged response gets a 304 without the payload being built or
+    serialized. Pass the payload as a callable to defer building it.
+
+    Parameters:
+    payload (dict or callable): JSON-serializable response body, or a
+        function returning it that is only called for a 200
+    version (str): Dataset version hash
+    modified_at (float): Source data modification time (epoch seconds)
+    etag_parts (str): Extra values the response depends on
+
+    Returns:
+    Response: A 200 response, or 304 if the client's copy is current
+    """
+    # Imported here so payload formatting works without Flask, e.g. in the fetch scripts
+    from flask import Response, jsonify, request
+    from werkzeug.http import is_resource_modified
+
+    etag = response_etag(version, *etag_parts)
+    last_modified = datetime.fromtimestamp(modified_at, timezone.utc)
+
+    if request.method in ('GET', 'HEAD') and not is_resource_modified(
+        request.environ, etag=etag, last_modified=last_modified
+    ):
+        response = Response(status=304)
+    else:
+        response = jsonify(payload() if callable(payload) else payload)
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
@@ -0,0 +1,28 @@
+import os
+import tempfile
+
+from benchmark import compare_results, load_baseline, run_benchmarks, save_results
+
+
+def test_run_cleans_up_and_stores_comparable_results(tmp_path, monkeypatch):
+    scratch_root = tmp_path / 'tmp'
+    scratch_root.mkdir()
+    monkeypatch.setattr(tempfile, 'tempdir', str(scratch_root))
+    monkeypatch.chdir(tmp_path)
+
+    results, memory = run_benchmarks(['league'], include='serve_single_team_data', repeat=1)
+    assert set(results) == {'serve_single_team_data/league', 'serve_single_team_data[cold]/league'}
+    assert memory['league']['retained'] <= memory['league']['frames']
+
+    # The scratch CSVs are gone and the working directory is restored
+    assert os.listdir(scratch_root) == []
+    assert os.getcwd() == str(tmp_path)
+
+    path = save_results(results, memory, results_dir=str(tmp_path / 'results'))
+    baseline = load_baseline(None, results_dir=str(tmp_path / 'results'))
+    assert baseline['results'] == results
+    assert os.path.basename(path) == f"{baseline['commit']}.json"
+
+    slower = {name: dict(timing, best=timing['best'] * 2) for name, timing in results.items()}
+    assert compare_results(results, baseline) == []
+    assert sorted(compare_results(slower, baseline)) == sorted(results)
@@ -0,0 +1,125 @@
+import os
+import shutil
+import threading
+
+import pandas as pd
+import pytest
+
+import api
+import tester_api
+from data_cache import DatasetCache
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / 'source.txt'
+    path.write_text('one')
+    return path
+
+
+def test_rebuilds_only_when_content_changes(source):
+    loads = []
+    cache = DatasetCache([source], lambda: loads.append(source.read_text()) or source.read_text())
+
+    first = cache.get()
+    os.utime(source, ns=(1, 1))
+    assert cache.get() is first
+
+    source.write_text('two')
+    assert cache.get().data == 'two'
+    assert loads == ['one', 'two']
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_refresh_receives_the_previous_data(source):
+    cache = DatasetCache([source], lambda: [source.read_text()], refresh=lambda previous: previous + [source.read_text()])
+    cache.get()
+    source.write_text('two')
+    assert cache.get().data == ['one', 'two']
+
+
+def test_lookups_during_a_rebuild_get_the_previous_entry(source):
+    building = threading.Event()
+    release = threading.Event()
+
+    def loader():
+        if source.read_text() == 'two':
+            building.set()
+            release.wait(5)
+        return source.read_text()
+
+    cache = DatasetCache([source], loader)
+    first = cache.get()
+
+    source.write_text('two')
+    reloaded = []
+    thread = threading.Thread(target=lambda: reloaded.append(cache.reload()))
+    thread.start()
+    assert building.wait(5)
+
+    # The rebuild holds no lock that lookups need
+    assert cache.get() is first
+    assert cache.stats()['version'] == first.version
+
+    release.set()
+    thread.join(5)
+    assert reloaded == [True]
+    assert cache.get().data == 'two'
+
+
+def test_reload_rehashes_files_with_unchanged_stats(source):
+    cache = DatasetCache([source], source.read_text)
+    cache.get()
+    stat = os.stat(source)
+    source.write_text('owt')
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    assert cache.get().data == 'one'
+    assert cache.reload() is True
+    assert cache.get().data == 'owt'
+    assert cache.reload() is False
+
+
+def test_endpoints_share_one_analysis_until_a_csv_changes(client, monkeypatch):
+    cache = tester_api.team_data_cache
+    loads = []
+    monkeypatch.setattr(cache, 'loader', lambda: loads.append('load') or tester_api.load_team_data())
+    monkeypatch.setattr(cache, 'refresh', lambda previous: loads.append('refresh') or tester_api.load_team_data(previous))
+    cache.invalidate()
+    before = client.get('/api/cache-stats').get_json()
+
+    team = next(iter(client.get('/api/team-data').get_json()))
+    assert client.get('/api/team-data/' + team).status_code == 200
+    assert client.get('/api/team-data?fields=impact').status_code == 200
+
+    # Rewriting a CSV with the same content is still a hit
+    stats = pd.read_csv(tester_api.TEAM_DATA_SOURCES[1])
+    stats.to_csv(tester_api.TEAM_DATA_SOURCES[1], index=False)
+    client.get('/api/team-data')
+    assert loads == ['load']
+
+    stats.loc[0, 'W'] += 1
+    stats.to_csv(tester_api.TEAM_DATA_SOURCES[1], index=False)
+    client.get('/api/team-data')
+    assert loads == ['load', 'refresh']
+
+    after = client.get('/api/cache-stats').get_json()
+    assert after['misses'] - before['misses'] == 2
+    assert after['hits'] - before['hits'] == 3
+
+
+def test_legacy_api_caches_its_analysis(tmp_path, monkeypatch):
+    for name in ['nba_team_stats_shot_zones.csv', 'nba_team_stats.csv']:
+        shutil.copy(os.path.join(os.path.dirname(os.path.abspath(__file__)), name), tmp_path / name)
+    monkeypatch.chdir(tmp_path)
+
+    api.team_data_cache.invalidate()
+    client = api.app.test_client()
+    before = client.get('/api/cache-stats').get_json()
+    first = client.get('/api/team-data').get_json()
+    assert client.get('/api/team-data').get_json() == first
+    assert client.get('/test').status_code == 200
+
+    after = client.get('/api/cache-stats').get_json()
+    assert after['misses'] - before['misses'] == 1
+    assert after['hits'] - before['hits'] == 2
@@ -0,0 +1,46 @@
+import io
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import tester_api
+from export import iter_batches, ndjson_stream
+
+
+def test_ndjson_round_trips_exact_floats(merged_team_data):
+    analysis_df = tester_api.analyze_shot_optimization(merged_team_data)
+    analysis_df['AB3_EV'] = analysis_df['AB3_EV'] / 7
+    analysis_df.loc[3, 'MR_EV'] = np.nan
+
+    lines = b''.join(ndjson_stream(iter_batches([analysis_df], batch_rows=7))).decode().splitlines()
+    records = [json.loads(line) for line in lines]
+
+    assert len(records) == len(analysis_df)
+    assert [record['AB3_EV'] for record in records] == analysis_df['AB3_EV'].tolist()
+    assert [record['Team'] for record in records] == analysis_df['Team'].tolist()
+    assert records[3]['MR_EV'] is None
+
+
+def test_ndjson_export_matches_analysis(client):
+    response = client.get('/api/export')
+    assert response.status_code == 200
+    exported = pd.read_json(io.StringIO(response.data.decode()), lines=True, precise_float=True)
+    expected = tester_api.team_data_cache.get().data['analysis']
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False)
+
+
+def test_arrow_export_filters_teams(client):
+    pa = pytest.importorskip('pyarrow')
+    response = client.get('/api/export?format=arrow&teams=Chicago Bulls,Boston Celtics')
+    table = pa.ipc.open_stream(response.data).read_all()
+    assert sorted(table.column('Team').to_pylist()) == ['Boston Celtics', 'Chicago Bulls']
+
+
+def test_export_errors(client):
+    assert client.get('/api/export?format=csv').status_code == 400
+    assert client.get('/api/export?teams=Nobody').status_code == 404
+    assert client.get('/api/export?season=abc').status_code == 400
+    # No historical store in the test directory
+    assert client.get('/api/export?season=2019-25').status_code == 404
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_fetch_modules_do_not_load_flask():
+    modules = 'data_cache, history_store, matchup, player_analysis, snapshots, team_analysis'
+    loaded = subprocess.check_output(
+        [sys.executable, '-c', f"import sys, {modules}; print(sorted({{'flask', 'matplotlib', 'tester_api'}} & set(sys.modules)))"],
+        cwd=PACKAGE_DIR,
+        text=True
+    )
+    assert loaded.strip() == '[]'
+
+
+@pytest.fixture
+def fetch_module(data_dir, monkeypatch):
+    pytest.importorskip('nba_api')
+    import fetch_all_stats
+
+    shots = pd.read_csv(data_dir / 'api_nba_team_stats_shot_zones.csv', header=[0, 1])
+    stats = pd.read_csv(data_dir / 'api_nba_team_stats.csv')
+
+    class Endpoint:
+        def __init__(self, frame):
+            self.frame = frame
+
+        def get_data_frames(self):
+            return [self.frame]
+
+    monkeypatch.setattr(fetch_all_stats.leaguedashteamstats, 'LeagueDashTeamStats', lambda **kwargs: Endpoint(stats))
+    monkeypatch.setattr(
+        fetch_all_stats.leaguedashteamshotlocations, 'LeagueDashTeamShotLocations', lambda **kwargs: Endpoint(shots)
+    )
+    monkeypatch.setattr(fetch_all_stats, 'fetch_player_stats', lambda *args: (None, None))
+    monkeypatch.setattr(fetch_all_stats, 'archive_snapshot', lambda *args: None)
+    return fetch_all_stats
+
+
+def test_fetch_analyzes_once_and_skips_reports(fetch_module, monkeypatch):
+    loads = []
+    load = fetch_module.load_team_data
+    monkeypatch.setattr(fetch_module, 'load_team_data', lambda: loads.append(1) or load())
+    rendered = []
+    monkeypatch.setattr(fetch_module, 'publish_reports', lambda dataset: rendered.append(dataset))
+
+    fetch_module.fetch_all_nba_stats()
+    assert loads == [1]
+    assert rendered == []
+    assert os.path.exists(os.path.join('snapshots', 'LATEST'))
+
+
+def test_fetch_passes_the_same_analysis_to_the_reports(fetch_module, monkeypatch):
+    published = []
+    monkeypatch.setattr(fetch_module, 'publish_team_data_snapshot', lambda dataset: published.append(dataset))
+    monkeypatch.setattr(fetch_module, 'publish_reports', lambda dataset: published.append(dataset))
+
+    fetch_module.fetch_all_nba_stats(render_reports=True)
+    assert len(published) == 2 and published[0] is published[1]
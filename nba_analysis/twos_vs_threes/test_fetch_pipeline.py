@@ -0,0 +1,132 @@
+import json
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import fetch_pipeline
+from fetch_pipeline import (
+    FetchJob, FixtureTransport, RateLimiter, ResponseCache, build_jobs, fetch_job, run_pipeline
+)
+
+
+def team_stats_body(season):
+    stats = pd.read_csv('api_nba_team_stats.csv')
+    # Tag the season into the data so each job's frame can be told apart
+    stats['W'] = int(season[:4]) - 2000
+    return json.dumps({'resultSets': [{
+        'name': 'LeagueDashTeamStats',
+        'headers': list(stats.columns),
+        'rowSet': stats.values.tolist()
+    }]})
+
+
+def shot_locations_body():
+    shots = pd.read_csv('api_nba_team_stats_shot_zones.csv', header=[0, 1])
+    zones = list(dict.fromkeys(zone for zone, _ in shots.columns[2:]))
+    return json.dumps({'resultSets': {
+        'name': 'ShotLocations',
+        'headers': [
+            {'name': 'SHOT_CATEGORY', 'columnsToSkip': 2, 'columnSpan': 3, 'columnNames': zones},
+            {'name': 'columns', 'columnNames': [column for _, column in shots.columns]}
+        ],
+        'rowSet': shots.values.tolist()
+    }})
+
+
+class StubTransport:
+    """
+    Serves NBA API responses built from the local CSVs, failing the first few calls per request.
+    """
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, endpoint_name, parameters):
+        with self._lock:
+            self.calls.append((endpoint_name, parameters['Season'], parameters['MeasureType']))
+            if self.calls.count(self.calls[-1]) <= self.failures:
+                raise ConnectionError("stats.nba.com reset the connection")
+        if endpoint_name == 'leaguedashteamstats':
+            return team_stats_body(parameters['Season'])
+        return shot_locations_body()
+
+
+def test_backfill_runs_every_job_and_reuses_the_cache(data_dir):
+    jobs = build_jobs('2022-24', season_types=('Regular Season', 'Playoffs'))
+    assert len(jobs) == 2 * 2 * 3
+
+    transport = StubTransport()
+    cache = ResponseCache(str(data_dir / 'cache'))
+    results = run_pipeline(jobs, transport=transport, cache=cache, max_workers=4, rate=0)
+    assert set(results) == set(jobs)
+    assert len(transport.calls) == len(jobs)
+
+    team_stats = results[FetchJob('team_stats', '2023-24', 'Playoffs', 'PerGame')]
+    assert (team_stats['W'] == 23).all()
+    shots = results[FetchJob('opponent_shot_locations', '2022-23', 'Regular Season', 'PerGame')]
+    assert shots.columns.nlevels == 2 and len(shots) == 30
+    assert {call[2] for call in transport.calls} == {'Base', 'Opponent'}
+
+    # A re-run is served from disk without a single request
+    rerun = StubTransport()
+    cached = run_pipeline(jobs, transport=rerun, cache=cache, rate=0)
+    assert rerun.calls == []
+    pd.testing.assert_frame_equal(cached[jobs[0]], results[jobs[0]])
+
+    # The cache doubles as a directory of recorded fixtures
+    replayed = run_pipeline(jobs, transport=FixtureTransport(str(data_dir / 'cache')),
+                            cache=ResponseCache(str(data_dir / 'replay')), rate=0)
+    assert set(replayed) == set(jobs)
+
+
+def test_fetched_jobs_are_archived_by_season(data_dir):
+    pytest.importorskip('pyarrow')
+    from history_store import load_history
+
+    jobs = build_jobs('2022-24', per_modes=('PerGame', 'Totals'), datasets=('team_stats', 'shot_locations'))
+    run_pipeline(jobs, transport=StubTransport(), cache=ResponseCache(str(data_dir / 'cache')), rate=0,
+                 store_dir=str(data_dir / 'history'), snapshot_date='2025-01-01')
+
+    team_stats = load_history('team_stats', columns=['TEAM_ID', 'W'], store_dir=str(data_dir / 'history'))
+    assert team_stats.groupby('Season')['W'].first().to_dict() == {'2022-23': 22, '2023-24': 23}
+    assert len(load_history('shot_locations_totals', store_dir=str(data_dir / 'history'))) == 60
+
+
+def test_failures_are_retried_then_reported(data_dir, monkeypatch):
+    job = FetchJob('team_stats', '2024-25', 'Regular Season', 'PerGame')
+    transport = StubTransport(failures=2)
+    df, from_cache = fetch_job(job, transport, None, RateLimiter(0), max_retries=2, backoff=0)
+    assert len(transport.calls) == 3 and not from_cache and len(df) == 30
+
+    with pytest.raises(ConnectionError):
+        fetch_job(job, StubTransport(failures=3), None, RateLimiter(0), max_retries=2, backoff=0)
+
+    # A job that keeps failing is left out without stopping the others
+    delays = []
+    monkeypatch.setattr(fetch_pipeline.time, 'sleep', delays.append)
+    stub = StubTransport()
+
+    def transport(endpoint_name, parameters):
+        if parameters['MeasureType'] == 'Opponent':
+            raise ConnectionError("stats.nba.com reset the connection")
+        return stub(endpoint_name, parameters)
+
+    jobs = build_jobs('2024-25')
+    results = run_pipeline(jobs, transport=transport, cache=ResponseCache(str(data_dir / 'cache')), rate=0)
+    assert set(results) == {job for job in jobs if job.dataset != 'opponent_shot_locations'}
+    assert len(delays) == 4 and delays == sorted(delays)
+
+
+def test_rate_limiter_spaces_requests_across_threads():
+    limiter = RateLimiter(50)
+    start = time.monotonic()
+    threads = [threading.Thread(target=limiter.wait) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert time.monotonic() - start >= 5 / 50
@@ -0,0 +1,57 @@
+import os
+import shutil
+
+import pytest
+
+from history_store import import_csv_snapshot, load_history
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def store(data_dir):
+    pytest.importorskip('pyarrow')
+    shutil.copy(os.path.join(PACKAGE_DIR, 'nba_team_stats.csv'), data_dir / 'nba_team_stats.csv')
+    return data_dir
+
+
+def test_api_snapshots_are_stored_by_season(store):
+    import_csv_snapshot('api_nba_team_stats.csv', 'team_stats', '2024-25', snapshot_date='2025-01-01')
+    import_csv_snapshot('api_nba_team_stats_shot_zones.csv', 'shot_locations', '2024-25', snapshot_date='2025-01-01')
+
+    team_stats = load_history('team_stats', seasons='2024-25', columns=['TEAM_ID', 'W'])
+    assert len(team_stats) == 30
+    assert set(team_stats['Snapshot_Date']) == {'2025-01-01'}
+    assert len(load_history('shot_locations', columns=['TEAM_ID'])) == 30
+
+
+def test_other_sources_are_not_mixed_into_a_dataset(store):
+    # Basketball-Reference exports have no TEAM_ID
+    with pytest.raises(ValueError):
+        import_csv_snapshot('nba_team_stats.csv', 'team_stats', '2024-25')
+    assert not os.path.exists(store / 'history' / 'team_stats')
+
+
+def test_history_endpoint_serves_stored_seasons(store, client):
+    import_csv_snapshot('api_nba_team_stats.csv', 'team_stats', '2024-25')
+    import_csv_snapshot('api_nba_team_stats_shot_zones.csv', 'shot_locations', '2024-25')
+
+    response = client.get('/api/history/team-data?season=2023-25&zones=RA,AB3')
+    assert response.status_code == 200
+    history = response.get_json()
+    assert list(history) == ['2024-25 Regular Season']
+    bulls = history['2024-25 Regular Season']['Chicago Bulls']
+    assert set(bulls['current']) >= {'RA', 'AB3', 'wins'} and 'MR' not in bulls['current']
+
+    assert client.get('/api/history/team-data?season=2019-20').status_code == 404
+    assert client.get('/api/history/team-data?zones=XX').status_code == 400
+
+
+def test_history_endpoint_errors(client):
+    response = client.get('/api/history/team-data?season=2024-25')
+    assert response.status_code == 404
+    assert response.get_json() == {"error": "No seasons have been stored in the historical store"}
+
+    response = client.get('/api/history/team-data?season=abc')
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Invalid season 'abc'"}
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tester_api
+from matchup import OPPONENT_DATA_SOURCE, build_matchup_matrix, win_probability
+from shot_engine import shot_types, zone_matrix
+from shot_schema import read_shot_locations
+
+ZONES = list(shot_types)
+
+
+def write_opponent_csv(seed=0):
+    """
+    Writes an opponent shot location CSV shaped like the NBA API's, in shuffled team order.
+
+    Each defense allows the team file's own numbers scaled by a random factor per zone.
+    """
+    shots = pd.read_csv('api_nba_team_stats_shot_zones.csv', header=[0, 1])
+    rng = np.random.default_rng(seed)
+    for column in shots.columns[2:]:
+        factor = rng.uniform(0.9, 1.1, len(shots)) if column[1] == 'FGA' else 1.0
+        shots[column] = shots[column] * factor
+    shots = shots.rename(columns={'FGM': 'OPP_FGM', 'FGA': 'OPP_FGA', 'FG_PCT': 'OPP_FG_PCT'}, level=1)
+    shots.sample(frac=1, random_state=seed).to_csv(OPPONENT_DATA_SOURCE, index=False)
+
+
+@pytest.fixture
+def opponent_shots(data_dir):
+    write_opponent_csv()
+    return read_shot_locations(OPPONENT_DATA_SOURCE, ZONES)
+
+
+def test_matrix_matches_blending_each_pair(merged_team_data, opponent_shots):
+    matrix = build_matchup_matrix(merged_team_data, opponent_shots)
+    assert matrix['attempts'].shape == (30, 30, len(ZONES))
+
+    attempts = zone_matrix(merged_team_data, 'FGA', ZONES)
+    fg_pct = zone_matrix(merged_team_data, 'FG%', ZONES) / 100
+    league_attempts = attempts.mean(axis=0)
+    league_fg_pct = (attempts * fg_pct).sum(axis=0) / attempts.sum(axis=0)
+    defense = opponent_shots.set_index('TEAM_ID').loc[merged_team_data['TEAM_ID']]
+    points = np.array([shot_types[zone] for zone in ZONES])
+
+    for offense, opponent in [(0, 1), (7, 22), (29, 3)]:
+        allowed = defense.iloc[opponent]
+        pair_attempts = attempts[offense] * np.array([allowed[f'{zone}_FGA'] for zone in ZONES]) / league_attempts
+        pair_fg_pct = fg_pct[offense] + np.array([allowed[f'{zone}_FG%'] for zone in ZONES]) / 100 - league_fg_pct
+        np.testing.assert_allclose(matrix['attempts'][offense, opponent], pair_attempts)
+        np.testing.assert_allclose(matrix['fg_pct'][offense, opponent], pair_fg_pct)
+        expected = (pair_attempts * pair_fg_pct * points).sum() + merged_team_data['FT_FGM'].iloc[offense]
+        assert matrix['expected_points'][offense, opponent] == pytest.approx(expected)
+
+    # The optimal mix keeps each pair's blended attempt total
+    np.testing.assert_allclose(matrix['optimal_attempts'].sum(axis=-1), matrix['attempts'].sum(axis=-1))
+
+
+def test_missing_defenses_are_reported(merged_team_data, opponent_shots):
+    missing = opponent_shots['TEAM_ID'] == merged_team_data['TEAM_ID'].iloc[4]
+    with pytest.raises(ValueError, match=merged_team_data['Team'].iloc[4]):
+        build_matchup_matrix(merged_team_data, opponent_shots[~missing])
+
+
+def test_matchups_are_served_from_the_matrix(client, opponent_shots):
+    tester_api.matchup_cache.invalidate()
+    before = tester_api.matchup_cache.stats()['misses']
+
+    game = client.get('/api/matchup/Boston Celtics/Chicago Bulls').get_json()
+    matrix = tester_api.matchup_cache.get().data
+    home, away = matrix['team_index']['Boston Celtics'], matrix['team_index']['Chicago Bulls']
+    assert game['home']['expected_points'] == pytest.approx(matrix['expected_points'][home, away])
+    assert game['away']['expected_points'] == pytest.approx(matrix['expected_points'][away, home])
+    assert game['projected_margin'] == pytest.approx(game['home']['expected_points'] - game['away']['expected_points'])
+    assert game['home_win_probability'] == pytest.approx(
+        win_probability(game['home']['projected_points'], game['away']['projected_points']) * 100
+    )
+
+    optimal = client.get('/api/matchup/Boston Celtics/Chicago Bulls?mix=optimal').get_json()
+    assert optimal['home']['projected_points'] == pytest.approx(matrix['optimal_points'][home, away])
+    client.get('/api/matchup/Chicago Bulls/Boston Celtics')
+    assert tester_api.matchup_cache.stats()['misses'] == before + 1
+
+
+def test_matchup_errors(client, data_dir):
+    assert client.get('/api/matchup/Boston Celtics/Chicago Bulls').status_code == 503
+
+    write_opponent_csv()
+    assert client.get('/api/matchup/Boston Celtics/Boston Celtics').status_code == 400
+    assert client.get('/api/matchup/Boston Celtics/Chicago Bulls?mix=best').status_code == 400
+    assert client.get('/api/matchup/Boston Celtics/Seattle SuperSonics').status_code == 404
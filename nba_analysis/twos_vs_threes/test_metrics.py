@@ -0,0 +1,138 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import metrics
+import tester_api
+from metrics import Counter, Gauge, Histogram, Registry, merge_worker_metrics, render_metrics, reset_metrics
+
+
+def dead_pid():
+    pid = 4000000
+    while metrics.process_alive(pid):
+        pid += 1
+    return pid
+
+
+@pytest.fixture
+def registry():
+    registry = Registry()
+    registry.register(Counter('jobs_total', 'Jobs', lambda: {('a',): 3}, ['queue']))
+    registry.register(Gauge('ratio', 'Ratio', lambda: {('a',): 0.5}, ['queue']))
+    histogram = registry.register(Histogram('seconds', 'Latency', (0.1, 1.0), ['queue']))
+    histogram.observe(0.05, queue='a')
+    return registry
+
+
+def write(metrics_dir, pid, registry):
+    with open(os.path.join(metrics_dir, f'{pid}.json'), 'w') as f:
+        json.dump(registry.collect(), f)
+
+
+def test_workers_are_summed_and_gauges_labelled(tmp_path, registry):
+    write(tmp_path, os.getpid(), registry)
+    write(tmp_path, dead_pid(), registry)
+
+    merged = {metric['name']: metric for metric in merge_worker_metrics(tmp_path)}
+    assert merged['jobs_total']['samples'] == [['jobs_total', ['a'], 6]]
+    assert ['seconds_count', ['a'], 2] in merged['seconds']['samples']
+    assert ['seconds_bucket', ['a', '0.1'], 2] in merged['seconds']['samples']
+    # Only the running worker's gauge is reported, under its pid
+    assert merged['ratio']['samples'] == [['ratio', ['a', str(os.getpid())], 0.5]]
+    assert merged['ratio']['labelnames'] == ['queue', 'pid']
+
+
+def test_scrape_reports_every_worker(tmp_path, registry):
+    write(tmp_path, dead_pid(), registry)
+    text = render_metrics(registry, str(tmp_path))
+
+    assert '# TYPE jobs_total counter' in text
+    assert 'jobs_total{queue="a"} 6.0' in text
+    assert 'seconds_bucket{queue="a",le="+Inf"} 2.0' in text
+    assert f'ratio{{queue="a",pid="{os.getpid()}"}} 0.5' in text
+
+
+def test_reset_drops_recorded_metrics(tmp_path, registry):
+    write(tmp_path, dead_pid(), registry)
+    reset_metrics(registry, str(tmp_path))
+    assert os.listdir(tmp_path) == []
+    assert registry.metrics[2].samples() == []
+
+
+def test_cache_lookups_are_counters(client):
+    client.get('/api/team-data')
+    text = client.get('/metrics').get_data(as_text=True)
+    assert '# TYPE nba_cache_hits_total counter' in text
+    assert '# TYPE nba_cache_misses_total counter' in text
+    assert '# TYPE nba_cache_hits gauge' not in text
+
+
+def test_importing_the_app_skips_optional_heavy_modules():
+    loaded = subprocess.check_output(
+        [sys.executable, '-c', "import sys, tester_api; print(sorted({'pyarrow.dataset', 'brotli'} & set(sys.modules)))"],
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        text=True
+    )
+    assert loaded.strip() == '[]'
+
+
+def sample_value(text, prefix):
+    """
+    Returns the value of the first exposition line starting with prefix, 0 if there is none.
+    """
+    for line in text.splitlines():
+        if line.startswith(prefix):
+            return float(line.rsplit(' ', 1)[1])
+    return 0.0
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('seconds', 'Latency', (0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value)
+
+    samples = {(name, labels[-1] if labels else None): value for name, labels, value in histogram.samples()}
+    assert samples[('seconds_bucket', '0.1')] == 1
+    assert samples[('seconds_bucket', '1.0')] == 3
+    assert samples[('seconds_bucket', '+Inf')] == 4
+    assert samples[('seconds_sum', None)] == 4.05
+
+
+def test_requests_record_stages_latency_size_and_age(client):
+    tester_api.team_data_cache.invalidate()
+    before = client.get('/metrics').get_data(as_text=True)
+    body = client.get('/api/team-data').get_data()
+    text = client.get('/metrics').get_data(as_text=True)
+
+    for name in ('csv_read', 'merge', 'analysis', 'json'):
+        series = f'nba_stage_seconds_count{{stage="{name}"}}'
+        assert sample_value(text, series) == sample_value(before, series) + 1
+
+    series = 'app="tester",endpoint="serve_team_data",method="GET",status="200"'
+    assert sample_value(text, f'nba_request_seconds_count{{{series}}}') == \
+        sample_value(before, f'nba_request_seconds_count{{{series}}}') + 1
+    assert sample_value(text, f'nba_response_bytes_sum{{{series}}}') - \
+        sample_value(before, f'nba_response_bytes_sum{{{series}}}') == len(body)
+
+    assert sample_value(text, 'nba_data_age_seconds{cache="tester.team_data"}') > 0
+    assert sample_value(text, 'nba_cache_hit_ratio{cache="tester.team_data"}') == \
+        tester_api.team_data_cache.stats()['hit_ratio']
+    assert '# TYPE nba_request_seconds histogram' in text
+
+
+def test_slow_requests_are_profiled(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, 'PROFILE_SAMPLE_RATE', 1.0)
+    monkeypatch.setattr(metrics, 'PROFILE_SLOW_SECONDS', 0.0)
+    monkeypatch.setattr(metrics, 'PROFILE_DIR', str(tmp_path / 'profiles'))
+
+    client.get('/api/team-data')
+    profiles = os.listdir(tmp_path / 'profiles')
+    assert len(profiles) == 1 and 'serve_team_data' in profiles[0]
+
+    # Requests under the threshold leave no profile
+    monkeypatch.setattr(metrics, 'PROFILE_SLOW_SECONDS', 60.0)
+    client.get('/api/team-data')
+    assert len(os.listdir(tmp_path / 'profiles')) == 1
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from player_analysis import MIN_PLAYER_FGA, PLAYER_DATA_SOURCES
+from shot_schema import API_ZONE_NAMES, read_shot_locations
+from shot_engine import shot_types
+
+ZONES = list(shot_types)
+
+
+def write_player_csvs(teams, players_per_team=12, seed=0):
+    """
+    Writes synthetic NBA API player shot location and stats CSVs.
+
+    The last player of each team never makes a shot, so has no EV to reallocate.
+    """
+    rng = np.random.default_rng(seed)
+    rows = len(teams) * players_per_team
+    player_ids = np.arange(1, rows + 1) + 200000
+    team_ids = np.repeat(teams['TEAM_ID'].to_numpy(), players_per_team)
+    games = rng.integers(5, 30, rows)
+
+    columns = {('', 'PLAYER_ID'): player_ids, ('', 'PLAYER_NAME'): [f'Player {i}' for i in player_ids],
+               ('', 'TEAM_ID'): team_ids}
+    for zone in ZONES:
+        attempts = rng.uniform(0, 6, rows).round(1)
+        makes = (attempts * rng.uniform(0.25, 0.65, rows)).round(1)
+        makes[players_per_team - 1::players_per_team] = 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fg_pct = np.where(attempts > 0, makes / attempts, np.nan)
+        columns[(API_ZONE_NAMES[zone], 'FGM')] = makes
+        columns[(API_ZONE_NAMES[zone], 'FGA')] = attempts
+        columns[(API_ZONE_NAMES[zone], 'FG_PCT')] = fg_pct
+    pd.DataFrame(columns).to_csv(PLAYER_DATA_SOURCES[0], index=False)
+
+    pd.DataFrame({
+        'PLAYER_ID': player_ids,
+        'PLAYER_NAME': [f'Player {i}' for i in player_ids],
+        'TEAM_ID': team_ids,
+        'GP': games,
+        'MIN': rng.uniform(5, 35, rows).round(1),
+        'FTM': rng.uniform(0, 5, rows).round(1),
+        'FTA': rng.uniform(5, 7, rows).round(1),
+        'FT_PCT': rng.uniform(0.6, 0.9, rows).round(3),
+        'PTS': rng.uniform(2, 30, rows).round(1)
+    }).to_csv(PLAYER_DATA_SOURCES[1], index=False)
+
+
+@pytest.fixture
+def players(data_dir):
+    teams = pd.read_csv('api_nba_team_stats.csv').head(3)
+    write_player_csvs(teams)
+    return teams
+
+
+def test_player_analysis_reallocates_each_players_attempts(client, players):
+    shots = read_shot_locations(PLAYER_DATA_SOURCES[0], ZONES)
+    player_id = int(shots['PLAYER_ID'].iloc[0])
+    payload = client.get(f'/api/players/{player_id}').get_json()
+
+    assert payload['player']['id'] == player_id
+    assert payload['player']['team'] == players['TEAM_NAME'].iloc[0]
+    attempts = {zone: shots[f'{zone}_FGA'].iloc[0] for zone in ZONES}
+    assert payload['player']['attempts_per_game'] == pytest.approx(sum(attempts.values()))
+
+    # EV-proportional mix: each zone gets total FGA x its share of the summed EV
+    ev = {zone: shots[f'{zone}_FG%'].fillna(0).iloc[0] * shot_types[zone] for zone in ZONES}
+    expected = sum(attempts.values()) * ev['AB3'] / sum(ev.values())
+    assert payload['optimal']['AB3']['attempts'] == pytest.approx(expected)
+
+
+def test_team_lists_are_sorted_and_filtered(client, players):
+    team = players['TEAM_NAME'].iloc[1]
+    listing = client.get(f'/api/teams/{team}/players?min_attempts=0').get_json()
+
+    season_attempts = [player['player']['season_attempts'] for player in listing['players']]
+    assert season_attempts == sorted(season_attempts, reverse=True)
+    # Players who never made a shot are left out of the analysis
+    assert len(listing['players']) == 11
+
+    default = client.get(f'/api/teams/{team}/players').get_json()
+    assert default['min_attempts'] == MIN_PLAYER_FGA
+    assert [player['player']['id'] for player in default['players']] == [
+        player['player']['id'] for player in listing['players'] if player['player']['season_attempts'] >= MIN_PLAYER_FGA
+    ]
+
+    cutoff = season_attempts[4]
+    filtered = client.get(f'/api/teams/{team}/players?min_attempts={cutoff}').get_json()
+    assert len(filtered['players']) == 5
+
+
+def test_player_errors(client, data_dir):
+    # Player data that was never fetched
+    assert client.get('/api/players/200001').status_code == 503
+
+    write_player_csvs(pd.read_csv('api_nba_team_stats.csv').head(1))
+    assert client.get('/api/players/1').status_code == 404
+    assert client.get('/api/teams/Seattle SuperSonics/players').status_code == 404
+    assert client.get('/api/teams/Atlanta Hawks/players?min_attempts=many').status_code == 400
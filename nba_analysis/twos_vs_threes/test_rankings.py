@@ -0,0 +1,127 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import tester_api
+from history_store import import_csv_snapshot
+from rankings import ALL_SEASONS, RankingGroup, build_ranking_index, query_rankings
+
+
+@pytest.fixture(autouse=True)
+def ranking_cache(monkeypatch):
+    monkeypatch.setattr(tester_api, 'ranking_cache', {})
+
+
+def store_season(season):
+    import_csv_snapshot('api_nba_team_stats.csv', 'team_stats', season)
+    import_csv_snapshot('api_nba_team_stats_shot_zones.csv', 'shot_locations', season)
+
+
+def reload(client, monkeypatch):
+    monkeypatch.setattr(tester_api, 'ADMIN_TOKEN', 'secret')
+    response = client.post('/api/admin/reload', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+
+
+def test_live_season_is_ranked_by_its_label(client):
+    listing = client.get('/api/rankings').get_json()
+    assert listing['seasons'] == ['2024-25 Regular Season', ALL_SEASONS]
+
+    by_season = client.get('/api/rankings?metric=AB3_EV&season=2024-25&top=3').get_json()
+    assert by_season['season'] == '2024-25 Regular Season'
+    assert by_season['count'] == 30
+    assert [entry['rank'] for entry in by_season['top']] == [1, 2, 3]
+
+    assert client.get('/api/rankings?metric=AB3_EV&season=1999-00').status_code == 400
+    assert client.get('/api/rankings?metric=AB3_EV&season=2024-25&season_type=Playoffs').status_code == 400
+
+
+    for top in ('abc', '0', '-3', '2.5'):
+        response = client.get(f'/api/rankings?metric=AB3_EV&top={top}')
+        assert response.status_code == 400
+        assert response.get_json() == {"error": "top must be a positive integer"}
+    assert client.get('/api/rankings?metric=AB3_EV&top=1000').get_json() == {"error": "top must be between 1 and 100"}
+
+
+def test_bare_team_name_is_ranked_in_the_live_season(client):
+    response = client.get('/api/rankings?metric=AB3_EV&team=Boston Celtics')
+    assert response.status_code == 200
+    rankings = response.get_json()
+    assert rankings['season'] == '2024-25 Regular Season'
+    assert rankings['team']['name'] == 'Boston Celtics'
+    assert 1 <= rankings['team']['rank'] <= 30
+
+    assert client.get('/api/rankings?metric=AB3_EV&team=Springfield Isotopes').status_code == 404
+
+
+def test_stored_seasons_are_ranked_with_the_live_one(client, monkeypatch):
+    pytest.importorskip('pyarrow')
+    before = client.get('/api/rankings?metric=AB3_EV')
+
+    # The stored copy of the live season is replaced by the live CSVs
+    store_season('2023-24')
+    store_season('2024-25')
+    reload(client, monkeypatch)
+
+    listing = client.get('/api/rankings').get_json()
+    assert listing['seasons'] == ['2023-24 Regular Season', '2024-25 Regular Season', ALL_SEASONS]
+
+    stored = client.get('/api/rankings?metric=AB3_EV&season=2023-24&team=Chicago Bulls').get_json()
+    assert stored['count'] == 30
+    assert stored['team']['name'] == 'Chicago Bulls'
+
+    across = client.get('/api/rankings?metric=AB3_EV&team=Chicago Bulls (2023-24 Regular Season)')
+    assert across.status_code == 200
+    assert across.get_json()['count'] == 60
+    assert across.headers['ETag'] != before.headers['ETag']
+
+    # A bare name is ranked in the latest season, the live one
+    live = client.get('/api/rankings?metric=AB3_EV&team=Chicago Bulls').get_json()
+    assert live['season'] == '2024-25 Regular Season'
+    assert live['count'] == 30
+
+
+def test_warm_up_builds_the_index(data_dir):
+    from serve import warm_up
+
+    warm_up(tester_api, tester_api.app)
+    assert ALL_SEASONS in tester_api.ranking_cache['index']
+
+
+def test_requests_read_the_previous_index_during_a_rebuild(client, monkeypatch):
+    pytest.importorskip('pyarrow')
+    before = client.get('/api/rankings?metric=AB3_EV')
+    store_season('2023-24')
+
+    # While a rebuild holds the build lock, requests neither wait nor build
+    with tester_api.ranking_build_lock:
+        during = client.get('/api/rankings?metric=AB3_EV')
+    assert during.headers['ETag'] == before.headers['ETag']
+
+    reload(client, monkeypatch)
+    listing = client.get('/api/rankings').get_json()
+    assert listing['seasons'] == ['2023-24 Regular Season', '2024-25 Regular Season', ALL_SEASONS]
+
+
+def test_ranks_and_percentiles_share_ties():
+    group = RankingGroup(['a', 'b', 'c', 'd'], {'x': np.array([3.0, 1.0, 3.0, np.nan])})
+    assert group.count('x') == 3
+    assert group.lookup('x', 'a') == {"name": 'a', "value": 3.0, "rank": 1, "percentile": 100.0}
+    assert group.lookup('x', 'c')['rank'] == 1
+    assert group.lookup('x', 'b')['rank'] == 3
+    assert group.lookup('x', 'd')['rank'] is None
+    assert [entry['name'] for entry in group.top('x', 1, ascending=True)] == ['b']
+    assert [entry['name'] for entry in group.top('x', 2)] == ['a', 'c']
+
+
+def test_query_validation():
+    analysis = pd.DataFrame({'Team': ['A', 'B'], 'Season': ['2023-24'] * 2, 'Season_Type': ['Regular Season'] * 2,
+                             'current_ppg': [100.0, 110.0], 'optimal_ppg': [105.0, 111.0]})
+    index = build_ranking_index(analysis)
+    assert query_rankings(index, 'ppg_difference', '2023-24', 1)['top'][0]['name'] == 'A'
+    with pytest.raises(ValueError):
+        query_rankings(index, 'nope')
+    with pytest.raises(ValueError):
+        query_rankings(index, 'current_ppg', top=1000)
+    with pytest.raises(ValueError):
+        query_rankings(index, 'current_ppg', top=0)
@@ -0,0 +1,74 @@
+import pandas as pd
+import pytest
+
+import team_analysis
+import tester_api
+
+
+def changed_stats():
+    stats = pd.read_csv(team_analysis.TEAM_DATA_SOURCES[1])
+    stats.loc[4, 'W'] += 3
+    stats.loc[9, 'PLUS_MINUS'] -= 1
+    stats.iloc[[0, 1]] = stats.iloc[[1, 0]].to_numpy()
+    stats.to_csv(team_analysis.TEAM_DATA_SOURCES[1], index=False)
+    return stats
+
+
+def test_incremental_load_matches_a_full_load(data_dir, monkeypatch):
+    previous = team_analysis.load_team_data()
+    stats = changed_stats()
+
+    analyzed = []
+    analyze = team_analysis.analyze_shot_optimization
+    monkeypatch.setattr(
+        team_analysis, 'analyze_shot_optimization', lambda df, **kwargs: analyzed.extend(df['Team']) or analyze(df, **kwargs)
+    )
+    incremental = team_analysis.load_team_data(previous)
+    assert sorted(analyzed) == sorted(stats['TEAM_NAME'].iloc[[4, 9]])
+
+    monkeypatch.setattr(team_analysis, 'analyze_shot_optimization', analyze)
+    full = team_analysis.load_team_data()
+    pd.testing.assert_frame_equal(incremental['analysis'], full['analysis'])
+    pd.testing.assert_frame_equal(incremental['intervals'], full['intervals'])
+    assert incremental['team_index'] == full['team_index']
+
+
+def test_unchanged_load_reanalyzes_nothing(data_dir, monkeypatch):
+    previous = team_analysis.load_team_data()
+    analyze = team_analysis.analyze_shot_optimization
+    analyzed = []
+    monkeypatch.setattr(
+        team_analysis, 'analyze_shot_optimization', lambda df, **kwargs: analyzed.extend(df['Team']) or analyze(df, **kwargs)
+    )
+
+    reloaded = team_analysis.load_team_data(previous)
+    assert analyzed == []
+    pd.testing.assert_frame_equal(reloaded['analysis'], previous['analysis'])
+
+
+def test_reload_requires_the_admin_token(client, monkeypatch):
+    monkeypatch.setattr(tester_api, 'ADMIN_TOKEN', 'secret')
+    assert client.post('/api/admin/reload').status_code == 403
+    assert client.post('/api/admin/reload', headers={'Authorization': 'Bearer wrong'}).status_code == 403
+
+    response = client.post('/api/admin/reload', headers={'Authorization': 'Bearer secret'})
+    assert response.status_code == 200
+    assert response.get_json()['version'] == tester_api.team_data_cache.get().version
+
+
+def test_reload_is_refused_without_a_configured_token(client, monkeypatch):
+    monkeypatch.setattr(tester_api, 'ADMIN_TOKEN', '')
+    assert client.post('/api/admin/reload', headers={'Authorization': 'Bearer '}).status_code == 403
+
+
+def test_reload_picks_up_changed_data(client, monkeypatch):
+    monkeypatch.setattr(tester_api, 'ADMIN_TOKEN', 'secret')
+    before = client.get('/api/team-data').headers['ETag']
+    stats = changed_stats()
+
+    response = client.post('/api/admin/reload', headers={'Authorization': 'Bearer secret'})
+    assert response.get_json()['reloaded'] is True
+    dataset = tester_api.team_data_cache.get()
+    position = dataset.data['team_index'][stats['TEAM_NAME'].iloc[4]]
+    assert dataset.data['inputs']['W'].iloc[position] == stats['W'].iloc[4]
+    assert client.get('/api/team-data').headers['ETag'] != before
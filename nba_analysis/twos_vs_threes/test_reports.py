@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+import pytest
+
+from reports import REPORT_DIR, build_reports, image_path, load_report_manifest
+from snapshots import team_file_name
+from team_analysis import analyze_shot_optimization, shot_types
+
+pytest.importorskip('matplotlib')
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+@pytest.fixture
+def analysis_df(merged_team_data):
+    return analyze_shot_optimization(merged_team_data.copy())
+
+
+def test_only_changed_figures_are_rendered(data_dir, analysis_df):
+    analysis_df = analysis_df.head(4)
+    first = build_reports(analysis_df, shot_types, workers=1, dpi=20)
+    assert first == {'rendered': 10, 'reused': 0}
+
+    manifest = load_report_manifest()
+    assert len(manifest['reports']) == 10
+    with open(image_path(manifest['reports']['heatmap/current/LC3']), 'rb') as f:
+        assert f.read(8) == PNG_SIGNATURE
+
+    assert build_reports(analysis_df, shot_types, workers=1, dpi=20) == {'rendered': 0, 'reused': 10}
+
+    # One team's AB3 volume changes its own chart and the AB3 heatmap, nothing else
+    changed = analysis_df.copy()
+    changed.loc[0, 'AB3_Current_Attempts'] += 1
+    assert build_reports(changed, shot_types, workers=1, dpi=20) == {'rendered': 2, 'reused': 8}
+    moved = {name for name, key in load_report_manifest()['reports'].items() if manifest['reports'][name] != key}
+    assert moved == {'heatmap/current/AB3', f"team/current/{team_file_name(changed['Team'].iloc[0])}"}
+
+
+def test_seasons_render_across_a_pool(data_dir, analysis_df):
+    teams = analysis_df.head(3)
+    seasons = pd.concat([teams.assign(Season='2023-24'), teams.assign(Season='2024-25')])
+    assert build_reports(seasons, shot_types, workers=2, dpi=20) == {'rendered': 18, 'reused': 0}
+    assert 'heatmap/2023_24/NRA' in load_report_manifest()['reports']
+    assert len(os.listdir(os.path.join(REPORT_DIR, 'images'))) > 1
+
+
+def test_cached_images_are_served(client, analysis_df):
+    assert client.get('/api/reports').status_code == 503
+
+    build_reports(analysis_df.head(3), shot_types, workers=1, dpi=20)
+    index = client.get('/api/reports').get_json()
+    assert len(index['reports']) == 3 + 6
+
+    url = index['reports']['heatmap/current/LC3']
+    response = client.get(url)
+    assert response.status_code == 200 and response.mimetype == 'image/png'
+    assert response.data.startswith(PNG_SIGNATURE)
+    assert response.headers['ETag'].strip('"') == load_report_manifest()['reports']['heatmap/current/LC3']
+
+    assert client.get(url, headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/api/reports/heatmap/current/Corner.png').status_code == 404
@@ -0,0 +1,85 @@
+import numpy as np
+import pytest
+
+import tester_api
+from scenarios import MAX_SCENARIOS, ScenarioCache, normalize_scenario
+from shot_engine import shot_types
+from team_analysis import calculate_win_impact
+
+ZONES = list(shot_types)
+
+
+def test_scenario_matches_a_hand_computation(client, merged_team_data):
+    scenario = {"team": "Chicago Bulls", "attempts": {"MR": -5, "AB3": 5}, "fg_pct": {"AB3": -2}}
+    result = client.post('/api/scenarios', json={"scenarios": [scenario]}).get_json()['results'][0]
+
+    team = merged_team_data[merged_team_data['Team'] == 'Chicago Bulls'].iloc[0]
+    attempts = {zone: team[f'{zone}_FGA'] for zone in ZONES}
+    fg_pct = {zone: team[f'{zone}_FG%'] for zone in ZONES}
+    attempts['MR'] -= 5
+    attempts['AB3'] += 5
+    fg_pct['AB3'] -= 2
+    expected = sum(attempts[zone] * fg_pct[zone] / 100 * shot_types[zone] for zone in ZONES) + team['FT_FGM']
+
+    assert result['scenario_ppg'] == pytest.approx(expected)
+    assert result['attempts']['AB3'] == pytest.approx(attempts['AB3'])
+    assert result['total_attempts'] == pytest.approx(sum(team[f'{zone}_FGA'] for zone in ZONES))
+    expected_impact = calculate_win_impact(
+        result['current_ppg'], result['scenario_ppg'], team['W'], team['GP'], team['PLUS_MINUS']
+    )
+    assert result['projected_wins'] == pytest.approx(expected_impact['projected_wins'])
+
+
+def test_batches_are_cached_per_normalized_scenario(client):
+    teams = list(client.get('/api/team-data').get_json())
+    scenarios = [{"team": team, "attempts": {"MR": -step, "AB3": step}} for team in teams for step in range(1, 11)]
+    before = client.get('/api/cache-stats').get_json()['scenarios']
+
+    batch = client.post('/api/scenarios', json={"scenarios": scenarios}).get_json()['results']
+    assert len(batch) == 300
+    single = client.post('/api/scenarios', json=[scenarios[42]]).get_json()['results']
+    assert single == [batch[42]]
+
+    # Float noise and explicit zeros normalize to the same scenario
+    noisy = dict(scenarios[7], attempts={"MR": -8.00000001, "AB3": 8, "RA": -0.0})
+    assert client.post('/api/scenarios', json=[noisy]).get_json()['results'] == [batch[7]]
+
+    after = client.get('/api/cache-stats').get_json()['scenarios']
+    assert after['misses'] - before['misses'] == 300
+    assert after['hits'] - before['hits'] == 2
+
+
+def test_lru_keeps_the_most_recent_scenarios(client):
+    dataset = tester_api.team_data_cache.get()
+    cache = ScenarioCache(maxsize=2)
+    first, second, third = [
+        normalize_scenario({"team": "Chicago Bulls", "attempts": {"AB3": step}}, ZONES) for step in (1, 2, 3)
+    ]
+
+    cache.evaluate(dataset, [first, second], shot_types)
+    cache.evaluate(dataset, [first], shot_types)
+    cache.evaluate(dataset, [third], shot_types)
+    cache.evaluate(dataset, [first], shot_types)
+    assert cache.stats() == {"size": 2, "maxsize": 2, "hits": 2, "misses": 3}
+
+    # A batch larger than the cache still returns every result
+    many = [normalize_scenario({"team": "Chicago Bulls", "fg_pct": {"MR": step}}, ZONES) for step in range(5)]
+    results = cache.evaluate(dataset, many, shot_types)
+    assert [result['fg_pct']['MR'] for result in results] == pytest.approx(
+        np.arange(5) + results[0]['fg_pct']['MR']
+    )
+
+
+@pytest.mark.parametrize('body, status', [
+    ({"scenarios": []}, 400),
+    ([{"attempts": {"AB3": 1}}], 400),
+    ([{"team": "Chicago Bulls", "attempts": {"Corner": 1}}], 400),
+    ([{"team": "Chicago Bulls", "attempts": {"AB3": "more"}}], 400),
+    ([{"team": "Chicago Bulls", "pace": 100}], 400),
+    ([{"team": "Chicago Bulls"}] * (MAX_SCENARIOS + 1), 400),
+    ([{"team": "Seattle SuperSonics"}], 404)
+])
+def test_invalid_scenarios_are_rejected(client, body, status):
+    response = client.post('/api/scenarios', json=body)
+    assert response.status_code == status
+    assert 'error' in response.get_json()
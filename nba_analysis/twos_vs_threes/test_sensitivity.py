@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+import sensitivity
+import tester_api
+from sensitivity import build_sensitivity, marginal_values, pareto_frontier
+from shot_engine import shot_types, zone_matrix
+from shot_optimizer import ShotMixOptimizer
+
+ZONES = list(shot_types)
+POINTS = np.array([shot_types[zone] for zone in ZONES], dtype=np.float64)
+
+
+def field_goal_points(attempts, fg_pct, base_attempts, optimizer):
+    mix_fg_pct = sensitivity.mix_fg_pct(attempts, fg_pct, base_attempts, optimizer, ZONES)
+    return (attempts * mix_fg_pct * POINTS).sum(axis=-1)
+
+
+@pytest.mark.parametrize('optimizer', [None, ShotMixOptimizer(curve='power')])
+def test_marginals_match_finite_differences(merged_team_data, optimizer):
+    fg_pct = zone_matrix(merged_team_data, 'FG%', ZONES) / 100
+    attempts = zone_matrix(merged_team_data, 'FGA', ZONES)
+    marginals = marginal_values(fg_pct, attempts, POINTS, optimizer, ZONES)
+    base = field_goal_points(attempts, fg_pct, attempts, optimizer)
+
+    h = 1e-6
+    for i in range(len(ZONES)):
+        step = np.zeros(len(ZONES))
+        step[i] = h
+        added = (field_goal_points(attempts + step, fg_pct, attempts, optimizer) - base) / h
+        np.testing.assert_allclose(marginals['points_per_attempt'][:, i], added, rtol=1e-4)
+
+        # The attempt comes out of the other zones in proportion to their volume
+        shares = attempts / attempts.sum(axis=1, keepdims=True)
+        moved = attempts + step - h * shares
+        fixed = (field_goal_points(moved, fg_pct, attempts, optimizer) - base) / h
+        np.testing.assert_allclose(marginals['fixed_total'][:, i], fixed, rtol=1e-4, atol=1e-6)
+
+    one_point = (attempts * (fg_pct + 0.01) * POINTS).sum(axis=1) - (attempts * fg_pct * POINTS).sum(axis=1)
+    np.testing.assert_allclose(marginals['points_per_fg_pct'].sum(axis=1), one_point)
+
+
+def test_frontier_is_every_undominated_mix():
+    rng = np.random.default_rng(0)
+    cost, value = rng.random((4, 300)), rng.random((4, 300))
+    order, on_frontier = pareto_frontier(cost, value)
+
+    for row in range(4):
+        frontier = set(order[row][on_frontier[row]])
+        undominated = {
+            j for j in range(300)
+            if not np.any((cost[row] <= cost[row, j]) & (value[row] >= value[row, j]) & (np.arange(300) != j))
+        }
+        assert frontier == undominated
+
+
+def test_sweep_is_deterministic_and_chunk_independent(merged_team_data, monkeypatch):
+    teams = merged_team_data.head(5)
+    results = build_sensitivity(teams, samples=400, seed=3)
+
+    monkeypatch.setattr(sensitivity, 'SWEEP_CHUNK_VALUES', 1)
+    assert build_sensitivity(teams, samples=400, seed=3) == results
+    assert build_sensitivity(teams, samples=400, seed=4) != results
+
+    for team, result in results.items():
+        total_fga = sum(teams.loc[teams['Team'] == team, f'{zone}_FGA'].iloc[0] for zone in ZONES)
+        for tradeoff, frontier in result['frontiers'].items():
+            costs = [point[tradeoff] for point in frontier]
+            ppg = [point['ppg'] for point in frontier]
+            assert costs == sorted(costs) and ppg == sorted(ppg)
+            assert all(sum(point['attempts'].values()) == pytest.approx(total_fga) for point in frontier)
+
+        # Staying put costs nothing, so the current mix starts the shift frontier
+        assert result['frontiers']['shift'][0]['shift'] == 0
+        assert result['frontiers']['shift'][0]['ppg'] == pytest.approx(result['current_ppg'])
+
+
+def test_sensitivity_endpoints_share_one_sweep(client, monkeypatch):
+    monkeypatch.setattr(tester_api, 'sensitivity_cache', OrderedDict())
+    marginals = client.get('/api/sensitivity?samples=200').get_json()
+    assert len(marginals) == 30
+    assert set(marginals['Chicago Bulls']) == set(ZONES)
+
+    team = client.get('/api/sensitivity/Chicago Bulls?samples=200').get_json()
+    assert team['marginals'] == marginals['Chicago Bulls']
+    assert team['samples'] == 200 and set(team['frontiers']) == {'variance', 'shift'}
+    assert len(tester_api.sensitivity_cache) == 1
+
+    assert client.get('/api/sensitivity?samples=1').status_code == 400
+    assert client.get('/api/sensitivity?seed=-1').status_code == 400
+    assert client.get('/api/sensitivity/Seattle SuperSonics').status_code == 404
+
+
+def test_a_cold_sweep_does_not_block_other_keys(client, monkeypatch):
+    monkeypatch.setattr(tester_api, 'sensitivity_cache', OrderedDict())
+    dataset = tester_api.team_data_cache.get()
+    cached = tester_api.team_sensitivity(dataset, 20, 0)
+
+    started, release = threading.Event(), threading.Event()
+
+    def slow_sweep(*args, **kwargs):
+        started.set()
+        release.wait(10)
+        raise RuntimeError("sweep failed")
+
+    def cold_request():
+        try:
+            tester_api.team_sensitivity(dataset, 30, 0)
+        except RuntimeError as e:
+            errors.append(e)
+
+    monkeypatch.setattr(tester_api, 'build_sensitivity', slow_sweep)
+    errors = []
+    cold = threading.Thread(target=cold_request)
+    cold.start()
+    assert started.wait(10)
+
+    # While the other sweep runs, a cached key is answered without waiting for it
+    assert tester_api.team_sensitivity(dataset, 20, 0) is cached
+    release.set()
+    cold.join(10)
+
+    # The failed sweep is not cached, so the next request builds it again
+    assert len(errors) == 1
+    assert list(tester_api.sensitivity_cache) == [(dataset.version, 20, 0)]
@@ -0,0 +1,82 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from shot_engine import compute_shot_optimization, project_win_impact, shot_types
+from team_analysis import analyze_shot_optimization, calculate_win_impact
+
+
+def loop_analysis(df):
+    """
+    The per-team loop the columnar engine replaced, kept as the reference.
+    """
+    rows = []
+    for _, team in df.iterrows():
+        row = {'Team': team['Team']}
+        total_fga = sum(team[f'{shot_type}_FGA'] for shot_type in shot_types)
+        total_ev = sum(team[f'{shot_type}_FG%'] / 100 * points for shot_type, points in shot_types.items())
+
+        current_fg_points = optimal_fg_points = 0
+        for shot_type, points in shot_types.items():
+            fg_pct = team[f'{shot_type}_FG%'] / 100
+            current_attempts = team[f'{shot_type}_FGA']
+            optimal_attempts = total_fga * (fg_pct * points / total_ev)
+            current_fg_points += current_attempts * fg_pct * points
+            optimal_fg_points += optimal_attempts * fg_pct * points
+            row.update({
+                f'{shot_type}_Current_FG%': fg_pct,
+                f'{shot_type}_EV': fg_pct * points,
+                f'{shot_type}_Current_Attempts': current_attempts,
+                f'{shot_type}_Current_Makes': current_attempts * fg_pct,
+                f'{shot_type}_Optimal_Attempts': optimal_attempts,
+                f'{shot_type}_Optimal_Makes': optimal_attempts * fg_pct,
+                f'{shot_type}_Attempt_Diff': optimal_attempts - current_attempts,
+                f'{shot_type}_Makes_Diff': optimal_attempts * fg_pct - current_attempts * fg_pct
+            })
+
+        row['current_ppg'] = current_fg_points + team['FT_FGM']
+        row['optimal_ppg'] = optimal_fg_points + team['FT_FGM']
+        row.update(calculate_win_impact(
+            row['current_ppg'], row['optimal_ppg'], team['W'], team['GP'], team['PLUS_MINUS']
+        ))
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def test_matches_the_per_team_loop(merged_team_data):
+    analysis = analyze_shot_optimization(merged_team_data.copy())
+    expected = loop_analysis(merged_team_data)
+
+    win_columns = set(calculate_win_impact(110.0, 112.0, 20, 30, 1.0))
+    for column in expected.columns:
+        if column in win_columns:
+            # NumPy's and Python's pow can differ in the last bit
+            np.testing.assert_allclose(analysis[column], expected[column], rtol=1e-12, err_msg=column)
+        else:
+            assert np.array_equal(analysis[column].to_numpy(), expected[column].to_numpy()), column
+
+
+def test_many_seasons_run_in_one_call(merged_team_data):
+    seasons = pd.concat(
+        [merged_team_data.assign(Season=f'{year}-{str(year + 1)[-2:]}') for year in range(2000, 2025)],
+        ignore_index=True
+    )
+    batch = compute_shot_optimization(seasons, 'FT_FGM', 'FT_FGA', 'FT_PCT')
+    single = compute_shot_optimization(merged_team_data, 'FT_FGM', 'FT_FGA', 'FT_PCT')
+
+    assert len(batch) == 25 * len(merged_team_data)
+    assert list(batch.columns[:2]) == ['Team', 'Season']
+    last = batch[batch['Season'] == '2024-25'].drop(columns='Season').reset_index(drop=True)
+    pd.testing.assert_frame_equal(last, single)
+
+
+def test_win_projection_matches_the_scalar_formula():
+    current = np.array([110.0, 105.0, 98.0])
+    optimal = np.array([114.0, 101.0, 98.0])
+    projected = project_win_impact(current, optimal, np.array([20, 10, 15]), np.array([30, 30, 30]),
+                                   np.array([2.0, -6.0, 0.0]))
+
+    for i in range(3):
+        expected = calculate_win_impact(current[i], optimal[i], [20, 10, 15][i], 30, [2.0, -6.0, 0.0][i])
+        for key, value in expected.items():
+            assert projected[key][i] == pytest.approx(value, rel=1e-12), key
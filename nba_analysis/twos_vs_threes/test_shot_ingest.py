@@ -0,0 +1,112 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from shot_engine import shot_types
+from shot_ingest import BACKCOURT, classify_zones, fetch_shot_log, ingest_shot_log
+
+ZONES = list(shot_types)
+
+
+def shot_log(shots_per_game=40, games=6, seed=0):
+    """
+    Builds a synthetic shot log for two teams.
+    """
+    rng = np.random.default_rng(seed)
+    rows = games * shots_per_game
+    return pd.DataFrame({
+        'GAME_ID': np.repeat(np.arange(games), shots_per_game),
+        'PLAYER_ID': rng.integers(1, 5, rows),
+        'PLAYER_NAME': 'Player',
+        'TEAM_ID': np.tile([1, 2], rows // 2),
+        'TEAM_NAME': np.tile(['Team A', 'Team B'], rows // 2),
+        'PERIOD': rng.integers(1, 5, rows),
+        'LOC_X': rng.uniform(-250, 250, rows).round(),
+        'LOC_Y': rng.uniform(-50, 450, rows).round(),
+        'SHOT_MADE_FLAG': rng.integers(0, 2, rows),
+        'HTM': 'AAA',
+        'VTM': 'BBB'
+    })
+
+
+def test_zones_follow_the_court_geometry():
+    x = [0, 50, 0, 230, -230, 0, 0]
+    y = [10, 100, 180, 20, 20, 300, 500]
+    codes = classify_zones(x, y, ZONES)
+    expected = [ZONES.index(zone) for zone in ('RA', 'NRA', 'MR', 'LC3', 'RC3', 'AB3')] + [BACKCOURT]
+    assert codes.tolist() == expected
+
+
+def test_chunked_ingestion_matches_one_pass(tmp_path):
+    log = shot_log()
+    log.to_csv(tmp_path / 'shots.csv', index=False)
+
+    whole = ingest_shot_log(str(tmp_path / 'shots.csv'), chunksize=len(log))
+    chunked = ingest_shot_log(str(tmp_path / 'shots.csv'), chunksize=17)
+    pd.testing.assert_frame_equal(whole, chunked)
+
+    assert list(whole['Team']) == ['Team A', 'Team B']
+    assert (whole['GP'] == 6).all()
+    assert {f'{zone}_{stat}' for zone in ZONES for stat in ('FGM', 'FGA', 'FG%')} <= set(whole.columns)
+
+    in_zone = log[classify_zones(log['LOC_X'], log['LOC_Y'], ZONES) != BACKCOURT]
+    team_a = in_zone[in_zone['TEAM_NAME'] == 'Team A']
+    attempts = sum(whole.loc[0, f'{zone}_FGA'] for zone in ZONES)
+    assert attempts * 6 == pytest.approx(len(team_a))
+
+
+def test_filters_and_groups(tmp_path):
+    log = shot_log()
+    log.to_csv(tmp_path / 'shots.csv', index=False)
+
+    fourth = ingest_shot_log(str(tmp_path / 'shots.csv'), filters={'PERIOD': [4]}, per_game=False)
+    in_zone = log[(classify_zones(log['LOC_X'], log['LOC_Y'], ZONES) != BACKCOURT) & (log['PERIOD'] == 4)]
+    assert sum(fourth[f'{zone}_FGA'].sum() for zone in ZONES) == len(in_zone)
+
+    players = ingest_shot_log(str(tmp_path / 'shots.csv'), group_by=['TEAM_NAME', 'PLAYER_ID'])
+    assert list(players.columns[:2]) == ['Team', 'PLAYER_ID']
+    assert len(players) == len(log[['TEAM_NAME', 'PLAYER_ID']].drop_duplicates())
+
+
+@pytest.fixture
+def shot_chart(monkeypatch):
+    """
+    Replaces ShotChartDetail with one serving synthetic logs, failing for team 'fail'.
+    """
+    pytest.importorskip('pyarrow')
+    from nba_api.stats.endpoints import shotchartdetail
+
+    class FakeShotChartDetail:
+        def __init__(self, team_id, **kwargs):
+            if team_id == 'fail':
+                raise ConnectionError("stats.nba.com timed out")
+            log = shot_log(games=1, seed=team_id)
+            self.shots = log.assign(TEAM_ID=team_id)
+
+        def get_data_frames(self):
+            return [self.shots]
+
+    monkeypatch.setattr(shotchartdetail, 'ShotChartDetail', FakeShotChartDetail)
+
+
+def test_fetch_writes_every_team(tmp_path, shot_chart):
+    path = str(tmp_path / 'shots.parquet')
+    assert fetch_shot_log('2024-25', path, team_ids=[1, 2], rate=0) == 80
+
+    assert len(pd.read_parquet(path)) == 80
+    assert os.listdir(tmp_path) == ['shots.parquet']
+
+
+def test_fetch_without_teams_writes_nothing(tmp_path, shot_chart):
+    path = str(tmp_path / 'shots.parquet')
+    assert fetch_shot_log('2024-25', path, team_ids=[], rate=0) == 0
+    assert os.listdir(tmp_path) == []
+
+
+def test_failed_fetch_leaves_no_partial_file(tmp_path, shot_chart):
+    path = str(tmp_path / 'shots.parquet')
+    with pytest.raises(ConnectionError):
+        fetch_shot_log('2024-25', path, team_ids=[1, 'fail'], rate=0)
+    assert os.listdir(tmp_path) == []
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from shot_engine import shot_types, zone_matrix
+from shot_optimizer import ShotMixOptimizer, optimizer_from_env
+from team_analysis import analyze_shot_optimization
+
+ZONES = list(shot_types)
+POINTS = np.array([shot_types[zone] for zone in ZONES], dtype=np.float64)
+
+
+def team_arrays(merged_df):
+    return zone_matrix(merged_df, 'FG%', ZONES) / 100, zone_matrix(merged_df, 'FGA', ZONES)
+
+
+def expected_points(optimizer, mix, fg_pct, attempts):
+    k = np.full(len(ZONES), optimizer.decay)
+    return (mix * optimizer.curve.fg_pct(mix, fg_pct, np.maximum(attempts, 1e-6), k) * POINTS).sum(axis=-1)
+
+
+@pytest.mark.parametrize('curve', ['linear', 'power'])
+def test_solution_is_feasible_and_beats_other_mixes(merged_team_data, curve):
+    optimizer = ShotMixOptimizer(curve=curve, min_share=0.05, max_share={'RA': 0.4, 'AB3': 0.45})
+    fg_pct, attempts = team_arrays(merged_team_data)
+    optimal, optimal_fg_pct = optimizer(fg_pct, attempts, POINTS, ZONES)
+
+    total = attempts.sum(axis=1)
+    lower, upper = optimizer.bounds(ZONES, total)
+    np.testing.assert_allclose(optimal.sum(axis=1), total, rtol=1e-9)
+    assert np.all(optimal >= lower - 1e-9) and np.all(optimal <= upper + 1e-9)
+    np.testing.assert_allclose(optimal_fg_pct, optimizer.curve.fg_pct(optimal, fg_pct, attempts, optimizer.decay))
+
+    # Random feasible mixes around the optimum never score more
+    rng = np.random.default_rng(0)
+    best = expected_points(optimizer, optimal, fg_pct, attempts)
+    for _ in range(200):
+        step = rng.normal(size=optimal.shape)
+        step -= step.mean(axis=1, keepdims=True)
+        mix = optimal + 0.5 * step
+        feasible = np.all((mix >= lower) & (mix <= upper), axis=1)
+        assert np.all(expected_points(optimizer, mix, fg_pct, attempts)[feasible] <= best[feasible] + 1e-9)
+
+
+def test_batched_solve_matches_one_team_at_a_time(merged_team_data):
+    optimizer = ShotMixOptimizer(curve='power', decay=0.3)
+    fg_pct, attempts = team_arrays(merged_team_data)
+    batched, _ = optimizer(fg_pct, attempts, POINTS, ZONES)
+
+    for row in range(len(attempts)):
+        single, _ = optimizer(fg_pct[row:row + 1], attempts[row:row + 1], POINTS, ZONES)
+        np.testing.assert_allclose(single[0], batched[row], rtol=1e-9)
+
+
+def test_analysis_uses_the_optimizer(merged_team_data):
+    proportional = analyze_shot_optimization(merged_team_data.copy())
+    constrained = analyze_shot_optimization(merged_team_data.copy(), optimizer=ShotMixOptimizer())
+
+    for analysis in (proportional, constrained):
+        optimal_total = sum(analysis[f'{zone}_Optimal_Attempts'] for zone in ZONES)
+        current_total = sum(analysis[f'{zone}_Current_Attempts'] for zone in ZONES)
+        np.testing.assert_allclose(optimal_total, current_total)
+
+    # Today's mix is feasible, so the constrained optimum never scores less
+    assert (constrained['optimal_ppg'] >= constrained['current_ppg'] - 1e-9).all()
+    assert not np.allclose(constrained['AB3_Optimal_Attempts'], proportional['AB3_Optimal_Attempts'])
+
+
+def test_invalid_settings_are_rejected(merged_team_data, monkeypatch):
+    fg_pct, attempts = team_arrays(merged_team_data)
+    with pytest.raises(ValueError):
+        ShotMixOptimizer(curve='cubic')
+    with pytest.raises(ValueError):
+        ShotMixOptimizer(min_share=0.2)(fg_pct, attempts, POINTS, ZONES)
+    with pytest.raises(ValueError):
+        ShotMixOptimizer(curve='power', decay=1.5)(fg_pct, attempts, POINTS, ZONES)
+
+    monkeypatch.delenv('NBA_SHOT_OPTIMIZER', raising=False)
+    assert optimizer_from_env() is None
+    monkeypatch.setenv('NBA_SHOT_OPTIMIZER', 'power')
+    assert optimizer_from_env().curve_name == 'power'
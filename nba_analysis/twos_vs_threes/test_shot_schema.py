@@ -0,0 +1,58 @@
+import os
+
+import pandas as pd
+import pytest
+
+from shot_schema import flatten_columns, normalize_shot_locations, normalize_team_stats, read_shot_locations
+from team_analysis import merge_team_data, shot_types
+
+ZONES = list(shot_types)
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def test_two_row_header_maps_to_internal_columns(data_dir):
+    raw = pd.read_csv('api_nba_team_stats_shot_zones.csv', header=[0, 1])
+    shots = read_shot_locations('api_nba_team_stats_shot_zones.csv', ZONES)
+
+    assert list(shots.columns[:2]) == ['TEAM_ID', 'Team']
+    assert list(shots.columns[2:]) == [f'{zone}_{stat}' for zone in ZONES for stat in ('FGM', 'FGA', 'FG%')]
+    assert shots['RA_FGA'].tolist() == raw[('Restricted Area', 'FGA')].tolist()
+    assert shots['AB3_FG%'].tolist() == pytest.approx((raw[('Above the Break 3', 'FG_PCT')] * 100).tolist())
+
+    # The flattened form kept in the historical store reads the same
+    pd.testing.assert_frame_equal(normalize_shot_locations(flatten_columns(raw), ZONES), shots)
+
+
+def test_aggregate_and_opponent_zones(data_dir):
+    raw = pd.read_csv('api_nba_team_stats_shot_zones.csv', header=[0, 1])
+    extra = normalize_shot_locations(raw, ['BC', 'C3'])
+    assert list(extra.columns[2:]) == [f'{zone}_{stat}' for zone in ('BC', 'C3') for stat in ('FGM', 'FGA', 'FG%')]
+    assert extra['C3_FGA'].tolist() == raw[('Corner 3', 'FGA')].tolist()
+
+    opponent = raw.rename(columns={'FGM': 'OPP_FGM', 'FGA': 'OPP_FGA', 'FG_PCT': 'OPP_FG_PCT'}, level=1)
+    pd.testing.assert_frame_equal(normalize_shot_locations(opponent, ZONES), normalize_shot_locations(raw, ZONES))
+
+
+def test_legacy_files_keep_working():
+    legacy = read_shot_locations(os.path.join(PACKAGE_DIR, 'nba_team_stats_shot_zones.csv'))
+    assert 'C3_FG%' in legacy.columns and 'TEAM_ID' not in legacy.columns
+    assert legacy['RA_FG%'].iloc[0] == 65.2
+
+    stats = normalize_team_stats(pd.read_csv(os.path.join(PACKAGE_DIR, 'nba_team_stats.csv')))
+    assert {'TEAM_NAME', 'GP', 'FTM', 'FT_PCT'} <= set(stats.columns)
+
+
+def test_merge_is_a_join_on_team_id(data_dir):
+    shots = read_shot_locations('api_nba_team_stats_shot_zones.csv', ZONES)
+    stats = pd.read_csv('api_nba_team_stats.csv')
+    merged = merge_team_data(shots, stats)
+
+    # Row order and team names come from the shot data, whatever order the stats are in
+    shuffled = merge_team_data(shots, stats.sample(frac=1, random_state=0).assign(TEAM_NAME='renamed'))
+    pd.testing.assert_frame_equal(shuffled, merged)
+    assert merged['Team'].tolist() == shots['Team'].tolist()
+
+    team = stats.set_index('TEAM_ID').loc[merged['TEAM_ID'].iloc[3]]
+    assert merged['W'].iloc[3] == team['W']
+    assert merged['FT_PCT'].iloc[3] == pytest.approx(team['FT_PCT'] * 100)
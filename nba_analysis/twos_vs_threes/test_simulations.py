@@ -0,0 +1,82 @@
+import numpy as np
+import pytest
+
+import tester_api
+from season_simulator import simulate_league
+
+
+@pytest.fixture(autouse=True)
+def in_process(monkeypatch):
+    monkeypatch.setattr(tester_api, 'SIMULATION_WORKERS', 1)
+    tester_api.simulation_cache.clear()
+    yield
+    tester_api.simulation_cache.clear()
+
+
+def test_single_team_simulates_only_that_team(client):
+    dataset = tester_api.team_data_cache.get()
+    team_name = list(dataset.data['team_index'])[3]
+
+    response = client.get(f'/api/simulations/{team_name}?sims=300&seed=2')
+    assert response.status_code == 200
+    assert [key[1] for key in tester_api.simulation_cache] == [team_name]
+
+
+def test_single_team_matches_the_league_run(client):
+    dataset = tester_api.team_data_cache.get()
+    team_name = list(dataset.data['team_index'])[5]
+    single = client.get(f'/api/simulations/{team_name}?sims=300&seed=2').get_json()
+
+    league = simulate_league(
+        dataset.data['analysis'],
+        dataset.data['inputs']['GP'].to_numpy(),
+        n_sims=300,
+        seed=2
+    )
+    assert single == league[team_name]
+    assert client.get('/api/simulations?sims=300&seed=2').get_json() == league
+
+
+def test_league_reuses_cached_teams(client, monkeypatch):
+    dataset = tester_api.team_data_cache.get()
+    team_name = list(dataset.data['team_index'])[0]
+    client.get(f'/api/simulations/{team_name}?sims=200')
+
+    simulated = []
+    import season_simulator
+    original = season_simulator.simulate_team_summary
+    monkeypatch.setattr(season_simulator, 'simulate_team_summary', lambda params: simulated.append(params[0]) or original(params))
+
+    client.get('/api/simulations?sims=200')
+    assert team_name not in simulated
+    assert len(simulated) == len(dataset.data['team_index']) - 1
+
+
+def test_failed_runs_are_not_cached(client, monkeypatch):
+    dataset = tester_api.team_data_cache.get()
+    team_name = list(dataset.data['team_index'])[0]
+
+    import season_simulator
+    original = season_simulator.simulate_team_summary
+    monkeypatch.setattr(season_simulator, 'simulate_team_summary', lambda params: 1 / 0)
+    assert client.get(f'/api/simulations/{team_name}?sims=200').status_code == 500
+    assert not tester_api.simulation_cache
+
+    monkeypatch.setattr(season_simulator, 'simulate_team_summary', original)
+    assert client.get(f'/api/simulations/{team_name}?sims=200').status_code == 200
+
+
+def test_simulation_arguments_are_validated(client):
+    assert client.get('/api/simulations?sims=0').status_code == 400
+    assert client.get('/api/simulations?seed=-1').status_code == 400
+    assert client.get('/api/simulations/Nowhere?sims=10').status_code == 404
+
+
+def test_seeds_follow_league_positions(merged_team_data):
+    from season_simulator import team_simulation_params
+
+    analysis_df = tester_api.analyze_shot_optimization(merged_team_data)
+    games = merged_team_data['GP'].to_numpy()
+    league = team_simulation_params(analysis_df, games, 10, 4)
+    subset = team_simulation_params(analysis_df.iloc[[7]], games[[7]], 10, 4, positions=np.array([7]))
+    assert subset[0][-1].spawn_key == league[7][-1].spawn_key
@@ -0,0 +1,63 @@
+import gzip
+import json
+
+import pandas as pd
+
+import tester_api
+from snapshots import ENCODINGS, load_snapshot_payloads, publish_snapshot
+from shot_optimizer import ShotMixOptimizer
+from team_analysis import analysis_config
+
+
+def publish_live_payload(client):
+    team_data = client.get('/api/team-data').get_json()
+    return team_data, publish_snapshot(team_data, tester_api.TEAM_DATA_SOURCES, config=tester_api.ANALYSIS_CONFIG)
+
+
+def test_published_snapshot_is_served_pre_encoded(client):
+    team_data, version = publish_live_payload(client)
+    assert publish_snapshot(team_data, tester_api.TEAM_DATA_SOURCES, config=tester_api.ANALYSIS_CONFIG) == version
+
+    response = client.get('/api/team-data', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert response.headers['ETag'] == f'"{version}-gzip"'
+    assert json.loads(gzip.decompress(response.data)) == team_data
+
+    plain = client.get('/api/team-data', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in plain.headers and plain.get_json() == team_data
+    assert client.get('/api/team-data', headers={'If-None-Match': plain.headers['ETag']}).status_code == 304
+
+    team = client.get('/api/team-data/Chicago Bulls', headers={'Accept-Encoding': 'gzip'})
+    assert json.loads(gzip.decompress(team.data)) == team_data['Chicago Bulls']
+    if 'br' in ENCODINGS:
+        assert client.get('/api/team-data', headers={'Accept-Encoding': 'br, gzip'}).headers['Content-Encoding'] == 'br'
+
+
+def test_stale_snapshots_fall_back_to_live_data(client):
+    team_data, _ = publish_live_payload(client)
+
+    stats = pd.read_csv(tester_api.TEAM_DATA_SOURCES[1])
+    stats.loc[stats['TEAM_NAME'] == 'Chicago Bulls', 'W'] += 1
+    stats.to_csv(tester_api.TEAM_DATA_SOURCES[1], index=False)
+
+    response = client.get('/api/team-data', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    live = response.get_json()
+    assert live['Chicago Bulls']['current']['wins'] == team_data['Chicago Bulls']['current']['wins'] + 1
+
+
+def test_snapshots_built_with_other_settings_are_not_served(client):
+    team_data = client.get('/api/team-data').get_json()
+    config = analysis_config(ShotMixOptimizer(curve='power'))
+    assert config != tester_api.ANALYSIS_CONFIG
+
+    version = publish_snapshot(team_data, tester_api.TEAM_DATA_SOURCES, config=config)
+    assert version != publish_snapshot(team_data, tester_api.TEAM_DATA_SOURCES, config=tester_api.ANALYSIS_CONFIG)
+    publish_snapshot(team_data, tester_api.TEAM_DATA_SOURCES, config=config)
+
+    response = client.get('/api/team-data', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+    assert response.get_json() == team_data
+
+    assert load_snapshot_payloads(config=config) is not None
+    assert load_snapshot_payloads(config=tester_api.ANALYSIS_CONFIG) is None
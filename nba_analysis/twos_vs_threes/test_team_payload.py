@@ -0,0 +1,65 @@
+import json
+
+import pytest
+from flask import Flask
+
+import tester_api
+from team_payload import conditional_json, parse_fields, project_payload, response_etag
+
+
+def test_not_modified_skips_building_the_payload(client, monkeypatch):
+    first = client.get('/api/team-data/Chicago Bulls?fields=optimal')
+    assert first.status_code == 200
+    etag = first.headers['ETag'].strip('"')
+    assert set(first.get_json()) == {'optimal'}
+    league_etag = client.get('/api/team-data?fields=optimal').headers['ETag']
+
+    def fail(*args, **kwargs):
+        raise AssertionError("payload built for a 304")
+
+    monkeypatch.setattr(tester_api, 'format_team_payload', fail)
+    revalidated = client.get('/api/team-data/Chicago Bulls?fields=optimal', headers={'If-None-Match': f'"{etag}"'})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert revalidated.headers['ETag'].strip('"') == etag
+
+    assert client.get('/api/team-data?fields=optimal', headers={'If-None-Match': league_etag}).status_code == 304
+
+
+def test_etag_depends_on_projection(client):
+    optimal = client.get('/api/team-data/Chicago Bulls?fields=optimal')
+    current = client.get('/api/team-data/Chicago Bulls?fields=current')
+    assert optimal.headers['ETag'] != current.headers['ETag']
+    stale = client.get('/api/team-data/Chicago Bulls?fields=current', headers={'If-None-Match': optimal.headers['ETag']})
+    assert stale.status_code == 200
+    assert stale.get_json() == current.get_json()
+
+
+def test_conditional_json_honours_if_modified_since():
+    app = Flask(__name__)
+    built = []
+
+    def payload():
+        built.append(True)
+        return {"value": 1}
+
+    with app.test_request_context(headers={'If-Modified-Since': 'Sun, 01 Jan 2040 00:00:00 GMT'}):
+        assert conditional_json(payload, 'v1', 1700000000.0, 'a').status_code == 304
+    assert not built
+
+    with app.test_request_context():
+        response = conditional_json(payload, 'v1', 1700000000.0, 'a')
+        assert response.status_code == 200
+        assert json.loads(response.get_data()) == {"value": 1}
+        assert response.headers['ETag'].strip('"') == response_etag('v1', 'a')
+
+
+def test_unknown_fields_are_rejected(client):
+    assert client.get('/api/team-data?fields=nonsense').status_code == 400
+    with pytest.raises(ValueError):
+        parse_fields('nonsense', tester_api.shot_types)
+
+
+def test_projection_keeps_requested_zone_in_every_section():
+    payload = {'current': {'AB3': 1, 'MR': 2}, 'optimal': {'AB3': 3, 'MR': 4}}
+    assert project_payload(payload, ['AB3'], tester_api.shot_types) == {'current': {'AB3': 1}, 'optimal': {'AB3': 3}}
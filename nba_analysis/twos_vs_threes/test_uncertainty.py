@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import uncertainty
+
+from shot_engine import shot_types
+from uncertainty import compute_intervals, row_seed_keys
+
+
+def test_subset_intervals_match_full_batch(merged_team_data):
+    # 600 resamples spans two chunks
+    full = compute_intervals(merged_team_data, shot_types, resamples=600, seed=3)
+    rows = [0, 7, 29]
+    subset = compute_intervals(merged_team_data.iloc[rows].reset_index(drop=True), shot_types, resamples=600, seed=3)
+    pd.testing.assert_frame_equal(subset, full.iloc[rows].reset_index(drop=True))
+
+
+def test_subset_intervals_match_with_bootstrap(merged_team_data):
+    full = compute_intervals(merged_team_data, shot_types, resamples=200, method='bootstrap')
+    subset = compute_intervals(merged_team_data.iloc[[4]].reset_index(drop=True), shot_types, resamples=200,
+                               method='bootstrap')
+    pd.testing.assert_frame_equal(subset, full.iloc[[4]].reset_index(drop=True))
+
+
+def test_intervals_depend_on_seed_and_bracket(merged_team_data):
+    first = compute_intervals(merged_team_data, shot_types, resamples=300, seed=0)
+    again = compute_intervals(merged_team_data, shot_types, resamples=300, seed=0)
+    other = compute_intervals(merged_team_data, shot_types, resamples=300, seed=1)
+
+    pd.testing.assert_frame_equal(first, again)
+    assert not first.equals(other)
+    assert np.all(first['ppg_difference_lower'] <= first['ppg_difference_upper'])
+    for zone in shot_types:
+        assert np.all(first[f'{zone}_Current_FG%_Lower'] <= first[f'{zone}_Current_FG%_Upper'])
+
+
+def test_row_seed_keys_follow_team_ids(merged_team_data):
+    keys = row_seed_keys(merged_team_data)
+    assert keys == [(team_id,) for team_id in merged_team_data['TEAM_ID']]
+    assert row_seed_keys(merged_team_data.iloc[::-1]) == keys[::-1]
+
+
+def test_rows_per_call_are_capped(merged_team_data, monkeypatch):
+    monkeypatch.setattr(uncertainty, 'INTERVAL_MAX_ROWS', 10)
+    with pytest.raises(ValueError):
+        compute_intervals(merged_team_data, shot_types, resamples=10)
@@ -1,287 +1,927 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request, send_file, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
+import hashlib
+import hmac
 import os
 import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import chain
+
+from data_cache import DatasetCache
+from export import EXPORT_FORMATS, arrow_available, arrow_stream, iter_batches, iter_history_analysis, ndjson_stream
+from matchup import OPPONENT_DATA_SOURCE, build_matchup_matrix, format_matchup
+from metrics import instrument_app, stage
+from player_analysis import (
+    MIN_PLAYER_FGA,
+    PLAYER_DATA_SOURCES,
+    analyze_player_shots,
+    build_player_index,
+    format_player_payload,
+    merge_player_data,
+    team_player_positions
+)
+from rankings import build_ranking_index, query_rankings
+from reports import REPORT_DIR, REPORT_MANIFEST, image_path, load_report_manifest, season_labels
+from scenarios import MAX_SCENARIOS, ScenarioCache, normalize_scenario
+from sensitivity import MAX_SENSITIVITY_SAMPLES, SENSITIVITY_SAMPLES, build_sensitivity
+from shot_schema import read_shot_locations
+from snapshots import LATEST_FILE, SNAPSHOT_DIR, load_latest_snapshot, snapshot_response, team_file_name
+from team_analysis import (
+    TEAM_DATA_SOURCES,
+    analysis_config,
+    analyze_shot_optimization,
+    load_team_data,
+    load_team_history,
+    merge_team_data,
+    shot_optimizer,
+    shot_types
+)
+from team_payload import conditional_json, format_team_payload, parse_fields, project_payload
 
 app = Flask(__name__)
 CORS(app)
 
-# Define shot types and their point values
-shot_types = {
-    'RA': 2,    # Restricted Area (2 points)
-    'NRA': 2,   # Non-Restricted Area / In The Paint (Non-RA) (2 points) 
-    'MR': 2,    # Mid-Range (2 points)
-    'LC3': 3,   # Left Corner 3 (3 points)
-    'RC3': 3,   # Right Corner 3 (3 points)
-    'AB3': 3    # Above Break 3 (3 points)
-}
-
-def calculate_win_impact(current_pts, optimal_pts, current_wins, games_played, plus_minus):
+# Season the live CSVs hold, ranked alongside the seasons in the historical store
+CURRENT_SEASON = os.environ.get('NBA_SEASON', '2024-25')
+CURRENT_SEASON_TYPE = os.environ.get('NBA_SEASON_TYPE', 'Regular Season')
+
+# Shared secret the refresh service sends with reload requests; reloads are refused when unset
+ADMIN_TOKEN = os.environ.get('NBA_ADMIN_TOKEN', '')
+
+# Optimizer and interval settings this process analyzes with; snapshots built with others are not served
+ANALYSIS_CONFIG = analysis_config()
+
+# Model inputs and packed results stay in memory until one of the CSVs changes
+team_data_cache = DatasetCache(TEAM_DATA_SOURCES, load_team_data, refresh=load_team_data)
+
+def load_player_data():
+    """
+    Loads the player CSVs, merges them with player stats and analyzes every player.
+    
+    Returns:
+    dict: The analysis and the player/team index
+    """
+    with stage('csv_read'):
+        player_shots = read_shot_locations(PLAYER_DATA_SOURCES[0], list(shot_types))
+        df_stats = pd.read_csv(PLAYER_DATA_SOURCES[1])
+        team_stats = pd.read_csv(TEAM_DATA_SOURCES[1], usecols=['TEAM_ID', 'TEAM_NAME'])
+    
+    with stage('merge'):
+        team_names = dict(zip(team_stats['TEAM_ID'], team_stats['TEAM_NAME']))
+        merged_data = merge_player_data(player_shots, df_stats, team_names)
+    
+    # All players in one vectorized pass
+    with stage('analysis'):
+        analysis_df = analyze_player_shots(merged_data, optimizer=shot_optimizer)
+    
+    return {'analysis': analysis_df, 'player_index': build_player_index(analysis_df)}
+
+# Player data depends on the team stats too, for the team names
+player_data_cache = DatasetCache(PLAYER_DATA_SOURCES + [TEAM_DATA_SOURCES[1]], load_player_data)
+
+def load_matchup_data():
     """
-    Calculates the projected impact on wins based on scoring changes.
+    Loads team and opponent shot data and projects every team pair.
+    
+    Returns:
+    dict: The matchup matrix from build_matchup_matrix
+    """
+    with stage('csv_read'):
+        transformed_shots = read_shot_locations(TEAM_DATA_SOURCES[0], list(shot_types))
+        df_stats = pd.read_csv(TEAM_DATA_SOURCES[1])
+        opponent_shots = read_shot_locations(OPPONENT_DATA_SOURCE, list(shot_types))
+    
+    with stage('merge'):
+        merged_data = merge_team_data(transformed_shots, df_stats)
+    
+    with stage('matchups'):
+        return build_matchup_matrix(merged_data, opponent_shots, shot_types, optimizer=shot_optimizer)
+
+# All 30x30 matchups, recomputed only when the team or opponent CSVs change
+matchup_cache = DatasetCache(TEAM_DATA_SOURCES + [OPPONENT_DATA_SOURCE], load_matchup_data)
+
+# Pre-serialized responses published at ingest time, reloaded when LATEST moves
+snapshot_cache = DatasetCache([os.path.join(SNAPSHOT_DIR, LATEST_FILE)], load_latest_snapshot)
+
+# Published report figures, reloaded when a report build swaps the manifest
+report_cache = DatasetCache([os.path.join(REPORT_DIR, REPORT_MANIFEST)], load_report_manifest)
+
+# Request latency, stage timings, cache hit ratios and data age at /metrics
+instrument_app(app, 'tester', {
+    'team_data': team_data_cache,
+    'player_data': player_data_cache,
+    'matchups': matchup_cache,
+    'snapshot': snapshot_cache,
+    'reports': report_cache
+})
+
+def current_snapshot():
+    """
+    Returns the latest snapshot if it was built from the current CSVs and settings.
+    
+    A snapshot published with another optimizer or interval setting is
+    stale too, so its bodies never disagree with the live paths.
+    
+    Returns:
+    CachedDataset: The loaded snapshot, or None if missing or stale
+    """
+    try:
+        snapshot = snapshot_cache.get()
+    except FileNotFoundError:
+        return None
+    
+    if snapshot.data['sources'] != team_data_cache.source_hashes():
+        return None
+    if snapshot.data.get('config') != ANALYSIS_CONFIG:
+        return None
+    return snapshot
+
+# Simulation settings: request caps, pool size and how many team results to keep
+MAX_SIMULATIONS = 1000000
+SIMULATION_WORKERS = int(os.environ.get('NBA_SIM_WORKERS', os.cpu_count() or 1))
+SIMULATION_CACHE_SIZE = 256
+simulation_cache = OrderedDict()
+simulation_lock = threading.Lock()
+simulation_pool = None
+
+def simulation_executor():
+    """
+    Returns the process pool shared by all simulation requests.
+    
+    The pool is created on first use and reused for the life of the
+    process. None means teams are simulated in the request's thread.
+    """
+    global simulation_pool
+    if SIMULATION_WORKERS <= 1:
+        return None
+    with simulation_lock:
+        if simulation_pool is None:
+            simulation_pool = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS)
+        return simulation_pool
+
+def simulate_team_data(dataset, n_sims, seed, team_names=None):
+    """
+    Returns season simulations for the requested teams, reusing earlier identical runs.
+    
+    Results are deterministic for a dataset version, team, simulation count
+    and seed, so each team is cached on exactly that key. Only teams
+    without a result are simulated. The lock guards the cache bookkeeping
+    only; a team being simulated is held as a Future, so other requests for
+    it wait on that run and requests for other teams proceed.
     
     Parameters:
-    current_pts (float): Current points per game
-    optimal_pts (float): Projected optimal points per game
-    current_wins (int): Current number of wins
-    games_played (int): Number of games played
-    plus_minus (float): Current point differential per game
+    dataset (CachedDataset): Current team data from team_data_cache
+    n_sims (int): Seasons to simulate per team
+    seed (int): Root seed
+    team_names (list): Teams to simulate, None for every team
+    
+    Returns:
+    dict: Team name to simulation summary
+    """
+    # Imported on first use, the simulator is not needed to serve team data
+    from season_simulator import simulate_team_summary, team_simulation_params
+    
+    team_index = dataset.data['team_index']
+    if team_names is None:
+        team_names = list(team_index)
+    
+    futures = {}
+    owned = {}
+    with simulation_lock:
+        for team_name in team_names:
+            key = (dataset.version, team_name, n_sims, seed)
+            if key in simulation_cache:
+                simulation_cache.move_to_end(key)
+            else:
+                simulation_cache[key] = owned[team_name] = Future()
+                while len(simulation_cache) > SIMULATION_CACHE_SIZE:
+                    simulation_cache.popitem(last=False)
+            futures[team_name] = simulation_cache[key]
+    
+    if owned:
+        try:
+            positions = np.array([team_index[team_name] for team_name in owned])
+            params = team_simulation_params(
+                dataset.data['analysis'].iloc[positions].reset_index(drop=True),
+                dataset.data['inputs']['GP'].to_numpy()[positions],
+                n_sims,
+                seed,
+                shot_types,
+                positions=positions
+            )
+            pool = simulation_executor() if len(params) > 1 else None
+            with stage('simulation'):
+                summaries = pool.map(simulate_team_summary, params) if pool else map(simulate_team_summary, params)
+                for team_name, summary in summaries:
+                    owned[team_name].set_result(summary)
+        except Exception as e:
+            # Later requests retry instead of reading the failure from the cache
+            with simulation_lock:
+                for team_name, future in owned.items():
+                    simulation_cache.pop((dataset.version, team_name, n_sims, seed), None)
+                    if not future.done():
+                        future.set_exception(e)
+            raise
+    
+    return {team_name: future.result() for team_name, future in futures.items()}
+
+def simulation_args():
+    """
+    Reads and validates the sims and seed query parameters.
     
     Returns:
-    dict: Dictionary containing win impact analysis
+    tuple: (n_sims, seed)
     """
-    # Calculate how the scoring change would affect point differential
-    pts_difference = optimal_pts - current_pts
-    new_plus_minus = plus_minus + pts_difference
-    
-    # Calculate win probability based on new point differential
-    # Using the Pythagorean expectation formula adapted for basketball
-    # Typically uses 16.5 as the exponent for NBA games
-    PYTH_EXP = 16.5
-    
-    # Calculate current win percentage
-    current_win_pct = current_wins / games_played
-    
-    # Calculate new expected win percentage
-    if new_plus_minus >= 0:
-        new_win_pct = 1 / (1 + (1 / (new_plus_minus + 10)) ** PYTH_EXP)
-    else:
-        new_win_pct = 1 / (1 + (-new_plus_minus + 10) ** PYTH_EXP)
-    
-    # Project wins over the same number of games
-    projected_wins = round(new_win_pct * games_played, 1)
-    win_difference = projected_wins - current_wins
-    
-    return {
-        "current_wins": current_wins,
-        "current_win_pct": current_win_pct * 100,
-        "projected_wins": projected_wins,
-        "projected_win_pct": new_win_pct * 100,
-        "win_difference": win_difference,
-        "current_plus_minus": plus_minus,
-        "projected_plus_minus": new_plus_minus
-    }
-
-def transform_shot_location_data(df_shots):
+    n_sims = request.args.get('sims', 100000, type=int)
+    seed = request.args.get('seed', 0, type=int)
+    if not 1 <= n_sims <= MAX_SIMULATIONS:
+        raise ValueError(f"sims must be between 1 and {MAX_SIMULATIONS}")
+    if seed < 0:
+        raise ValueError("seed must be non-negative")
+    return n_sims, seed
+
+# Marginal values and mix frontiers, keyed on dataset version, samples and seed
+SENSITIVITY_CACHE_SIZE = 8
+sensitivity_cache = OrderedDict()
+sensitivity_lock = threading.Lock()
+
+def team_sensitivity(dataset, samples, seed):
     """
-    Transforms the NBA API shot location data into our analysis format.
+    Returns marginal values and frontiers for every team, reusing earlier identical sweeps.
+    
+    As in simulate_team_data, the lock guards the cache bookkeeping only. A
+    sweep being built is held as a Future, so requests for the same key wait
+    on that sweep while hits and sweeps for other keys proceed.
     
     Parameters:
-    df_shots (DataFrame): Raw shot location data from NBA API
+    dataset (CachedDataset): Current team data from team_data_cache
+    samples (int): Candidate mixes per team
+    seed (int): Root seed
     
     Returns:
-    DataFrame: Transformed data with standardized column names
+    dict: Team name to sensitivity results
     """
-    transformed_data = []
-    
-    for _, row in df_shots.iterrows():
-        team_data = {'Team': row['TEAM_NAME']}
-        
-        # Map API zones to our internal format
-        zone_mapping = {
-            'Restricted Area': 'RA',
-            'In The Paint (Non-RA)': 'NRA',
-            'Mid-Range': 'MR',
-            'Left Corner 3': 'LC3',
-            'Right Corner 3': 'RC3',
-            'Above the Break 3': 'AB3'
-        }
-        
-        # Transform each zone's data
-        for api_zone, internal_zone in zone_mapping.items():
-            fgm = row[f'{api_zone} FGM']
-            fga = row[f'{api_zone} FGA']
-            fg_pct = row[f'{api_zone} FG_PCT'] * 100  # Convert decimal to percentage
-            
-            team_data.update({
-                f'{internal_zone}_FGM': fgm,
-                f'{internal_zone}_FGA': fga,
-                f'{internal_zone}_FG%': fg_pct
-            })
-        
-        transformed_data.append(team_data)
+    key = (dataset.version, samples, seed)
+    with sensitivity_lock:
+        future = sensitivity_cache.get(key)
+        owned = future is None
+        if owned:
+            future = sensitivity_cache[key] = Future()
+            while len(sensitivity_cache) > SENSITIVITY_CACHE_SIZE:
+                sensitivity_cache.popitem(last=False)
+        else:
+            sensitivity_cache.move_to_end(key)
     
-    return pd.DataFrame(transformed_data)
+    if owned:
+        try:
+            with stage('sensitivity'):
+                future.set_result(build_sensitivity(
+                    dataset.data['inputs'],
+                    shot_types,
+                    samples=samples,
+                    seed=seed,
+                    optimizer=shot_optimizer
+                ))
+        except Exception as e:
+            # Later requests retry instead of reading the failure from the cache
+            with sensitivity_lock:
+                if sensitivity_cache.get(key) is future:
+                    sensitivity_cache.pop(key)
+            future.set_exception(e)
+            raise
+    
+    return future.result()
+
+def sensitivity_args():
+    """
+    Reads and validates the samples and seed query parameters.
+    
+    Returns:
+    tuple: (samples, seed)
+    """
+    samples = request.args.get('samples', SENSITIVITY_SAMPLES, type=int)
+    seed = request.args.get('seed', 0, type=int)
+    if not 2 <= samples <= MAX_SENSITIVITY_SAMPLES:
+        raise ValueError(f"samples must be between 2 and {MAX_SENSITIVITY_SAMPLES}")
+    if seed < 0:
+        raise ValueError("seed must be non-negative")
+    return samples, seed
+
+# What-if results for the UI sliders, keyed on dataset version and scenario
+scenario_cache = ScenarioCache()
 
-def merge_team_data(df_shots, df_stats):
+def ranking_analysis(analysis_df):
     """
-    Merges shot location data with team stats and calculates per game averages.
+    Returns the analysis of every stored season plus the live season, for ranking.
+    
+    The live CSVs stand in for any stored snapshots of the current season.
+    Without a historical store (or pyarrow) only the live season is ranked.
     
     Parameters:
-    df_shots (DataFrame): Transformed shot location data
-    df_stats (DataFrame): Team stats data from NBA API
+    analysis_df (DataFrame): Analysis of the live CSVs
     
     Returns:
-    DataFrame: Merged data with all necessary statistics
+    DataFrame: Analysis rows with Season and Season_Type columns
     """
-    # Create a mapping of relevant team stats
-    team_stats = df_stats[['TEAM_NAME', 'FTM', 'FTA', 'FT_PCT', 'PTS', 'GP', 'W', 'L', 'PLUS_MINUS']].copy()
-    team_stats.columns = ['Team', 'FT_FGM', 'FT_FGA', 'FT_PCT', 'PTS', 'GP', 'W', 'L', 'PLUS_MINUS']
+    current = analysis_df.assign(Season=CURRENT_SEASON, Season_Type=CURRENT_SEASON_TYPE)
+    try:
+        merged_history = load_team_history()
+    except (ImportError, FileNotFoundError):
+        return current
     
-    # Convert FT_PCT to percentage format to match our other percentages
-    team_stats['FT_PCT'] = team_stats['FT_PCT'] * 100
+    stored = ~((merged_history['Season'] == CURRENT_SEASON) & (merged_history['Season_Type'] == CURRENT_SEASON_TYPE))
+    merged_history = merged_history[stored].reset_index(drop=True)
+    if merged_history.empty:
+        return current
     
-    # Merge shot location data with team stats
-    merged_df = df_shots.merge(team_stats, on='Team', how='inner')
+    history_analysis = analyze_shot_optimization(merged_history, optimizer=shot_optimizer)
+    return pd.concat([history_analysis, current], ignore_index=True)
+
+# Ranking index for the current team data and the historical store it was built with
+ranking_cache = {}
+ranking_lock = threading.Lock()
+ranking_build_lock = threading.Lock()
+
+def build_rankings(dataset, key):
+    """
+    Builds the ranking index for a dataset and swaps it in once complete.
     
-    return merged_df
+    Parameters:
+    dataset (CachedDataset): Current team data from team_data_cache
+    key (tuple): Dataset version and store signature the index is built for
+    """
+    with ranking_build_lock:
+        # Another thread may have built this version while this one waited
+        if ranking_cache.get('key') == key:
+            return
+        with stage('rankings'):
+            analysis_df = ranking_analysis(dataset.data['analysis'])
+            ranking_index = build_ranking_index(analysis_df)
+        with ranking_lock:
+            ranking_cache['index'] = ranking_index
+            ranking_cache['version'] = hashlib.sha256(repr(key).encode()).hexdigest()[:16]
+            ranking_cache['key'] = key
 
-def analyze_shot_optimization(df):
+def rebuild_rankings(dataset, key):
     """
-    Analyzes shot selection optimization including free throws and win impact.
+    Background version of build_rankings, logging instead of raising.
     """
-    # Previous EV and optimization calculations remain the same...
-    # Calculate EV for each shot type
-    for shot_type, points in shot_types.items():
-        df[f'EV_{shot_type}'] = (df[f'{shot_type}_FG%'] / 100) * points
-    
-    # Calculate free throw EV
-    df['EV_FT'] = (df['FT_PCT'] / 100) * 1  # 1 point per free throw
-    
-    # Calculate total field goal attempts
-    df['Total_FGA'] = sum(df[f'{shot_type}_FGA'] for shot_type in shot_types)
-    
-    analysis_results = []
-    
-    for _, team in df.iterrows():
-        team_analysis = {'Team': team['Team']}
-        
-        # Calculate current points from field goals and free throws
-        current_fg_points = 0
-        for shot_type, points in shot_types.items():
-            current_attempts = team[f'{shot_type}_FGA']
-            current_fg_pct = team[f'{shot_type}_FG%'] / 100
-            current_makes = current_attempts * current_fg_pct
-            current_points = current_makes * points
-            current_fg_points += current_points
-        
-        current_ft_points = team['FT_FGM'] * 1
-        current_total_points = current_fg_points + current_ft_points
-        
-        # Calculate optimal distribution (keeping free throws constant)
-        shot_evs = {shot_type: team[f'{shot_type}_FG%'] / 100 * points 
-                   for shot_type, points in shot_types.items()}
-        total_ev = sum(shot_evs.values())
-        
-        optimal_fg_points = 0
-        for shot_type, points in shot_types.items():
-            fg_pct = team[f'{shot_type}_FG%'] / 100
-            ev = fg_pct * points
-            
-            # Current statistics
-            current_attempts = team[f'{shot_type}_FGA']
-            current_makes = current_attempts * fg_pct
-            
-            # Optimal statistics
-            optimal_proportion = shot_evs[shot_type] / total_ev
-            optimal_attempts = team['Total_FGA'] * optimal_proportion
-            optimal_makes = optimal_attempts * fg_pct
-            optimal_points = optimal_makes * points
-            optimal_fg_points += optimal_points
-            
-            attempt_difference = optimal_attempts - current_attempts
-            makes_difference = optimal_makes - current_makes
-            
-            team_analysis.update({
-                f'{shot_type}_Current_FG%': fg_pct,
-                f'{shot_type}_EV': ev,
-                f'{shot_type}_Current_Attempts': current_attempts,
-                f'{shot_type}_Current_Makes': current_makes,
-                f'{shot_type}_Optimal_Attempts': optimal_attempts,
-                f'{shot_type}_Optimal_Makes': optimal_makes,
-                f'{shot_type}_Attempt_Diff': attempt_difference,
-                f'{shot_type}_Makes_Diff': makes_difference
-            })
-        
-        optimal_total_points = optimal_fg_points + current_ft_points
-        
-        # Calculate win impact
-        win_impact = calculate_win_impact(
-            current_total_points,
-            optimal_total_points,
-            team['W'],
-            team['GP'],
-            team['PLUS_MINUS']
-        )
+    try:
+        build_rankings(dataset, key)
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+
+def team_rankings(dataset, wait=False):
+    """
+    Returns the ranking index, rebuilt when the team data or the historical store changes.
+    
+    The index is built at warm-up and on reload. When a request finds it out
+    of date, it is rebuilt in a background thread and the previous index is
+    served meanwhile, so requests only read arrays. Only the very first
+    index, or a call with wait True, is built in the calling thread.
+    
+    Parameters:
+    dataset (CachedDataset): Current team data from team_data_cache
+    wait (bool): Build an out-of-date index before returning
+    
+    Returns:
+    tuple: (season label (or ALL_SEASONS) to RankingGroup, version of the index)
+    """
+    # Imported on first use, the store is only needed for the rankings and history
+    from history_store import store_signature
+    
+    key = (dataset.version, store_signature(['team_stats', 'shot_locations']))
+    with ranking_lock:
+        current = ranking_cache.get('key') == key
+        loaded = 'index' in ranking_cache
+    
+    if not current:
+        if wait or not loaded:
+            build_rankings(dataset, key)
+        elif not ranking_build_lock.locked():
+            threading.Thread(target=rebuild_rankings, args=(dataset, key), daemon=True).start()
+    
+    with ranking_lock:
+        return ranking_cache['index'], ranking_cache['version']
+
+@app.route('/api/cache-stats', methods=['GET'])
+def cache_stats():
+    return jsonify(dict(team_data_cache.stats(), players=player_data_cache.stats(), scenarios=scenario_cache.stats()))
+
+@app.route('/api/admin/reload', methods=['POST'])
+def reload_data():
+    # Only callers holding the shared admin token, i.e. the refresh service, may trigger a reload
+    token = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    if not ADMIN_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_TOKEN.encode()):
+        return jsonify({"error": "Forbidden"}), 403
+    
+    try:
+        reloaded = team_data_cache.reload()
+        team_rankings(team_data_cache.get(), wait=True)
+        try:
+            snapshot_cache.reload()
+        except FileNotFoundError:
+            pass
         
-        team_analysis.update({
-            'current_ppg': current_total_points,
-            'optimal_ppg': optimal_total_points,
-            'ft_points': current_ft_points,
-            'ft_attempts': team['FT_FGA'],
-            'ft_percentage': team['FT_PCT'],
-            **win_impact  # Add all win impact metrics
-        })
+        return jsonify({"reloaded": reloaded, "version": team_data_cache.stats()['version']})
         
-        analysis_results.append(team_analysis)
-    
-    return pd.DataFrame(analysis_results)
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
 
 @app.route('/api/team-data', methods=['GET'])
 def serve_team_data():
     try:
-        # Load and process API data
-        df_shots = pd.read_csv('api_nba_team_stats_shot_zones.csv')
-        df_stats = pd.read_csv('api_nba_team_stats.csv')
+        fields = parse_fields(request.args.get('fields'), shot_types)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        # Serve the pre-serialized document when no projection was requested
+        snapshot = None if fields else current_snapshot()
+        if snapshot is not None:
+            return snapshot_response(
+                snapshot.data['team_data'],
+                snapshot.data['version'],
+                snapshot.data['created_at']
+            )
         
-        # Transform and merge data
-        transformed_shots = transform_shot_location_data(df_shots)
-        merged_data = merge_team_data(transformed_shots, df_stats)
+        dataset = team_data_cache.get()
+        analysis_df = dataset.data['analysis']
+        intervals_df = dataset.data['intervals']
+        
+        # Format response, only when the client's copy is not current
+        def build_team_data():
+            with stage('json'):
+                team_rows = analysis_df.to_dict('records')
+                interval_rows = intervals_df.to_dict('records')
+                team_data = {}
+                for team_name, position in dataset.data['team_index'].items():
+                    team_payload = format_team_payload(
+                        team_rows[position],
+                        shot_types,
+                        include_wins=True,
+                        intervals=interval_rows[position]
+                    )
+                    team_data[team_name] = project_payload(team_payload, fields, shot_types)
+                return team_data
+        
+        return conditional_json(build_team_data, dataset.version, dataset.modified_at, ','.join(fields))
+        
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/team-data/<team_name>', methods=['GET'])
+def serve_single_team_data(team_name):
+    try:
+        fields = parse_fields(request.args.get('fields'), shot_types)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        snapshot = None if fields else current_snapshot()
+        if snapshot is not None and team_name in snapshot.data['teams']:
+            return snapshot_response(
+                snapshot.data['teams'][team_name],
+                f"{snapshot.data['version']}-{team_file_name(team_name)}",
+                snapshot.data['created_at']
+            )
+        
+        dataset = team_data_cache.get()
+        position = dataset.data['team_index'].get(team_name)
+        if position is None:
+            return jsonify({"error": f"Unknown team '{team_name}'"}), 404
         
-        # Perform analysis
-        analysis_df = analyze_shot_optimization(merged_data)
+        def build_team_payload():
+            with stage('json'):
+                team_payload = format_team_payload(
+                    dataset.data['analysis'].iloc[position],
+                    shot_types,
+                    include_wins=True,
+                    intervals=dataset.data['intervals'].iloc[position]
+                )
+                return project_payload(team_payload, fields, shot_types)
+        
+        return conditional_json(
+            build_team_payload,
+            dataset.version,
+            dataset.modified_at,
+            team_name,
+            ','.join(fields)
+        )
         
-        # Format response
-        team_data = {}
-        for team_name in merged_data['Team'].unique():
-            team_analysis = analysis_df[analysis_df['Team'] == team_name].iloc[0]
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/players/<int:player_id>', methods=['GET'])
+def serve_player_data(player_id):
+    try:
+        dataset = player_data_cache.get()
+        position = dataset.data['player_index']['players'].get(player_id)
+        if position is None:
+            return jsonify({"error": f"Unknown player {player_id}"}), 404
+        
+        return conditional_json(
+            lambda: format_player_payload(dataset.data['analysis'].iloc[position], shot_types),
+            dataset.version,
+            dataset.modified_at,
+            'player',
+            str(player_id)
+        )
+        
+    except FileNotFoundError as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": "Player data has not been fetched"}), 503
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/teams/<team_name>/players', methods=['GET'])
+def serve_team_players(team_name):
+    try:
+        min_attempts = float(request.args.get('min_attempts', MIN_PLAYER_FGA))
+    except ValueError:
+        return jsonify({"error": "min_attempts must be a number"}), 400
+    
+    try:
+        dataset = player_data_cache.get()
+        analysis_df = dataset.data['analysis']
+        positions = team_player_positions(
+            dataset.data['player_index'],
+            analysis_df['Season_FGA'].to_numpy(),
+            team_name,
+            min_attempts
+        )
+        if positions is None:
+            return jsonify({"error": f"Unknown team '{team_name}'"}), 404
+        
+        def build_players():
+            with stage('json'):
+                player_rows = analysis_df.iloc[positions].to_dict('records')
+                players = [format_player_payload(player_analysis, shot_types) for player_analysis in player_rows]
+                return {"team": team_name, "min_attempts": min_attempts, "players": players}
+        
+        return conditional_json(
+            build_players,
+            dataset.version,
+            dataset.modified_at,
+            'players',
+            team_name,
+            str(min_attempts)
+        )
+        
+    except FileNotFoundError as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": "Player data has not been fetched"}), 503
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/matchup/<home>/<away>', methods=['GET'])
+def serve_matchup(home, away):
+    mix = request.args.get('mix', 'current')
+    if mix not in ('current', 'optimal'):
+        return jsonify({"error": "mix must be 'current' or 'optimal'"}), 400
+    if home == away:
+        return jsonify({"error": "A team cannot play itself"}), 400
+    
+    try:
+        dataset = matchup_cache.get()
+        unknown = [team for team in (home, away) if team not in dataset.data['team_index']]
+        if unknown:
+            return jsonify({"error": f"Unknown teams: {', '.join(unknown)}"}), 404
+        
+        return conditional_json(
+            lambda: format_matchup(dataset.data, home, away, optimal=mix == 'optimal'),
+            dataset.version,
+            dataset.modified_at,
+            'matchup',
+            home,
+            away,
+            mix
+        )
+        
+    except FileNotFoundError as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": "Opponent shot data has not been fetched"}), 503
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/rankings', methods=['GET'])
+def serve_rankings():
+    try:
+        dataset = team_data_cache.get()
+        ranking_index, ranking_version = team_rankings(dataset)
+        
+        metric = request.args.get('metric')
+        if not metric:
+            first_group = next(iter(ranking_index.values()))
+            return jsonify({"metrics": sorted(first_group.values), "seasons": list(ranking_index)})
+        
+        season = request.args.get('season')
+        season_type = request.args.get('season_type')
+        team = request.args.get('team')
+        order = request.args.get('order', 'desc')
+        top = request.args.get('top', '10')
+        if not top.isdecimal() or int(top) < 1:
+            return jsonify({"error": "top must be a positive integer"}), 400
+        top = int(top)
+        try:
+            if order not in ('asc', 'desc'):
+                raise ValueError("order must be 'asc' or 'desc'")
+            rankings = query_rankings(
+                ranking_index, metric, season, top, team, ascending=order == 'asc', season_type=season_type
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        if team is not None and rankings['team'] is None:
+            return jsonify({"error": f"Unknown team '{team}'"}), 404
+        
+        return conditional_json(
+            rankings,
+            ranking_version,
+            dataset.modified_at,
+            'rankings',
+            metric,
+            rankings['season'],
+            str(top),
+            team or '',
+            order
+        )
+        
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/export', methods=['GET'])
+def serve_export():
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {', '.join(EXPORT_FORMATS)}"}), 400
+    if export_format == 'arrow' and not arrow_available():
+        return jsonify({"error": "Arrow exports need pyarrow installed on the server"}), 501
+    
+    teams_arg = request.args.get('teams')
+    teams = [team.strip() for team in teams_arg.split(',') if team.strip()] if teams_arg else None
+    season_type = request.args.get('season_type')
+    season_types = [season_type] if season_type else None
+    season_arg = request.args.get('season')
+    
+    try:
+        if season_arg:
+            # Imported on first use, only multi-season exports read the store
+            from history_store import expand_seasons
             
-            team_data[team_name] = {
-                "current": {
-                    "ppg": float(team_analysis['current_ppg']),
-                    "wins": float(team_analysis['current_wins']),
-                    "win_percentage": float(team_analysis['current_win_pct']),
-                    "plus_minus": float(team_analysis['current_plus_minus']),
-                    "free_throws": {
-                        "attempts": float(team_analysis['ft_attempts']),
-                        "percentage": float(team_analysis['ft_percentage']),
-                        "points": float(team_analysis['ft_points'])
-                    }
-                },
-                "optimal": {
-                    "ppg": float(team_analysis['optimal_ppg']),
-                    "projected_wins": float(team_analysis['projected_wins']),
-                    "projected_win_percentage": float(team_analysis['projected_win_pct']),
-                    "projected_plus_minus": float(team_analysis['projected_plus_minus'])
-                },
-                "impact": {
-                    "points_difference": float(team_analysis['optimal_ppg'] - team_analysis['current_ppg']),
-                    "wins_difference": float(team_analysis['win_difference']),
-                    "plus_minus_difference": float(team_analysis['projected_plus_minus'] - team_analysis['current_plus_minus'])
-                }
-            }
+            try:
+                seasons = expand_seasons(season_arg)
+            except ValueError:
+                return jsonify({"error": f"Invalid season '{season_arg}'"}), 400
             
-            for shot_type in shot_types:
-                team_data[team_name]["current"][shot_type] = {
-                    "attempts": float(team_analysis[f'{shot_type}_Current_Attempts']),
-                    "makes": float(team_analysis[f'{shot_type}_Current_Makes']),
-                    "percentage": float(team_analysis[f'{shot_type}_Current_FG%']),
-                    "ev": float(team_analysis[f'{shot_type}_EV'])
-                }
-                
-                team_data[team_name]["optimal"][shot_type] = {
-                    "attempts": float(team_analysis[f'{shot_type}_Optimal_Attempts']),
-                    "makes": float(team_analysis[f'{shot_type}_Optimal_Makes'])
-                }
-                
-                team_data[team_name]["impact"][shot_type] = {
-                    "attempt_difference": float(team_analysis[f'{shot_type}_Attempt_Diff']),
-                    "makes_difference": float(team_analysis[f'{shot_type}_Makes_Diff'])
-                }
-        
-        return jsonify(team_data)
+            # One season is loaded and analyzed at a time while the previous one streams out
+            frames = iter_history_analysis(
+                seasons,
+                season_types,
+                teams,
+                load_team_history,
+                lambda merged_data: analyze_shot_optimization(merged_data, optimizer=shot_optimizer)
+            )
+        else:
+            analysis_df = team_data_cache.get().data['analysis']
+            if teams is not None:
+                analysis_df = analysis_df[analysis_df['Team'].isin(teams)]
+            frames = [analysis_df]
+        
+        # Produce the first batch up front so a bad request fails with a status, not a cut-off stream
+        batches = iter_batches(frames)
+        first_batch = next(batches, None)
+        if first_batch is None:
+            return jsonify({"error": "No analysis rows match the filters"}), 404
+        
+        encode = arrow_stream if export_format == 'arrow' else ndjson_stream
+        return Response(
+            stream_with_context(encode(chain([first_batch], batches))),
+            mimetype=EXPORT_FORMATS[export_format]
+        )
+        
+    except FileNotFoundError as e:
+        print("ERROR:", str(e), flush=True)
+        if season_arg:
+            return jsonify({"error": "No seasons have been stored in the historical store"}), 404
+        return jsonify({"error": "Team data has not been fetched"}), 503
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/reports', methods=['GET'])
+def serve_report_index():
+    try:
+        manifest = report_cache.get()
+        reports = {name: f'/api/reports/{name}.png' for name in manifest.data['reports']}
+        return conditional_json(
+            {"created_at": manifest.data['created_at'], "reports": reports},
+            manifest.version,
+            manifest.modified_at,
+            'reports'
+        )
+        
+    except FileNotFoundError as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": "Reports have not been built"}), 503
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/reports/<path:name>.png', methods=['GET'])
+def serve_report(name):
+    try:
+        key = report_cache.get().data['reports'].get(name)
+        if key is None:
+            return jsonify({"error": f"Unknown report '{name}'"}), 404
+        
+        # Images are immutable under their content key, which doubles as the ETag.
+        # send_file resolves relative paths against the app root, not the working directory
+        path = os.path.abspath(image_path(key, REPORT_DIR))
+        response = send_file(path, mimetype='image/png', etag=key, conditional=True)
+        response.cache_control.no_cache = True
+        return response
+        
+    except FileNotFoundError as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": "Reports have not been built"}), 503
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/history/team-data', methods=['GET'])
+def serve_team_history():
+    season_arg = request.args.get('season')
+    season_type = request.args.get('season_type')
+    zones_arg = request.args.get('zones')
+    zones = [zone.strip() for zone in zones_arg.split(',')] if zones_arg else list(shot_types)
+    unknown = [zone for zone in zones if zone not in shot_types]
+    if unknown:
+        return jsonify({"error": f"Unknown zones: {', '.join(unknown)}"}), 400
+    
+    try:
+        # Imported on first use, only the history endpoints read the store
+        from history_store import expand_seasons
+        
+        if season_arg:
+            try:
+                expand_seasons(season_arg)
+            except ValueError:
+                return jsonify({"error": f"Invalid season '{season_arg}'"}), 400
+        
+        merged_data = load_team_history(season_arg, [season_type] if season_type else None, zones)
+        if merged_data.empty:
+            return jsonify({"error": "No stored seasons match the filters"}), 404
+        
+        zone_types = {zone: shot_types[zone] for zone in zones}
+        analysis_df = analyze_shot_optimization(merged_data, zone_types)
+        
+        # Rows are built column by column, not as one Series per team
+        history = {}
+        for label, team_analysis in zip(season_labels(analysis_df).tolist(), analysis_df.to_dict('records')):
+            history.setdefault(label, {})[team_analysis['Team']] = format_team_payload(
+                team_analysis, zone_types, include_wins=True
+            )
+        
+        return jsonify(history)
+        
+    except ImportError as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": "The historical store needs pyarrow installed on the server"}), 501
+    except FileNotFoundError as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": "No seasons have been stored in the historical store"}), 404
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/simulations', methods=['GET'])
+def serve_simulations():
+    try:
+        n_sims, seed = simulation_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        dataset = team_data_cache.get()
+        return conditional_json(
+            lambda: simulate_team_data(dataset, n_sims, seed),
+            dataset.version,
+            dataset.modified_at,
+            'simulations',
+            str(n_sims),
+            str(seed)
+        )
+        
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/simulations/<team_name>', methods=['GET'])
+def serve_team_simulation(team_name):
+    try:
+        n_sims, seed = simulation_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        dataset = team_data_cache.get()
+        if team_name not in dataset.data['team_index']:
+            return jsonify({"error": f"Unknown team '{team_name}'"}), 404
+        
+        return conditional_json(
+            lambda: simulate_team_data(dataset, n_sims, seed, [team_name])[team_name],
+            dataset.version,
+            dataset.modified_at,
+            'simulations',
+            team_name,
+            str(n_sims),
+            str(seed)
+        )
+        
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/sensitivity', methods=['GET'])
+def serve_sensitivity():
+    try:
+        samples, seed = sensitivity_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        dataset = team_data_cache.get()
+        # Marginal values only, each team's frontiers are served on its own
+        def build_marginals():
+            sensitivity = team_sensitivity(dataset, samples, seed)
+            return {team: results['marginals'] for team, results in sensitivity.items()}
+        
+        return conditional_json(build_marginals, dataset.version, dataset.modified_at, 'sensitivity', str(samples), str(seed))
+        
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/sensitivity/<team_name>', methods=['GET'])
+def serve_team_sensitivity(team_name):
+    try:
+        samples, seed = sensitivity_args()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        dataset = team_data_cache.get()
+        if team_name not in dataset.data['team_index']:
+            return jsonify({"error": f"Unknown team '{team_name}'"}), 404
+        
+        return conditional_json(
+            lambda: team_sensitivity(dataset, samples, seed)[team_name],
+            dataset.version,
+            dataset.modified_at,
+            'sensitivity',
+            team_name,
+            str(samples),
+            str(seed)
+        )
+        
+    except Exception as e:
+        print("ERROR:", str(e), flush=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/scenarios', methods=['POST'])
+def serve_scenarios():
+    body = request.get_json(silent=True)
+    scenarios = body.get('scenarios') if isinstance(body, dict) else body
+    if not isinstance(scenarios, list) or not scenarios:
+        return jsonify({"error": "Expected a non-empty list of scenarios"}), 400
+    if len(scenarios) > MAX_SCENARIOS:
+        return jsonify({"error": f"At most {MAX_SCENARIOS} scenarios per request"}), 400
+    
+    try:
+        normalized = [normalize_scenario(scenario, list(shot_types)) for scenario in scenarios]
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    try:
+        dataset = team_data_cache.get()
+        unknown = sorted({team for team, _, _ in normalized if team not in dataset.data['team_index']})
+        if unknown:
+            return jsonify({"error": f"Unknown teams: {', '.join(unknown)}"}), 404
+        
+        results = scenario_cache.evaluate(dataset, normalized, shot_types)
+        return jsonify({"version": dataset.version, "results": results})
         
     except Exception as e:
         print("ERROR:", str(e), flush=True)
@@ -293,4 +933,5 @@ if __name__ == '__main__':
     print("\n=== Starting Flask Server ===", flush=True)
     print("Try accessing: http://127.0.0.1:5000/test", flush=True)
     sys.stdout.flush()
+    # Debug server for development; serve.py runs the preloaded multi-worker setup
     app.run(debug=True, port=5000)
\ No newline at end of file
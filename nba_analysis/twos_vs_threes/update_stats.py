@@ -1,18 +1,30 @@
 import schedule
 import time
 from create_stats_csv import fetch_nba_stats
+from refresh_service import refresh_team_data
 
 def update_job():
     print("Updating NBA stats...")
     fetch_nba_stats()
 
+def refresh_job():
+    print("Refreshing API team data...")
+    try:
+        refresh_team_data()
+    except Exception as e:
+        print(f"Error refreshing API team data: {str(e)}")
+
 # Schedule the update to run daily at midnight
 schedule.every().day.at("00:00").do(update_job)
 
+# Refresh the API data intraday; only teams whose stats moved are recomputed
+schedule.every(15).minutes.do(refresh_job)
+
 # Run once immediately when starting
 update_job()
+refresh_job()
 
 # Keep the script running
 while True:
     schedule.run_pending()
-    time.sleep(60)  # Check every minute 
\ No newline at end of file
+    time.sleep(60)  # Check every minute
\ No newline at end of file
@@ -54,14 +54,16 @@ const ShotAnalysisDashboard = () => {
       
       setLoading(true);
       try {
-        const response = await fetch('http://127.0.0.1:5000/api/team-data');
-        const allTeamData = await response.json();
-        const teamData = allTeamData[selectedTeam];
+        const response = await fetch(
+          `http://127.0.0.1:5000/api/team-data/${encodeURIComponent(selectedTeam)}`
+        );
         
-        if (!teamData) {
+        if (!response.ok) {
           throw new Error('Team data not found');
         }
 
+        const teamData = await response.json();
+
         const formattedData = {
           shot_analysis: {
             RA: {
@@ -127,13 +129,27 @@ const ShotAnalysisDashboard = () => {
           }
         };
 
+        // Simulated win impact when the backend offers it, else a rough points-to-wins rule
+        let winsImpact = teamData.impact.points_difference * 2.7;
+        try {
+          const simulationResponse = await fetch(
+            `http://127.0.0.1:5000/api/simulations/${encodeURIComponent(selectedTeam)}`
+          );
+          if (simulationResponse.ok) {
+            const simulation = await simulationResponse.json();
+            winsImpact = simulation.difference.mean;
+          }
+        } catch (simulationErr) {
+          console.error("Simulation unavailable:", simulationErr);
+        }
+
         const scoringImpactData = {
           current_ppg: teamData.current.ppg,
           optimized_ppg: teamData.optimal.ppg,
           points_difference: teamData.impact.points_difference,
           ft_attempts: teamData.current.free_throws.attempts,
           ft_percentage: teamData.current.free_throws.percentage,
-          projected_wins_impact: teamData.impact.points_difference * 2.7
+          projected_wins_impact: winsImpact
         };
 
         setTeamData(formattedData);